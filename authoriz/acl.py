@@ -0,0 +1,248 @@
+"""
+Materialized access control list.
+
+Effective allowed (user, action, param value) tuples are stored in
+`AllowedAction` table for SQL-side joins. The table is maintained
+incrementally:
+
+    rules reloaded - rows of the actions whose rules changed are
+        recomputed, changes are detected by rules digests of actions
+        kept in `ACLActionState` table;
+    user roles changed - rows of the user are recomputed.
+
+Rows are written with `bulk_create` / `bulk_update` in batches.
+"""
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from authoriz import config
+from authoriz.models import ACLActionState, AllowedAction
+from authoriz.namespaces.base import ActionEnumsService
+from authoriz.parsing.compiled import rules_fingerprint
+from authoriz.parsing.service import RulesParsingService
+from authoriz.service import PermissionsService
+from authoriz.signals import rules_reloaded, user_roles_changed
+from authoriz.utils.resolving import resolve_object
+from authoriz.utils.roles import get_role_params
+
+
+def _resolve(func):
+    if isinstance(func, str):
+        return resolve_object(func)
+    return func
+
+
+class ACLMaintainer:
+    """
+    Compute and write materialized ACL rows.
+    """
+    def __init__(self, get_users=None, get_objects=None, batch_size=None):
+        self.get_users = _resolve(get_users or config.ACL_USERS)
+        self.get_objects = _resolve(get_objects or config.ACL_OBJECTS)
+        self.batch_size = batch_size or config.ACL_BATCH_SIZE
+
+    @staticmethod
+    def get_actions() -> List[str]:
+        """
+        Get all registered actions (without wildcards).
+        """
+        registry = ActionEnumsService.get_registry()
+        return sorted(action for action in registry.action_params if not action.endswith('*'))
+
+    @staticmethod
+    def get_rules_digests(actions: Iterable[str]) -> Dict[str, str]:
+        """
+        Get digest of the compiled rules applying to each of actions.
+        """
+        entries_by_action = {}
+        for entry in RulesParsingService.get_compiled_rules().actions:
+            for name in ActionEnumsService.expand_action(entry.full_name):
+                entries_by_action.setdefault(name, []).append(entry)
+        return {
+            action: hashlib.blake2b(
+                rules_fingerprint(entries_by_action.get(action, ())).encode(),
+                digest_size=16
+            ).hexdigest()
+            for action in actions
+        }
+
+    def sync_rules(self) -> List[str]:
+        """
+        Recompute rows of the actions whose rules changed since
+        the last sync. Returns the changed actions.
+        """
+        digests = self.get_rules_digests(self.get_actions())
+        states = {state.action: state for state in ACLActionState.objects.all()}
+        changed = [
+            action for action, digest in digests.items()
+            if action not in states or states[action].rules_digest != digest
+        ]
+        removed = [action for action in states if action not in digests]
+        if changed:
+            self.refresh(actions=changed)
+        with transaction.atomic():
+            if removed:
+                AllowedAction.objects.filter(action__in=removed).delete()
+                ACLActionState.objects.filter(action__in=removed).delete()
+            ACLActionState.objects.bulk_create([
+                ACLActionState(action=action, rules_digest=digests[action])
+                for action in changed if action not in states
+            ], batch_size=self.batch_size)
+            updated = [states[action] for action in changed if action in states]
+            for state in updated:
+                state.rules_digest = digests[state.action]
+            ACLActionState.objects.bulk_update(updated, ['rules_digest'], batch_size=self.batch_size)
+        return changed
+
+    def refresh_user(self, user_id):
+        """
+        Recompute rows of the user.
+        """
+        self.refresh(user_ids=[user_id])
+
+    def refresh(self, user_ids: Optional[Iterable] = None, actions: Optional[List[str]] = None):
+        """
+        Recompute rows of the users (all by default) for the
+        actions (all by default) and write the difference.
+        """
+        if user_ids is None:
+            if self.get_users is None:
+                raise RuntimeError('ACL users source is not configured.')
+            user_ids = self.get_users()
+        if actions is None:
+            actions = self.get_actions()
+        objects = self._get_objects(actions)
+        to_create, to_update, to_delete = [], [], []
+        for user_id in user_ids:
+            rows = self.compute_user_rows(user_id, objects)
+            existing = {
+                (row.action, row.param_value): row
+                for row in AllowedAction.objects.filter(user_id=str(user_id), action__in=actions)
+            }
+            for (action, param_value), rule in rows.items():
+                row = existing.pop((action, param_value), None)
+                if row is None:
+                    to_create.append(AllowedAction(
+                        user_id=str(user_id),
+                        action=action,
+                        param_value=param_value,
+                        rule=rule
+                    ))
+                elif row.rule != rule:
+                    row.rule = rule
+                    to_update.append(row)
+            to_delete.extend(row.pk for row in existing.values())
+            if len(to_create) + len(to_update) + len(to_delete) >= self.batch_size:
+                self._write(to_create, to_update, to_delete)
+                to_create, to_update, to_delete = [], [], []
+        self._write(to_create, to_update, to_delete)
+
+    def _get_objects(self, actions: List[str]) -> Dict[str, List[Tuple[str, dict]]]:
+        """
+        Get (param value, params) of the objects of each action.
+        """
+        objects = {}
+        for action in actions:
+            params = ActionEnumsService.get_registry().get_action_params(action)
+            if not params:
+                objects[action] = [('', {})]
+            else:
+                if self.get_objects is None:
+                    raise RuntimeError('ACL objects source is not configured.')
+                objects[action] = [
+                    (str(value), {params[0]: value})
+                    for value in self.get_objects(action, params[0])
+                ]
+        return objects
+
+    def compute_user_rows(self, user_id, objects: Dict[str, List[Tuple[str, dict]]]) -> Dict[Tuple[str, str], int]:
+        """
+        Get {(action, param value): rule} of the allowed actions
+        of the user on the objects.
+        """
+        params_list = []
+        params_indexes = {}
+        for action_objects in objects.values():
+            for _, params in action_objects:
+                key = tuple(sorted((k, str(v)) for k, v in params.items()))
+                if key not in params_indexes:
+                    params_indexes[key] = len(params_list)
+                    params_list.append(params)
+
+        roles_list = [[]] * len(params_list)
+        if RulesParsingService.roles_required(objects):
+            role_params = get_role_params()
+            roles_list = PermissionsService.get_all_user_roles_many(user_id, [
+                {k: v for k, v in params.items() if k in role_params}
+                for params in params_list
+            ])
+        allowed_rules = [
+            RulesParsingService.get_user_allowed_rules(user_id, user_roles, params)
+            for params, user_roles in zip(params_list, roles_list)
+        ]
+
+        rows = {}
+        for action, action_objects in objects.items():
+            for param_value, params in action_objects:
+                key = tuple(sorted((k, str(v)) for k, v in params.items()))
+                rule = allowed_rules[params_indexes[key]].get(action)
+                if rule is not None:
+                    rows[(action, param_value)] = rule
+        return rows
+
+    def _write(self, to_create, to_update, to_delete):
+        if not (to_create or to_update or to_delete):
+            return
+        with transaction.atomic():
+            AllowedAction.objects.bulk_create(to_create, batch_size=self.batch_size)
+            AllowedAction.objects.bulk_update(to_update, ['rule'], batch_size=self.batch_size)
+            for start in range(0, len(to_delete), self.batch_size):
+                AllowedAction.objects.filter(pk__in=to_delete[start:start + self.batch_size]).delete()
+
+
+_maintainer = None
+
+
+def get_acl_maintainer() -> ACLMaintainer:
+    """
+    Get ACL maintainer with configured sources.
+    """
+    global _maintainer
+    if _maintainer is None:
+        _maintainer = ACLMaintainer()
+    return _maintainer
+
+
+def _on_rules_reloaded(sender, **kwargs):
+    get_acl_maintainer().sync_rules()
+
+
+def _on_user_roles_changed(sender, user_id, **kwargs):
+    get_acl_maintainer().refresh_user(user_id)
+
+
+def connect_acl_hooks():
+    """
+    Keep materialized ACL up to date with rules and roles changes.
+    """
+    rules_reloaded.connect(_on_rules_reloaded, dispatch_uid='authoriz.acl.rules_reloaded')
+    user_roles_changed.connect(_on_user_roles_changed, dispatch_uid='authoriz.acl.user_roles_changed')
+
+
+def disconnect_acl_hooks():
+    """
+    Disconnect materialized ACL maintenance handlers.
+    """
+    rules_reloaded.disconnect(dispatch_uid='authoriz.acl.rules_reloaded')
+    user_roles_changed.disconnect(dispatch_uid='authoriz.acl.user_roles_changed')
+
+
+__all__ = [
+    'ACLMaintainer',
+    'get_acl_maintainer',
+    'connect_acl_hooks',
+    'disconnect_acl_hooks',
+]
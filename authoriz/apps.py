@@ -1,7 +1,11 @@
 from django.apps import AppConfig
 
+from authoriz import config
 from authoriz.cache import clear_cache
+from authoriz.namespaces.base import ActionEnumsService
 from authoriz.parsing.service import RulesParsingService
+from authoriz.signals import connect_invalidation_hooks
+from authoriz.utils.roles import get_roles_plan
 
 
 class AuthorizationConfig(AppConfig):
@@ -9,5 +13,13 @@ class AuthorizationConfig(AppConfig):
     name = 'authoriz'
 
     def ready(self):
+        ActionEnumsService.freeze()
         RulesParsingService.initialize()
+        get_roles_plan()
         clear_cache()
+        if config.CACHE_INVALIDATION_HOOKS:
+            connect_invalidation_hooks()
+        if config.ACL_AUTO_SYNC:
+            # Models could be imported only when apps are ready.
+            from authoriz.acl import connect_acl_hooks
+            connect_acl_hooks()
@@ -2,69 +2,367 @@
 Caching functionality for authorization module.
 """
 
-import re
+import atexit
+import hashlib
 import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import warnings
+from abc import ABC, abstractmethod
+from fnmatch import fnmatchcase
+from functools import partial
+
 from django.core.cache import caches
-from django.conf import settings
-from django.core.cache.backends import locmem
-from django_redis.cache import RedisCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+
+from authoriz import config
+from authoriz.metrics import get_metrics_collector, CACHE_REQUESTS, CACHE_LATENCY, CACHE_WRITES_DROPPED
+from authoriz.tracing import get_tracer
+from authoriz.utils.resolving import resolve_object
 
+logger = logging.getLogger(__name__)
 
-class CacheManager:
-    def __init__(self, client, cache_settings_key):
+
+class BaseCacheManager(ABC):
+    """
+    Interface of the cache backend used by authorization module.
+    Keys are passed without cache backend prefix and version.
+    """
+    def __init__(self, client, alias=None):
         self.client = client
-        if isinstance(self.client, RedisCache):
-            self.type = 'redis'
-        else:
-            self.type = 'mem'
-        self.cache_settings_key = cache_settings_key
+        self.alias = alias
+
+    def get(self, key):
+        return self.client.get(key, None)
+
+    def get_many(self, keys) -> dict:
+        keys = list(keys)
+        if not keys:
+            return {}
+        return self.client.get_many(keys)
 
     def set(self, key, value, timeout=None):
-        self.client.set(
-            key=key,
-            value=value,
-            timeout=timeout
-        )
+        self.client.set(key, value, timeout=timeout)
 
-    def get(self, key):
-        return self.client.get(
-            key=key,
-            default=None
-        )
+    def set_many(self, data: dict, timeout=None):
+        if data:
+            self.client.set_many(data, timeout=timeout)
+
+    def delete(self, key):
+        return self.client.delete(key)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        if keys:
+            self.client.delete_many(keys)
+        return len(keys)
+
+    @abstractmethod
+    def keys(self, pattern) -> list:
+        """
+        Get keys matching glob pattern.
+        """
+
+    def delete_pattern(self, pattern) -> int:
+        """
+        Delete keys matching glob pattern.
+        """
+        return self.delete_many(self.keys(pattern))
+
+
+class RedisCacheManager(BaseCacheManager):
+    """
+    Cache manager of `django_redis` backend. Keys are listed with
+    incremental SCAN on all the primary nodes of Redis Cluster (or on
+    the only node of standalone Redis) and deleted with batched UNLINK.
+    On cluster keys are grouped by slot, patterns with hash tag are
+    scanned on the node owning the tag slot only.
+    """
+    SCAN_COUNT = 1000
+    UNLINK_BATCH_SIZE = 500
+
+    def _get_nodes(self, redis_client, pattern):
+        if not hasattr(redis_client, 'get_primaries'):
+            return [redis_client]
+        if get_hash_tag(pattern) is not None:
+            node = redis_client.get_node_from_key(pattern)
+            return [redis_client.get_redis_connection(node)]
+        return [redis_client.get_redis_connection(node) for node in redis_client.get_primaries()]
+
+    def _scan(self, redis_client, pattern):
+        pattern = self.client.client.make_pattern(pattern)
+        for node in self._get_nodes(redis_client, pattern):
+            yield from node.scan_iter(match=pattern, count=self.SCAN_COUNT)
 
     def keys(self, pattern):
-        if self.type == 'redis':
-            return self.client.keys(pattern)
-        elif self.type == 'mem':
-            location = settings.CACHES[self.cache_settings_key]['LOCATION']
-            if location not in locmem._caches:
-                return []
-            local_caches = locmem._caches[location]
-            keys = []
-            r = re.compile(self.client.make_key(pattern))
-            for k in local_caches:
-                if r.match(k):
-                    keys.append(k)
-            return keys
+        redis_client = self.client.client.get_client(write=False)
+        reverse_key = self.client.client.reverse_key
+        return [
+            reverse_key(key.decode() if isinstance(key, bytes) else key)
+            for key in self._scan(redis_client, pattern)
+        ]
+
+    def delete_pattern(self, pattern):
+        redis_client = self.client.client.get_client(write=True)
+        keyslot = getattr(redis_client, 'keyslot', None)
+        batches = {}
+        deleted = 0
+        for key in self._scan(redis_client, pattern):
+            batch = batches.setdefault(keyslot(key) if keyslot else None, [])
+            batch.append(key)
+            if len(batch) >= self.UNLINK_BATCH_SIZE:
+                deleted += redis_client.unlink(*batch)
+                batch.clear()
+        for batch in batches.values():
+            if batch:
+                deleted += redis_client.unlink(*batch)
+        return deleted
+
+
+class LocMemCacheManager(BaseCacheManager):
+    """
+    Cache manager of local memory backend. Local memory cache is
+    not shared between processes, so process-local index of the
+    keys written by the authorization module is complete. Keys
+    expired or culled by the backend are dropped from the index
+    each time it grows by `INDEX_PRUNE_STEP` keys.
+    """
+    INDEX_PRUNE_STEP = 1000
+
+    def __init__(self, client, alias=None):
+        super().__init__(client, alias)
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    def _index_keys(self, keys):
+        with self._lock:
+            size = len(self._keys)
+            self._keys.update(keys)
+            if len(self._keys) // self.INDEX_PRUNE_STEP > size // self.INDEX_PRUNE_STEP:
+                # Keys are checked and dropped under the lock, so a key set
+                # concurrently is indexed again after it is dropped.
+                self._keys = {key for key in self._keys if self.client.has_key(key)}
+
+    def set(self, key, value, timeout=None):
+        super().set(key, value, timeout=timeout)
+        self._index_keys([key])
+
+    def set_many(self, data, timeout=None):
+        super().set_many(data, timeout=timeout)
+        self._index_keys(data)
 
     def delete(self, key):
-        return self.client.delete(key)
+        with self._lock:
+            self._keys.discard(key)
+        return super().delete(key)
 
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self._lock:
+            self._keys.difference_update(keys)
+        return super().delete_many(keys)
 
-cache = caches['default']
-cache_settings_key = 'default'
+    def keys(self, pattern):
+        with self._lock:
+            keys = [key for key in self._keys if fnmatchcase(key, pattern)]
+        # Drop expired keys from the index.
+        existing = [key for key in keys if self.client.has_key(key)]
+        if len(existing) != len(keys):
+            with self._lock:
+                self._keys.difference_update(set(keys) - set(existing))
+        return existing
 
 
-cache_manager = CacheManager(
-    client=cache,
-    cache_settings_key=cache_settings_key
-)
+class DjangoCacheManager(BaseCacheManager):
+    """
+    Cache manager of any Django cache backend. Backends can't
+    list keys, so the written keys are indexed in the cache:
+
+        <namespace>.:groups -> {<namespace>.<user_id>, ...}
+        <namespace>.<user_id>.:index -> {key, ...}
+
+    Index is updated with read-modify-write, concurrent writers
+    could lose index entries. Use TTLs with this manager. Entries
+    of the keys (or group indexes) expired or culled by the backend
+    are dropped each time an index grows by `INDEX_PRUNE_STEP` items.
+    """
+    INDEX_SUFFIX = ':index'
+    GROUPS_SUFFIX = ':groups'
+    INDEX_PRUNE_STEP = 1000
+
+    @staticmethod
+    def _get_group(key):
+        return '.'.join(key.split('.', 2)[:2])
 
+    def _get_group_index_key(self, group):
+        return f'{group}.{self.INDEX_SUFFIX}'
 
-def build_key(namespace='actions', prefix=None, values=None, arrays=None, dicts=None):
+    def _add_to_index(self, index_key, items, get_key=None):
+        index = self.client.get(index_key) or set()
+        if index.issuperset(items):
+            return False
+        new_index = index | set(items)
+        if len(new_index) // self.INDEX_PRUNE_STEP > len(index) // self.INDEX_PRUNE_STEP:
+            new_index = self._prune_index(new_index, get_key)
+        self.client.set(index_key, new_index, timeout=None)
+        return True
+
+    def _prune_index(self, index, get_key=None) -> set:
+        """
+        Drop index items whose keys don't exist anymore.
+        """
+        keys = {get_key(item) if get_key else item: item for item in index}
+        existing = self.client.get_many(list(keys))
+        return {item for key, item in keys.items() if key in existing}
+
+    def _index_keys(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(self._get_group(key), []).append(key)
+        for group, group_keys in groups.items():
+            if self._add_to_index(self._get_group_index_key(group), group_keys):
+                namespace = group.split('.', 1)[0]
+                self._add_to_index(f'{namespace}.{self.GROUPS_SUFFIX}', [group], self._get_group_index_key)
+
+    def set(self, key, value, timeout=None):
+        super().set(key, value, timeout=timeout)
+        self._index_keys([key])
+
+    def set_many(self, data, timeout=None):
+        super().set_many(data, timeout=timeout)
+        self._index_keys(data)
+
+    def _get_groups(self, pattern):
+        parts = pattern.split('.', 2)
+        if len(parts) > 1 and not any(c in parts[1] for c in '*?['):
+            return [f'{parts[0]}.{parts[1]}']
+        return list(self.client.get(f'{parts[0]}.{self.GROUPS_SUFFIX}') or ())
+
+    def keys(self, pattern):
+        groups = self._get_groups(pattern)
+        indexes = self.client.get_many([self._get_group_index_key(group) for group in groups])
+        return [key for index in indexes.values() for key in index if fnmatchcase(key, pattern)]
+
+    def delete_pattern(self, pattern):
+        groups = self._get_groups(pattern)
+        index_keys = [self._get_group_index_key(group) for group in groups]
+        indexes = self.client.get_many(index_keys)
+        deleted = 0
+        for index_key, index in indexes.items():
+            keys = {key for key in index if fnmatchcase(key, pattern)}
+            if not keys:
+                continue
+            deleted += super().delete_many(keys)
+            index -= keys
+            if index:
+                self.client.set(index_key, index, timeout=None)
+            else:
+                self.client.delete(index_key)
+        return deleted
+
+
+_cache_manager = None
+
+
+def get_cache_manager() -> BaseCacheManager:
     """
-    Build redis key for specific params.
+    Get cache manager of the configured cache alias.
     """
+    global _cache_manager
+    if _cache_manager is None:
+        client = caches[config.CACHE_ALIAS]
+        manager_class = config.CACHE_MANAGER
+        if isinstance(manager_class, str):
+            manager_class = resolve_object(manager_class)
+        if manager_class is None:
+            # django_redis is not imported, it is optional.
+            if type(client).__module__.startswith('django_redis.'):
+                manager_class = RedisCacheManager
+            elif isinstance(client, LocMemCache):
+                manager_class = LocMemCacheManager
+            else:
+                manager_class = DjangoCacheManager
+        _cache_manager = manager_class(client, config.CACHE_ALIAS)
+    return _cache_manager
+
+
+def set_cache_manager(manager: BaseCacheManager = None):
+    """
+    Replace cache manager. None resets it to the configured one.
+    """
+    global _cache_manager
+    _cache_manager = manager
+
+
+class _CacheManagerProxy:
+    """
+    Deprecated module-level cache manager, it proxies
+    attributes to the configured one.
+    """
+    def __getattr__(self, name):
+        warnings.warn(
+            'cache_manager is deprecated, use get_cache_manager() instead.',
+            DeprecationWarning,
+            stacklevel=2
+        )
+        return getattr(get_cache_manager(), name)
+
+
+cache_manager = _CacheManagerProxy()
+
+# Deprecated, cache managers are specific to backends now.
+CacheManager = BaseCacheManager
+
+
+def get_hash_tag(key):
+    """
+    Get Redis Cluster hash tag of the key, None if there is no one.
+    Only the first `{...}` with non-empty content is a hash tag.
+    """
+    if isinstance(key, bytes):
+        key = key.decode()
+    start = key.find('{')
+    if start == -1:
+        return None
+    end = key.find('}', start + 1)
+    if end == -1 or end == start + 1:
+        return None
+    return key[start + 1:end]
+
+
+def get_user_key_part(user_id):
+    """
+    Get user part of the keys. With hash tags all the keys
+    of a user are in the same Redis Cluster slot.
+    """
+    if config.CACHE_HASH_TAGS:
+        return f'{{{user_id}}}'
+    return str(user_id)
+
+
+# Version of hashed keys format, it is a part of the key.
+HASHED_KEY_VERSION = 'h1'
+HASHED_KEY_DIGEST_SIZE = 16
+
+
+def build_key(namespace='actions', prefix=None, values=None, arrays=None, dicts=None, strategy=None):
+    """
+    Build redis key for specific params. Keys are canonical:
+    arrays items and dicts keys are sorted, so the same data
+    gives the same key in any process.
+
+    With 'hashed' strategy arrays and dicts are replaced with
+    their digest, namespace, prefix and values stay readable,
+    so keys could still be matched by user.
+    """
+    strategy = strategy or config.CACHE_KEY_STRATEGY
+    if strategy not in ('plain', 'hashed'):
+        raise RuntimeError(f'Unexpected cache key strategy {strategy}.')
     key = namespace
     if prefix:
         key += f'_{prefix}'
@@ -73,19 +371,335 @@ def build_key(namespace='actions', prefix=None, values=None, arrays=None, dicts=
     dicts = dicts or {}
     if len(values) != 0:
         key += f'.{".".join(str(x) for x in values)}'
+    variable_parts = []
     for array in arrays:
         if len(array) != 0:
-            key += f'.{",".join(str(x) for x in array)}'
+            variable_parts.append(",".join(sorted(str(x) for x in array)))
     for d in dicts:
         if len(d) != 0:
-            key += '.' + '&'.join([f"{str(key)}={str(value)}" for key, value in d.items()])
+            items = sorted((str(key), str(value)) for key, value in d.items())
+            variable_parts.append('&'.join([f"{key}={value}" for key, value in items]))
+    if strategy == 'hashed' and variable_parts:
+        digest = hashlib.blake2b(
+            '.'.join(variable_parts).encode(),
+            digest_size=HASHED_KEY_DIGEST_SIZE
+        ).hexdigest()
+        return f'{key}.{HASHED_KEY_VERSION}.{digest}'
+    for part in variable_parts:
+        key += f'.{part}'
     return key
 
 
+class CacheRevalidator:
+    """
+    Background thread recomputing stale cache entries. Each key
+    is recomputed once however many times it was requested.
+    """
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, key, func) -> bool:
+        """
+        Schedule recomputation of the key. Returns False if there
+        are too many pending keys.
+        """
+        with self._lock:
+            if key in self._pending:
+                return True
+            if len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(key)
+            # Thread is not inherited by forked worker processes.
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='authoriz-cache-revalidator', daemon=True)
+                self._thread.start()
+        self._queue.put((key, func))
+        return True
+
+    def join(self):
+        """
+        Wait until all the pending keys are recomputed.
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            key, func = self._queue.get()
+            try:
+                func()
+            except Exception:
+                logger.exception('Cache entry %s revalidation failed.', key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                close_old_connections()
+                self._queue.task_done()
+
+
+revalidator = CacheRevalidator()
+
+
+class CacheWriter:
+    """
+    Write-behind cache population. Entries are buffered and written by
+    a background thread with `set_many`, one request per key kind.
+    Buffer is bounded, entries are dropped when it is full: a dropped
+    entry is just a cache miss later. A newer value of a buffered key
+    replaces the older one. Entries discarded while they are being
+    written are deleted again after the write.
+    """
+    def __init__(self, max_pending=10000, batch_size=500):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        # key -> (kind, value, timeout)
+        self._pending = {}
+        self._writing = 0
+        # Keys of the batch being written and the ones of them discarded meanwhile.
+        self._in_flight = frozenset()
+        self._discarded_in_flight = set()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._atexit_registered = False
+
+    def submit(self, kind, values: dict) -> int:
+        """
+        Schedule writing of the encoded (value, timeout) pairs by keys.
+        Returns number of the entries dropped as the buffer is full.
+        """
+        dropped = 0
+        with self._condition:
+            for key, (value, timeout) in values.items():
+                if key not in self._pending and len(self._pending) >= self.max_pending:
+                    dropped += 1
+                    continue
+                self._pending[key] = (kind, value, timeout)
+            self._ensure_thread()
+            self._condition.notify_all()
+        if dropped:
+            get_metrics_collector().increment(CACHE_WRITES_DROPPED, dropped, kind=kind)
+        return dropped
+
+    def discard(self, keys=(), pattern=None):
+        """
+        Drop buffered entries by keys or glob pattern, so entries
+        invalidated before they are written don't come back.
+        """
+        with self._condition:
+            for key in keys:
+                self._pending.pop(key, None)
+                if key in self._in_flight:
+                    self._discarded_in_flight.add(key)
+            if pattern is not None:
+                for key in [key for key in self._pending if fnmatchcase(key, pattern)]:
+                    del self._pending[key]
+                self._discarded_in_flight.update(key for key in self._in_flight if fnmatchcase(key, pattern))
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Wait until all the buffered entries are written. Returns
+        False if they are not written in `timeout` seconds.
+        """
+        with self._condition:
+            if self._pending:
+                self._ensure_thread()
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def _ensure_thread(self):
+        # Thread is not inherited by forked worker processes.
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='authoriz-cache-writer', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                self._atexit_registered = True
+                atexit.register(self.flush, config.CACHE_WRITE_BEHIND_SHUTDOWN_TIMEOUT)
+
+    def _take_batch(self) -> dict:
+        batch = {}
+        for key in list(self._pending)[:self.batch_size]:
+            batch[key] = self._pending.pop(key)
+        self._writing += 1
+        self._in_flight = frozenset(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                batch = self._take_batch()
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception('Writing of %d cache entries failed.', len(batch))
+            finally:
+                with self._condition:
+                    discarded = self._discarded_in_flight
+                    self._in_flight = frozenset()
+                    self._discarded_in_flight = set()
+                if discarded:
+                    # Invalidation could delete them before they were written.
+                    try:
+                        get_cache_manager().delete_many(discarded)
+                    except Exception:
+                        logger.exception('Deleting of %d discarded cache entries failed.', len(discarded))
+                with self._condition:
+                    self._writing -= 1
+                    self._condition.notify_all()
+
+    @staticmethod
+    def _write(batch: dict):
+        values_by_kind = {}
+        for key, (kind, value, timeout) in batch.items():
+            values_by_kind.setdefault(kind, {})[key] = (value, timeout)
+        for kind, values in values_by_kind.items():
+            _set_many(kind, values)
+
+
+writer = CacheWriter(
+    max_pending=config.CACHE_WRITE_BEHIND_MAX_PENDING,
+    batch_size=config.CACHE_WRITE_BEHIND_BATCH_SIZE
+)
+
+
+def flush_cache_writes(timeout=None) -> bool:
+    """
+    Wait until write-behind entries are written, e.g. in tests
+    or on graceful shutdown.
+    """
+    return writer.flush(timeout)
+
+
+def _get_ttl(kind):
+    """
+    Get TTL of the key kind with jitter applied.
+    """
+    if kind == 'dec':
+        # Decisions embed user roles, so they expire with the roles too.
+        ttls = [ttl for ttl in (config.CACHE_ROLES_TTL, config.CACHE_ACTIONS_TTL) if ttl is not None]
+        ttl = min(ttls) if ttls else None
+    else:
+        ttl = config.CACHE_ROLES_TTL if kind == 'aur' else config.CACHE_ACTIONS_TTL
+    if ttl is not None and config.CACHE_TTL_JITTER:
+        # Whole seconds, so entries with equal timeouts are written with one request.
+        ttl -= int(ttl * random.uniform(0, config.CACHE_TTL_JITTER))
+    return ttl
+
+
+def _decode_cache_value(key, value, revalidate=None):
+    """
+    Decode cache value. Returns (outcome, data) pair.
+
+    Entries saved in stale-while-revalidate mode are returned after
+    soft expiration too, `revalidate` is called in the background
+    to recompute them. Without `revalidate` they are a miss.
+    """
+    if value is None:
+        return 'miss', None
+    data = json.loads(value)
+    if isinstance(data, dict) and 'expires_at' in data:
+        if data['expires_at'] <= time.time():
+            if revalidate is None or not revalidator.submit(key, revalidate):
+                return 'miss', None
+            return 'stale', data['data']
+        return 'hit', data['data']
+    return 'hit', data
+
+
+def _encode_cache_value(kind, data):
+    """
+    Encode cache value. Returns (value, timeout) pair.
+    """
+    ttl = _get_ttl(kind)
+    if ttl is not None and config.CACHE_STALE_TTL:
+        data = {'data': data, 'expires_at': time.time() + ttl}
+        return json.dumps(data), ttl + config.CACHE_STALE_TTL
+    return json.dumps(data), ttl
+
+
+def _get_from_cache(key, kind, revalidate=None):
+    """
+    Get cache value reporting cache hits and misses of the key kind.
+    """
+    metrics = get_metrics_collector()
+    with get_tracer().start_span('authoriz.cache.get', kind=kind) as span:
+        with metrics.timer(CACHE_LATENCY, kind=kind, operation='get'):
+            value = get_cache_manager().get(key)
+        outcome, data = _decode_cache_value(key, value, revalidate)
+        span.set_attribute('outcome', outcome)
+    metrics.increment(CACHE_REQUESTS, kind=kind, result=outcome)
+    return data
+
+
+def _get_many_from_cache(keys: dict, kind, revalidate: dict = None) -> dict:
+    """
+    Get cache values with one request. `keys` and `revalidate` are dicts
+    by the same ids, result contains found values by these ids.
+    """
+    revalidate = revalidate or {}
+    metrics = get_metrics_collector()
+    result = {}
+    outcomes = []
+    with get_tracer().start_span('authoriz.cache.get_many', kind=kind, keys_count=len(keys)) as span:
+        with metrics.timer(CACHE_LATENCY, kind=kind, operation='get_many'):
+            values = get_cache_manager().get_many(keys.values())
+        for id_, key in keys.items():
+            outcome, data = _decode_cache_value(key, values.get(key), revalidate.get(id_))
+            outcomes.append(outcome)
+            if outcome != 'miss':
+                result[id_] = data
+        span.set_attribute('hits', len(result))
+    for outcome in outcomes:
+        metrics.increment(CACHE_REQUESTS, kind=kind, result=outcome)
+    return result
+
+
+def _save_to_cache(key, kind, data):
+    value, timeout = _encode_cache_value(kind, data)
+    if config.CACHE_WRITE_BEHIND:
+        writer.submit(kind, {key: (value, timeout)})
+        return
+    with get_tracer().start_span('authoriz.cache.set', kind=kind):
+        with get_metrics_collector().timer(CACHE_LATENCY, kind=kind, operation='set'):
+            get_cache_manager().set(key, value, timeout=timeout)
+
+
+def _set_many(kind, values: dict):
+    """
+    Write encoded (value, timeout) pairs by keys, one request per timeout.
+    """
+    values_by_timeout = {}
+    for key, (value, timeout) in values.items():
+        values_by_timeout.setdefault(timeout, {})[key] = value
+    for timeout, timeout_values in values_by_timeout.items():
+        with get_tracer().start_span('authoriz.cache.set_many', kind=kind, keys_count=len(timeout_values)):
+            with get_metrics_collector().timer(CACHE_LATENCY, kind=kind, operation='set_many'):
+                get_cache_manager().set_many(timeout_values, timeout=timeout)
+
+
+def _save_many_to_cache(data: dict, kind):
+    """
+    Save values by keys with as few requests as their timeouts allow.
+    """
+    if not data:
+        return
+    values = {key: _encode_cache_value(kind, item) for key, item in data.items()}
+    if config.CACHE_WRITE_BEHIND:
+        writer.submit(kind, values)
+        return
+    _set_many(kind, values)
+
+
 def save_user_allowed_actions_to_cache(user_id, user_roles, params, data, cache_prefix=None):
     key = build_key(
         prefix=cache_prefix,
-        values=[user_id, 'uaa'],
+        values=[get_user_key_part(user_id), 'uaa'],
         arrays=[
             user_roles
         ],
@@ -93,16 +707,13 @@ def save_user_allowed_actions_to_cache(user_id, user_roles, params, data, cache_
             params
         ]
     )
-    cache_manager.set(
-        key=key,
-        value=json.dumps(data)
-    )
+    _save_to_cache(key, 'uaa', data)
 
 
-def get_user_allowed_actions_from_cache(user_id, user_roles, params, cache_prefix=None):
+def get_user_allowed_actions_from_cache(user_id, user_roles, params, cache_prefix=None, revalidate=None):
     key = build_key(
         prefix=cache_prefix,
-        values=[user_id, 'uaa'],
+        values=[get_user_key_part(user_id), 'uaa'],
         arrays=[
             user_roles
         ],
@@ -110,85 +721,289 @@ def get_user_allowed_actions_from_cache(user_id, user_roles, params, cache_prefi
             params
         ]
     )
-    data = cache_manager.get(
-        key=key
+    return _get_from_cache(key, 'uaa', revalidate=revalidate)
+
+
+def _build_user_allowed_actions_key(user_id, user_roles, namespace, version, params, cache_prefix=None):
+    return build_key(
+        prefix=cache_prefix,
+        values=[get_user_key_part(user_id), 'uaa', namespace, version],
+        arrays=[
+            user_roles
+        ],
+        dicts=[
+            params
+        ]
     )
-    if data is None:
-        return
-    return json.loads(data)
 
 
-def get_all_user_roles_from_cache(user_id, params, cache_prefix=None):
+def get_user_allowed_actions_by_namespaces_from_cache(user_id, user_roles, params_by_namespace: dict,
+                                                      cache_prefix=None, revalidate=None) -> dict:
+    """
+    Get user allowed actions of each namespace with one request.
+    `params_by_namespace` are {namespace: (rules version, params)},
+    `revalidate` is called with namespace to recompute stale entries.
+    Result contains actions lists by namespaces found in the cache.
+    """
+    keys = {
+        namespace: _build_user_allowed_actions_key(user_id, user_roles, namespace, version, params, cache_prefix)
+        for namespace, (version, params) in params_by_namespace.items()
+    }
+    revalidate_by_namespace = None
+    if revalidate is not None:
+        revalidate_by_namespace = {namespace: partial(revalidate, namespace) for namespace in keys}
+    return _get_many_from_cache(keys, 'uaa', revalidate_by_namespace)
+
+
+def save_user_allowed_actions_by_namespaces_to_cache(user_id, user_roles, params_by_namespace: dict,
+                                                     actions_by_namespace: dict, cache_prefix=None):
+    """
+    Save user allowed actions of each namespace with one request.
+    """
+    _save_many_to_cache({
+        _build_user_allowed_actions_key(user_id, user_roles, namespace, *params_by_namespace[namespace], cache_prefix):
+            actions
+        for namespace, actions in actions_by_namespace.items()
+    }, 'uaa')
+
+
+def _build_user_decisions_key(user_id, role_params, namespace, version, params, cache_prefix=None):
+    return build_key(
+        prefix=cache_prefix,
+        values=[get_user_key_part(user_id), 'dec', namespace, version],
+        dicts=[
+            params,
+            role_params
+        ]
+    )
+
+
+def get_user_decisions_by_namespaces_from_cache(user_id, role_params, params_by_namespace: dict,
+                                                cache_prefix=None) -> dict:
+    """
+    Get user decisions of each namespace with one request. Decisions are
+    {'roles': user roles, 'actions': allowed actions} keyed by params roles
+    are resolved by instead of roles, `params_by_namespace` are
+    {namespace: (rules version, params actions are evaluated with)}.
+    Result contains decisions by namespaces found in the cache.
+    """
+    keys = {
+        namespace: _build_user_decisions_key(user_id, role_params, namespace, version, params, cache_prefix)
+        for namespace, (version, params) in params_by_namespace.items()
+    }
+    return _get_many_from_cache(keys, 'dec')
+
+
+def save_user_decisions_by_namespaces_to_cache(user_id, role_params, params_by_namespace: dict,
+                                               decisions_by_namespace: dict, cache_prefix=None):
+    """
+    Save user decisions of each namespace with one request.
+    """
+    _save_many_to_cache({
+        _build_user_decisions_key(
+            user_id, role_params, namespace, *params_by_namespace[namespace], cache_prefix
+        ): decision
+        for namespace, decision in decisions_by_namespace.items()
+    }, 'dec')
+
+
+def delete_user_decisions_from_cache(user_id, cache_prefix=None) -> int:
+    """
+    Delete cached decisions of the user, e.g. when user roles changed.
+    """
+    pattern = build_key(
+        prefix=cache_prefix,
+        values=[get_user_key_part(user_id), 'dec']
+    )
+    writer.discard(pattern=f'{pattern}.*')
+    with get_tracer().start_span('authoriz.cache.delete_pattern', kind='dec'):
+        with get_metrics_collector().timer(CACHE_LATENCY, kind='dec', operation='delete_pattern'):
+            return get_cache_manager().delete_pattern(f'{pattern}.*')
+
+
+def get_all_user_roles_from_cache(user_id, params, cache_prefix=None, revalidate=None):
+    """
+    Deprecated, roles are cached by each param with
+    `get_user_roles_by_items_from_cache` instead.
+    """
+    warnings.warn(
+        'get_all_user_roles_from_cache is deprecated, use get_user_roles_by_items_from_cache instead.',
+        DeprecationWarning,
+        stacklevel=2
+    )
     key = build_key(
         prefix=cache_prefix,
         values=[
-            user_id, 'aur'
+            get_user_key_part(user_id), 'aur'
         ],
         dicts=[
             params
         ]
     )
-    data = cache_manager.get(
-        key=key
-    )
-    if data is None:
-        return
-    return json.loads(data)
+    return _get_from_cache(key, 'aur', revalidate=revalidate)
 
 
 def save_all_user_roles_from_cache(user_id, params, data, cache_prefix=None):
+    """
+    Deprecated, roles are cached by each param with
+    `save_user_roles_by_items_to_cache` instead.
+    """
+    warnings.warn(
+        'save_all_user_roles_from_cache is deprecated, use save_user_roles_by_items_to_cache instead.',
+        DeprecationWarning,
+        stacklevel=2
+    )
     key = build_key(
         prefix=cache_prefix,
         values=[
-            user_id, 'aur'
+            get_user_key_part(user_id), 'aur'
         ],
         dicts=[
             params
         ]
     )
-    cache_manager.set(
-        key=key,
-        value=json.dumps(data),
+    _save_to_cache(key, 'aur', data)
+
+
+def _build_user_roles_by_param_key(user_id, param_name, param_value, cache_prefix=None):
+    return build_key(
+        prefix=cache_prefix,
+        values=[
+            get_user_key_part(user_id), 'aur'
+        ],
+        dicts=[
+            {param_name: param_value}
+        ]
     )
 
 
+def get_user_roles_by_items_from_cache(user_id, items, cache_prefix=None, revalidate=None) -> dict:
+    """
+    Get user roles by each of (param name, param value) items with one
+    request. Result contains roles lists by items found in the cache.
+    `revalidate` is called with (user_id, param_name, param_value) to
+    recompute stale entries.
+    """
+    keys = {
+        item: _build_user_roles_by_param_key(user_id, item[0], item[1], cache_prefix)
+        for item in items
+    }
+    revalidate_by_item = None
+    if revalidate is not None:
+        revalidate_by_item = {item: partial(revalidate, user_id, *item) for item in keys}
+    return _get_many_from_cache(keys, 'aur', revalidate_by_item)
+
+
+def save_user_roles_by_items_to_cache(user_id, roles_by_items: dict, cache_prefix=None):
+    """
+    Save user roles by each of (param name, param value) items with one request.
+    """
+    _save_many_to_cache({
+        _build_user_roles_by_param_key(user_id, param_name, param_value, cache_prefix): roles
+        for (param_name, param_value), roles in roles_by_items.items()
+    }, 'aur')
+
+
+def get_user_roles_by_params_from_cache(user_id, params, cache_prefix=None, revalidate=None) -> dict:
+    """
+    Get user roles by each of params with one request. Result contains
+    roles lists by param names found in the cache.
+    """
+    roles = get_user_roles_by_items_from_cache(user_id, params.items(), cache_prefix, revalidate)
+    return {param_name: param_roles for (param_name, _), param_roles in roles.items()}
+
+
+def save_user_roles_by_params_to_cache(user_id, params, roles_by_params: dict, cache_prefix=None):
+    """
+    Save user roles by each of params with one request.
+    """
+    save_user_roles_by_items_to_cache(user_id, {
+        (param_name, params[param_name]): roles
+        for param_name, roles in roles_by_params.items()
+    }, cache_prefix)
+
+
+def delete_user_roles_by_params_from_cache(items, cache_prefix=None) -> int:
+    """
+    Delete cached user roles by params. `items` are (user_id, param_name, param_value).
+    """
+    keys = {
+        _build_user_roles_by_param_key(user_id, param_name, param_value, cache_prefix)
+        for user_id, param_name, param_value in items
+    }
+    writer.discard(keys)
+    with get_tracer().start_span('authoriz.cache.delete_many', kind='aur', keys_count=len(keys)):
+        with get_metrics_collector().timer(CACHE_LATENCY, kind='aur', operation='delete_many'):
+            return get_cache_manager().delete_many(keys)
+
+
 def clear_cache(namespace='actions', cache_prefix=None):
     """
-    Clear all redis cache for namespace.
+    Clear all cache for namespace.
     """
     pattern = build_key(
         namespace=namespace,
         prefix=cache_prefix,
     )
     pattern += '.*'
-    keys = cache_manager.keys(pattern)
-    for key in keys:
-        cache_manager.delete(key)
+    writer.discard(pattern=pattern)
+    get_cache_manager().delete_pattern(pattern)
+
+
+def clear_user_roles_cache(namespace='actions', cache_prefix=None):
+    """
+    Clear cached roles of all the users, e.g. when role classes
+    they are resolved by changed.
+    """
+    pattern = build_key(namespace=namespace, prefix=cache_prefix) + '.*.aur*'
+    writer.discard(pattern=pattern)
+    get_cache_manager().delete_pattern(pattern)
 
 
 def clear_user_cache(user_id, namespace='actions', cache_prefix=None):
     """
-    Clear specific user cache from redis.
+    Clear specific user cache.
     """
     key_pattern = namespace
     if cache_prefix:
         key_pattern += f'_{cache_prefix}'
-    key_pattern += f'.{user_id}.*'
-    keys = cache_manager.keys(key_pattern)
-    for key in keys:
-        if cache_manager.type == 'mem':
-            first_part = key.split(namespace)[0]
-            key = key[len(first_part):]
-        cache_manager.delete(key)
+    key_pattern += f'.{get_user_key_part(user_id)}.*'
+    writer.discard(pattern=key_pattern)
+    get_cache_manager().delete_pattern(key_pattern)
 
 
 __all__ = [
+    'BaseCacheManager',
+    'RedisCacheManager',
+    'LocMemCacheManager',
+    'DjangoCacheManager',
+    'get_cache_manager',
+    'set_cache_manager',
     'cache_manager',
+    'CacheManager',
+    'CacheRevalidator',
+    'revalidator',
+    'CacheWriter',
+    'writer',
+    'flush_cache_writes',
+    'get_hash_tag',
+    'get_user_key_part',
     'build_key',
     'save_user_allowed_actions_to_cache',
     'get_user_allowed_actions_from_cache',
+    'get_user_allowed_actions_by_namespaces_from_cache',
+    'save_user_allowed_actions_by_namespaces_to_cache',
+    'get_user_decisions_by_namespaces_from_cache',
+    'save_user_decisions_by_namespaces_to_cache',
+    'delete_user_decisions_from_cache',
     'get_all_user_roles_from_cache',
     'save_all_user_roles_from_cache',
+    'get_user_roles_by_items_from_cache',
+    'save_user_roles_by_items_to_cache',
+    'get_user_roles_by_params_from_cache',
+    'save_user_roles_by_params_to_cache',
+    'delete_user_roles_by_params_from_cache',
     'clear_cache',
+    'clear_user_roles_cache',
     'clear_user_cache',
 ]
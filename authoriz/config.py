@@ -16,9 +16,26 @@ Example:
             },
             {
                 "key": "project_id",
-                "getter": func(user_id, project_id)
+                "getter": func(user_id, project_id),
+                # Optional bulk getter used to resolve roles by many
+                # values at once: {project_id: roles}
+                "getter_many": func(user_id, project_ids),
+                # Optional cost hint, getters of the same key run from
+                # the cheapest one and stop once their roles intersection
+                # is empty.
+                "cost": 1
+            },
+            {
+                # Fetch roles from `user_relation_class` model, all the
+                # relation getters of the class are resolved with one query.
+                "key": "entity_id",
+                "getter": authoriz.utils.roles.RelationRolesGetter()
             }
-        ]
+        ],
+        # Relation model fields (defaults are shown).
+        "user_field": "user_id",
+        "role_field": "role",
+        "param_fields": {"entity_id": "entity_id"}
     }
 ]
 """
@@ -48,3 +65,112 @@ DISABLE_PARSING = getattr(settings, 'AUTHORIZ_DISABLE_PARSING', False)
 
 # Disables / enables permissions check in the views.
 DISABLE_PERMISSIONS_CHECK = getattr(settings, 'AUTHORIZ_DISABLE_PERMISSIONS_CHECK', True)
+
+# Rules evaluation engine: 'tree' evaluates parsed rules tree directly,
+# 'compiled' evaluates compact compiled representation of it.
+RULES_ENGINE = getattr(settings, 'AUTHORIZ_RULES_ENGINE', 'tree')
+
+"""
+Metrics collector used to instrument permissions checks. Import path,
+class or instance of `authoriz.metrics.MetricsCollector`. Metrics are
+disabled when it is not set.
+
+Example:
+'authoriz.metrics.InMemoryMetricsCollector'
+"""
+METRICS_COLLECTOR = getattr(settings, 'AUTHORIZ_METRICS_COLLECTOR', None)
+
+"""
+Tracer used to split permissions checks into spans. Import path,
+class or instance of `authoriz.tracing.Tracer`. Tracing is disabled
+when it is not set.
+
+Example:
+'authoriz.tracing.OpenTelemetryTracer'
+"""
+TRACER = getattr(settings, 'AUTHORIZ_TRACER', None)
+
+"""
+Cache keys strategy:
+    'plain' - keys contain all the roles and params, e.g.
+        `actions.<user_id>.uaa.admin,viewer.project_id=1`;
+    'hashed' - readable prefix is kept and roles and params are
+        replaced with fixed-length digest, e.g.
+        `actions.<user_id>.uaa.h1.<digest>`.
+"""
+CACHE_KEY_STRATEGY = getattr(settings, 'AUTHORIZ_CACHE_KEY_STRATEGY', 'plain')
+
+# Timeouts (seconds) of user roles and user allowed actions cache entries.
+# None keeps entries until they are invalidated.
+CACHE_ROLES_TTL = getattr(settings, 'AUTHORIZ_CACHE_ROLES_TTL', None)
+CACHE_ACTIONS_TTL = getattr(settings, 'AUTHORIZ_CACHE_ACTIONS_TTL', None)
+
+# Fraction of the TTL that is randomly subtracted from it, so entries
+# saved together don't expire together. E.g. 0.1 gives TTL in [0.9 * TTL, TTL].
+CACHE_TTL_JITTER = getattr(settings, 'AUTHORIZ_CACHE_TTL_JITTER', 0)
+
+# Seconds an expired (stale) entry is still served while it is recomputed
+# in the background thread. 0 disables stale-while-revalidate mode.
+CACHE_STALE_TTL = getattr(settings, 'AUTHORIZ_CACHE_STALE_TTL', 0)
+
+# Write cache entries in a background thread (write-behind) instead of
+# the request. Entries are buffered and written with `set_many` in batches,
+# when more than `CACHE_WRITE_BEHIND_MAX_PENDING` entries are buffered new
+# ones are dropped. Buffered entries are flushed on exit, waiting at most
+# `CACHE_WRITE_BEHIND_SHUTDOWN_TIMEOUT` seconds (None waits until written).
+CACHE_WRITE_BEHIND = getattr(settings, 'AUTHORIZ_CACHE_WRITE_BEHIND', False)
+CACHE_WRITE_BEHIND_MAX_PENDING = getattr(settings, 'AUTHORIZ_CACHE_WRITE_BEHIND_MAX_PENDING', 10000)
+CACHE_WRITE_BEHIND_BATCH_SIZE = getattr(settings, 'AUTHORIZ_CACHE_WRITE_BEHIND_BATCH_SIZE', 500)
+CACHE_WRITE_BEHIND_SHUTDOWN_TIMEOUT = getattr(settings, 'AUTHORIZ_CACHE_WRITE_BEHIND_SHUTDOWN_TIMEOUT', 5)
+
+# Django cache alias used for roles and allowed actions cache,
+# e.g. dedicated Redis database for authorization.
+CACHE_ALIAS = getattr(settings, 'AUTHORIZ_CACHE_ALIAS', 'default')
+
+"""
+Cache manager class (or import path) used to work with the cache
+backend. By default it is chosen by the backend of `CACHE_ALIAS`:
+'authoriz.cache.RedisCacheManager' for `django_redis` backends,
+'authoriz.cache.LocMemCacheManager' for local memory backend and
+'authoriz.cache.DjangoCacheManager' for others.
+"""
+CACHE_MANAGER = getattr(settings, 'AUTHORIZ_CACHE_MANAGER', None)
+
+# Wrap user id in the cache keys into Redis Cluster hash tag (`{user_id}`),
+# so all the keys of a user are in the same slot.
+CACHE_HASH_TAGS = getattr(settings, 'AUTHORIZ_CACHE_HASH_TAGS', False)
+
+# Cache decisions of `is_user_allowed` keyed by user, params and rules version
+# only, with user roles embedded in the value, so a warm check is one cache
+# request instead of roles and allowed actions requests one after another.
+# Decisions of a user are deleted when cached roles of the user are invalidated
+# (`CACHE_INVALIDATION_HOOKS` or `invalidate_user_roles`), otherwise they live
+# until the roles or actions TTL (the shortest of them) expires.
+CACHE_DECISIONS = getattr(settings, 'AUTHORIZ_CACHE_DECISIONS', False)
+
+# Invalidate cached user roles when `user_relation_class` models of
+# `ROLE_CLASSES` are saved or deleted. Relation fields are taken from
+# the role class config (`user_field` and `param_fields`).
+CACHE_INVALIDATION_HOOKS = getattr(settings, 'AUTHORIZ_CACHE_INVALIDATION_HOOKS', False)
+
+"""
+Materialized ACL (`authoriz.models.AllowedAction`) sources. Import
+paths or callables:
+    ACL_USERS() -> ids of the users to keep rows of;
+    ACL_OBJECTS(action, param_name) -> values of the first action param
+        to keep rows of, it is not called for actions without params.
+
+Example:
+AUTHORIZ_ACL_USERS = 'path.to.get_active_user_ids'
+AUTHORIZ_ACL_OBJECTS = 'path.to.get_objects_ids'
+"""
+ACL_USERS = getattr(settings, 'AUTHORIZ_ACL_USERS', None)
+ACL_OBJECTS = getattr(settings, 'AUTHORIZ_ACL_OBJECTS', None)
+
+# Rows written (created, updated or deleted) with one query.
+ACL_BATCH_SIZE = getattr(settings, 'AUTHORIZ_ACL_BATCH_SIZE', 500)
+
+# Keep materialized ACL up to date: sync rows of the changed actions when
+# rules are reloaded and recompute user rows when cached roles of the user
+# are invalidated (requires `CACHE_INVALIDATION_HOOKS`).
+ACL_AUTO_SYNC = getattr(settings, 'AUTHORIZ_ACL_AUTO_SYNC', False)
@@ -2,13 +2,23 @@
 Module specified dataclasses used by authorization module.
 """
 
-from dataclasses import dataclass, field
-from typing import List
+import sys
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import Mapping, Tuple
 
 from authoriz.namespaces.base import ActionEnumsService
 
 NEXT_RULE_ID = 1
 
+# Identical params mappings shared between all parsed actions. The table
+# is cleared on rules reload, so it doesn't keep mappings of the old rules.
+EMPTY_PARAMS = MappingProxyType({})
+_INTERNED_PARAMS = {}
+
+# Frozen dataclasses fields are set in __post_init__ with it.
+_set_attr = object.__setattr__
+
 
 def get_next_rule_id():
     global NEXT_RULE_ID
@@ -17,14 +27,64 @@ def get_next_rule_id():
     return id_
 
 
-@dataclass
+def intern_params(params: Mapping) -> Mapping:
+    """
+    Get read-only params mapping with interned keys and values.
+    Identical mappings are shared.
+    """
+    if not params:
+        return EMPTY_PARAMS
+    if len(params) == 1:
+        items = tuple(params.items())
+    else:
+        items = tuple(sorted(params.items()))
+    interned = _INTERNED_PARAMS.get(items)
+    if interned is None:
+        interned = _INTERNED_PARAMS[items] = MappingProxyType({
+            sys.intern(k): sys.intern(v) if v.__class__ is str else v
+            for k, v in items
+        })
+    return interned
+
+
+def clear_interned_params():
+    """
+    Drop shared params mappings, e.g. before rules are parsed again.
+    Mappings already used by parsed actions stay valid.
+    """
+    _INTERNED_PARAMS.clear()
+
+
+def slotted(cls):
+    """
+    Recreate dataclass with __slots__ to drop per-instance __dict__
+    (`dataclass(slots=True)` is only available since Python 3.10).
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict['__slots__'] = field_names
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+    return new_cls
+
+
+@slotted
+@dataclass(frozen=True)
 class ParsedAction:
     """
     Action data split into separate parts.
+
+    Params values are converted to strings (None is kept), as they are
+    compared with request params as strings. So `{'project_id': 1}` and
+    `{'project_id': '1'}` are the same params and share one mapping.
     """
     namespace: str
     action_name: str
-    params: dict = field(default_factory=lambda: {})
+    params: Mapping = field(default_factory=lambda: EMPTY_PARAMS)
 
     @property
     def full_name(self):
@@ -32,37 +92,46 @@ class ParsedAction:
 
     def __post_init__(self):
         assert isinstance(self.namespace, str)
-        self.namespace = self.namespace
         namespace = ActionEnumsService.get_namespace(self.namespace)
         assert namespace is not None
         assert isinstance(self.action_name, str)
-        assert self.action_name == '*' or self.action_name in ActionEnumsService.get_all_actions(with_namespace=False)
+        assert self.action_name == '*' or ActionEnumsService.has_action(self.full_name)
 
         # TODO: check how to deal with params of * actions.
-        if self.params is None:
-            self.params = {}
-        assert isinstance(self.params, dict)
-        if self.action_name != '*':
-            namespace_params = [k for k in namespace.params[self.full_name]]
+        params = self.params
+        if params:
+            assert isinstance(params, (dict, MappingProxyType))
+            namespace_params = ActionEnumsService.get_registry().get_action_params(self.full_name)
+            normalized_params = {}
+            for p, p_value in params.items():
+                assert p in namespace_params
+                if p_value is not None and p_value.__class__ is not str:
+                    p_value = str(p_value)
+                normalized_params[p] = p_value
+            params = intern_params(normalized_params)
         else:
-            namespace_params = []
-            for k in namespace.params:
-                namespace_params += [p for p in namespace.params[k]]
-        for p in self.params:
-            assert p in namespace_params
-            p_value = self.params[p]
-            if p_value and not isinstance(p_value, str):
-                self.params[p] = str(p_value)
+            params = EMPTY_PARAMS
+
+        _set_attr(self, 'namespace', sys.intern(self.namespace))
+        _set_attr(self, 'action_name', sys.intern(self.action_name))
+        _set_attr(self, 'params', params)
 
+    def __hash__(self):
+        return hash((self.namespace, self.action_name, frozenset(self.params.items())))
 
-@dataclass
+    def __reduce__(self):
+        return self.__class__, (self.namespace, self.action_name, dict(self.params))
+
+
+@slotted
+@dataclass(frozen=True)
 class PermissionsRule:
     """
     Permissions rule data split into separate parts.
     """
     name: str
     effect: str
-    actions: List[ParsedAction]
+    actions: Tuple[ParsedAction, ...]
 
     # <user-id> | role:<role-name>
     target: str
@@ -71,13 +140,22 @@ class PermissionsRule:
     def __post_init__(self):
         assert isinstance(self.name, str)
         assert isinstance(self.effect, str)
-        self.effect = self.effect.lower()
-        assert self.effect in ['allow', 'deny']
+        effect = self.effect.lower()
+        assert effect in ['allow', 'deny']
+        assert isinstance(self.actions, (list, tuple))
         assert isinstance(self.target, str)
-        self.target = self.target.lower()
+        _set_attr(self, 'effect', sys.intern(effect))
+        _set_attr(self, 'actions', tuple(self.actions))
+        _set_attr(self, 'target', sys.intern(self.target.lower()))
+
+    def __reduce__(self):
+        return self.__class__, (self.name, self.effect, self.actions, self.target, self.id)
 
 
 __all__ = [
+    'intern_params',
+    'clear_interned_params',
+    'slotted',
     'ParsedAction',
     'PermissionsRule',
 ]
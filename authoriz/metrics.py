@@ -0,0 +1,248 @@
+"""
+Metrics instrumentation for authorization module.
+
+Permissions checks report counters and latency histograms to a metrics
+collector. By default the collector drops everything, a real one can be
+configured with `AUTHORIZ_METRICS_COLLECTOR` setting.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from authoriz import config
+from authoriz.utils.resolving import resolve_object
+
+
+# Metrics names reported by the authorization module.
+CACHE_REQUESTS = 'authoriz_cache_requests_total'
+CACHE_LATENCY = 'authoriz_cache_operation_seconds'
+CACHE_WRITES_DROPPED = 'authoriz_cache_writes_dropped_total'
+ROLE_GETTER_LATENCY = 'authoriz_role_getter_seconds'
+ROLES_RESOLUTION_LATENCY = 'authoriz_roles_resolution_seconds'
+EVALUATION_LATENCY = 'authoriz_evaluation_seconds'
+CHECK_LATENCY = 'authoriz_check_seconds'
+DECISIONS = 'authoriz_decisions_total'
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+class MetricsCollector:
+    """
+    Base metrics collector. It drops all the reported
+    values and is used when metrics are disabled.
+    """
+    enabled = False
+
+    def increment(self, name, value=1, **labels):
+        """
+        Increment counter with specified labels.
+        """
+        pass
+
+    def observe(self, name, value, **labels):
+        """
+        Put value into histogram with specified labels.
+        """
+        pass
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Observe execution time of the block in seconds.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+
+class Histogram:
+    """
+    Cumulative histogram data of one metric with specific labels.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """
+        Get list of (upper bound, cumulative count) pairs.
+        """
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class InMemoryMetricsCollector(MetricsCollector):
+    """
+    Collector keeping all the metrics in the process memory.
+    Useful for tests and as a source for exporters.
+    """
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels_key(labels):
+        return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+    def increment(self, name, value=1, **labels):
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def get_counter(self, name, **labels):
+        """
+        Get counter value, 0 if it was never incremented.
+        """
+        return self.counters.get((name, self._labels_key(labels)), 0)
+
+    def get_histogram(self, name, **labels) -> Histogram:
+        """
+        Get histogram, None if nothing was observed.
+        """
+        return self.histograms.get((name, self._labels_key(labels)))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+class PrometheusTextExporter:
+    """
+    Render metrics of in-memory collector in Prometheus text format.
+    """
+    def __init__(self, collector: InMemoryMetricsCollector):
+        self.collector = collector
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ''
+        parts = []
+        for k, v in labels:
+            v = v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{k}="{v}"')
+        return '{' + ','.join(parts) + '}'
+
+    @staticmethod
+    def _format_bound(bound):
+        if bound == float('inf'):
+            return '+Inf'
+        return repr(float(bound))
+
+    def render(self) -> str:
+        lines = []
+        with self.collector._lock:
+            counters = sorted(self.collector.counters.items())
+            histograms = sorted(self.collector.histograms.items(), key=lambda item: item[0])
+
+        last_name = None
+        for (name, labels), value in counters:
+            if name != last_name:
+                lines.append(f'# TYPE {name} counter')
+                last_name = name
+            lines.append(f'{name}{self._format_labels(labels)} {value}')
+
+        last_name = None
+        for (name, labels), histogram in histograms:
+            if name != last_name:
+                lines.append(f'# TYPE {name} histogram')
+                last_name = name
+            for bound, count in histogram.cumulative_counts():
+                bucket_labels = self._format_labels((*labels, ('le', self._format_bound(bound))))
+                lines.append(f'{name}_bucket{bucket_labels} {count}')
+            lines.append(f'{name}_sum{self._format_labels(labels)} {histogram.sum}')
+            lines.append(f'{name}_count{self._format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+_collector = None
+
+
+def get_metrics_collector() -> MetricsCollector:
+    """
+    Get configured metrics collector.
+    """
+    global _collector
+    if _collector is None:
+        collector = config.METRICS_COLLECTOR
+        if collector is None:
+            collector = MetricsCollector()
+        else:
+            if isinstance(collector, str):
+                collector = resolve_object(collector)
+            if isinstance(collector, type):
+                collector = collector()
+        _collector = collector
+    return _collector
+
+
+def set_metrics_collector(collector: MetricsCollector = None):
+    """
+    Replace metrics collector. None resets it to the configured one.
+    """
+    global _collector
+    _collector = collector
+
+
+def get_callable_name(func) -> str:
+    """
+    Get readable name of the getter to use it as a label.
+    """
+    if isinstance(func, str):
+        return func
+    module = getattr(func, '__module__', None)
+    name = getattr(func, '__qualname__', None) or getattr(func, '__name__', None) or type(func).__name__
+    return f'{module}.{name}' if module else name
+
+
+__all__ = [
+    'CACHE_REQUESTS',
+    'CACHE_LATENCY',
+    'CACHE_WRITES_DROPPED',
+    'ROLE_GETTER_LATENCY',
+    'ROLES_RESOLUTION_LATENCY',
+    'EVALUATION_LATENCY',
+    'CHECK_LATENCY',
+    'DECISIONS',
+    'MetricsCollector',
+    'Histogram',
+    'InMemoryMetricsCollector',
+    'PrometheusTextExporter',
+    'get_metrics_collector',
+    'set_metrics_collector',
+    'get_callable_name',
+]
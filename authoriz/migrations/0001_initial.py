@@ -0,0 +1,46 @@
+# Generated by Django 3.2.12 on 2026-10-19 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ACLActionState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=255, unique=True)),
+                ('rules_digest', models.CharField(max_length=64)),
+            ],
+            options={
+                'db_table': 'authoriz_acl_action_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='AllowedAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.CharField(max_length=255)),
+                ('action', models.CharField(max_length=255)),
+                ('param_value', models.CharField(blank=True, default='', max_length=255)),
+                ('rule', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'authoriz_allowed_action',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='allowedaction',
+            index=models.Index(fields=['action', 'param_value'], name='authoriz_allowed_object_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='allowedaction',
+            constraint=models.UniqueConstraint(fields=('user_id', 'action', 'param_value'), name='authoriz_allowed_action_unique'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+"""
+Models of the materialized access control list.
+"""
+
+from django.db import models
+
+
+class AllowedAction(models.Model):
+    """
+    Effective allowed action of a user on an object. Rows are
+    maintained by `authoriz.acl.ACLMaintainer`, so they could be
+    joined in SQL reports. `param_value` is the value of the first
+    action param, empty for actions without params.
+    """
+    user_id = models.CharField(max_length=255)
+    action = models.CharField(max_length=255)
+    param_value = models.CharField(max_length=255, blank=True, default='')
+    # The latest rule allowing the action. Rule ids change on every parse,
+    # rows are not rewritten when identical rules are reloaded.
+    rule = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'authoriz_allowed_action'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'action', 'param_value'],
+                name='authoriz_allowed_action_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['action', 'param_value'], name='authoriz_allowed_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.action}/{self.param_value}'
+
+
+class ACLActionState(models.Model):
+    """
+    Digest of the rules of an action the rows of the
+    action were computed with.
+    """
+    action = models.CharField(max_length=255, unique=True)
+    rules_digest = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = 'authoriz_acl_action_state'
+
+    def __str__(self):
+        return f'{self.action}: {self.rules_digest}'
+
+
+__all__ = [
+    'AllowedAction',
+    'ACLActionState',
+]
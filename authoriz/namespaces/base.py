@@ -3,12 +3,64 @@ Module with base functionality to work with actions namespaces.
 """
 
 import enum
-from functools import lru_cache
-from typing import List, Optional
+import sys
+from types import MappingProxyType
+from typing import FrozenSet, List, Optional, Tuple
 
 from django.db import models
 
 
+class ActionsRegistry:
+    """
+    Frozen hashed indexes over registered namespaces. It is built
+    once and rebuilt only if some namespace is registered later.
+    """
+    def __init__(self, namespaces: dict):
+        self.namespaces = tuple(namespaces)
+        actions_by_namespace = {}
+        plain_actions_by_namespace = {}
+        action_params = {}
+        wildcard_expansions = {}
+        for name, ActionCls in namespaces.items():
+            actions = tuple(sys.intern(x) for x in ActionCls.Actions.values)
+            actions_by_namespace[name] = actions
+            plain_actions_by_namespace[name] = tuple(sys.intern(x.split(':')[1]) for x in actions)
+            wildcard = f'{name}:*'
+            wildcard_params = []
+            for action, params in ActionCls.params.items():
+                action_params[action] = tuple(params)
+                wildcard_params += params
+            action_params[wildcard] = tuple(wildcard_params)
+            wildcard_expansions[wildcard] = frozenset(actions)
+
+        self.actions_by_namespace = MappingProxyType(actions_by_namespace)
+        self.plain_actions_by_namespace = MappingProxyType(plain_actions_by_namespace)
+        self.action_params = MappingProxyType(action_params)
+        self.wildcard_expansions = MappingProxyType(wildcard_expansions)
+        self.actions = frozenset(
+            action for actions in actions_by_namespace.values() for action in actions
+        )
+        self.plain_actions = frozenset(
+            action for actions in plain_actions_by_namespace.values() for action in actions
+        )
+        param_actions = {}
+        for action, params in action_params.items():
+            for param in params:
+                param_actions.setdefault(param, set()).add(action)
+        self.param_actions = MappingProxyType({k: frozenset(v) for k, v in param_actions.items()})
+
+    def get_action_params(self, action: str) -> Tuple[str, ...]:
+        """
+        Get shared params tuple by action name.
+        """
+        params = self.action_params.get(action)
+        if params is not None:
+            return params
+        if action.split(':')[0] in self.namespaces:
+            return ()
+        raise RuntimeError(f'Namespace for action {action} is not found.')
+
+
 class ActionEnumsService:
     """
     Service to work with action workspaces enums.
@@ -16,30 +68,56 @@ class ActionEnumsService:
 
     _ENUMS = []
     _NAMESPACE_DICT = {}
+    _REGISTRY: Optional[ActionsRegistry] = None
 
     @classmethod
     def register(cls, EnumCls):
         """
         Register enum class in service.
         """
-        assert issubclass(ActionsNamespace, ActionsNamespace)
-        ActionEnumsService._ENUMS.append(cls)
+        assert issubclass(EnumCls, ActionsNamespace)
+        ActionEnumsService._ENUMS.append(EnumCls)
         ActionEnumsService._NAMESPACE_DICT[EnumCls.name] = EnumCls
+        ActionEnumsService.invalidate()
+
+    @classmethod
+    def freeze(cls):
+        """
+        Build actions registry. Called when the app is ready,
+        later registrations invalidate it.
+        """
+        ActionEnumsService._REGISTRY = ActionsRegistry(ActionEnumsService._NAMESPACE_DICT)
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drop actions registry so it is rebuilt on the next access.
+        """
+        ActionEnumsService._REGISTRY = None
+
+    @classmethod
+    def get_registry(cls) -> ActionsRegistry:
+        """
+        Get actions registry building it if needed.
+        """
+        registry = ActionEnumsService._REGISTRY
+        if registry is None:
+            registry = ActionEnumsService._REGISTRY = ActionsRegistry(ActionEnumsService._NAMESPACE_DICT)
+        return registry
 
     @classmethod
-    @lru_cache
     def actions_by_namespace(cls, name, with_namespace=True):
         """
         Get all actions by namespace name.
         """
-        ActionCls = ActionEnumsService._NAMESPACE_DICT.get(name, None)
-        if ActionCls:
-            if with_namespace:
-                return [x for x in ActionCls.Actions.values]
-            else:
-                return [x.split(':')[1] for x in ActionCls.Actions.values]
+        registry = cls.get_registry()
+        if with_namespace:
+            actions = registry.actions_by_namespace.get(name)
         else:
+            actions = registry.plain_actions_by_namespace.get(name)
+        if actions is None:
             raise RuntimeError(f'Namespace {name} not found.')
+        return list(actions)
 
     @classmethod
     def get_namespace(cls, name) -> Optional['ActionsNamespace']:
@@ -49,23 +127,43 @@ class ActionEnumsService:
         return cls._NAMESPACE_DICT.get(name, None)
 
     @classmethod
-    @lru_cache
     def get_namespaces(cls):
         """
         Get all namespaces enum classes.
         """
-        return [x for x in cls._NAMESPACE_DICT]
+        return list(cls.get_registry().namespaces)
 
     @classmethod
     def get_all_actions(cls, with_namespace=True):
         """
         Get all actions in registered namespace classes.
         """
+        registry = cls.get_registry()
+        actions_by_namespace = registry.actions_by_namespace if with_namespace \
+            else registry.plain_actions_by_namespace
         all_actions = []
-        for namespace in ActionEnumsService._NAMESPACE_DICT:
-            all_actions += ActionEnumsService.actions_by_namespace(namespace, with_namespace=with_namespace)
+        for namespace in registry.namespaces:
+            all_actions += actions_by_namespace[namespace]
         return all_actions
 
+    @classmethod
+    def has_action(cls, action: str) -> bool:
+        """
+        Check if action with namespace is registered.
+        """
+        return action in cls.get_registry().actions
+
+    @classmethod
+    def expand_action(cls, action: str) -> FrozenSet[str]:
+        """
+        Get actions matching the action. Wildcard action
+        is expanded into all namespace actions.
+        """
+        registry = cls.get_registry()
+        if action in registry.wildcard_expansions:
+            return registry.wildcard_expansions[action]
+        return frozenset((action,))
+
     @classmethod
     def validate_action(cls, name: str):
         """
@@ -75,7 +173,6 @@ class ActionEnumsService:
         name = name.strip()
         if name.endswith('*'):
             return name
-        all_actions = ActionEnumsService.get_all_actions()
         parts = name.split('/')
         if len(parts) == 1:
             action_name = parts[0]
@@ -83,26 +180,17 @@ class ActionEnumsService:
             action_name, params = parts
         else:
             raise RuntimeError('Failed to parse action.')
-        if action_name not in all_actions:
+        if action_name not in cls.get_registry().actions:
             raise RuntimeError(f'{action_name} is not allowed action name.')
         return action_name
 
     @classmethod
     def get_action_params(cls, action: str) -> List[str]:
         """
-        Get params list by action name.
-        """
-        namespace_name, action_name = action.split(':')
-        namespace = cls._NAMESPACE_DICT.get(namespace_name, None)
-        if namespace:
-            if action_name != '*':
-                return namespace.params.get(action, [])
-            else:
-                params = []
-                for k in namespace.params:
-                    params += namespace.params[k]
-                return params
-        raise RuntimeError(f'Namespace for action {action} is not found.')
+        Get params list by action name. The list is a copy, shared
+        tuples are returned by `get_registry().get_action_params`.
+        """
+        return list(cls.get_registry().get_action_params(action))
 
 
 class ActionsNamespaceMetaClass(type):
@@ -168,6 +256,7 @@ class ActionsNamespace(metaclass=ActionsNamespaceMetaClass):
 
 
 __all__ = [
+    'ActionsRegistry',
     'ActionEnumsService',
     'ActionsNamespaceMetaClass',
     'DefaultActionNamespaceMeta',
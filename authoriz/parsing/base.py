@@ -50,7 +50,7 @@ class PermissionsParser(ABC):
         """
         Clean rules that should be overridden by subsequent one.
         """
-        params = ActionEnumsService.get_action_params(action.full_name)
+        params = ActionEnumsService.get_registry().get_action_params(action.full_name)
 
         if action.action_name == '*':
             actions_to_override = ['*',
@@ -237,7 +237,7 @@ class PermissionsParser(ABC):
             action_dict,
             target
         )
-        params = ActionEnumsService.get_action_params(action.full_name)
+        params = ActionEnumsService.get_registry().get_action_params(action.full_name)
         effect_dict = get_or_create_value(
             target_dict,
             effect
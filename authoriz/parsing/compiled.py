@@ -0,0 +1,379 @@
+"""
+Compact compiled representation of the parsed rules tree.
+
+Parsed rules tree is a deep structure of nested dicts with string keys.
+Compiled rules keep only the data needed for evaluation:
+
+    action entry -> (namespace, full name, params, targets, roles)
+    targets / roles -> {target: (allow node, deny node)}
+    node -> rule id (leaf) | (wildcard child, {param value: child})
+
+All the keys are interned, empty subtrees are dropped and identical
+subtrees are shared between actions and targets.
+"""
+
+import hashlib
+import sys
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from authoriz.namespaces.base import ActionEnumsService
+from authoriz.tracing import Span, NOOP_SPAN
+
+EFFECTS = ('allow', 'deny')
+
+# Marker of the parsed rules tree leaf.
+RULE_KEY = 'rule'
+ROLES_KEY = ':roles'
+WILDCARD = '*'
+
+NAMESPACE_VERSION_DIGEST_SIZE = 8
+
+
+class CompiledAction:
+    """
+    Compiled rules of one action (or namespace wildcard action).
+    """
+    __slots__ = ('namespace', 'action', 'full_name', 'params', 'targets', 'roles')
+
+    def __init__(self, namespace, action, params, targets, roles):
+        self.namespace = namespace
+        self.action = action
+        self.full_name = sys.intern(f'{namespace}:{action}')
+        self.params = params
+        self.targets = targets
+        self.roles = roles
+
+    def fingerprint(self, ranks: Optional[Dict[int, int]] = None) -> str:
+        """
+        Get canonical representation of the action rules. Actions
+        with equal fingerprints give the same decisions.
+
+        Rule ids come from a global counter and change on every reparse,
+        only their order matters, so rules are represented by their
+        `ranks` (among the action rules by default).
+        """
+        rules = [
+            (target, effect, tuple(str(value) for value in values), rule)
+            for target, effect, node in self.iter_target_nodes()
+            for values, rule in iter_node_rules(node)
+        ]
+        if ranks is None:
+            ranks = get_rule_ranks(rule for *_, rule in rules)
+        return repr(sorted(
+            (target, effect, values, ranks[rule])
+            for target, effect, values, rule in rules
+        ))
+
+    def iter_rules(self):
+        """
+        Iterate over ids of the action rules.
+        """
+        for _, _, node in self.iter_target_nodes():
+            for _, rule in iter_node_rules(node):
+                yield rule
+
+    def iter_target_nodes(self):
+        """
+        Iterate over (target, effect, node) of the action. Role
+        targets are returned with `role:` prefix.
+        """
+        for prefix, targets in (('', self.targets), ('role:', self.roles)):
+            for target, nodes in targets.items():
+                for effect, node in zip(EFFECTS, nodes):
+                    if node is not None:
+                        yield f'{prefix}{target}', effect, node
+
+
+def iter_node_rules(node, values=()):
+    """
+    Iterate over (params values, rule id) of the node leaves.
+    Values are `*` for wildcard levels.
+    """
+    if not isinstance(node, tuple):
+        if node:
+            yield values, node
+        return
+    wildcard, children = node
+    if wildcard is not None:
+        yield from iter_node_rules(wildcard, (*values, WILDCARD))
+    for value, child in (children or {}).items():
+        yield from iter_node_rules(child, (*values, value))
+
+
+def get_rule_ranks(rules: Iterable[int]) -> Dict[int, int]:
+    """
+    Get {rule id: position of the rule among the rules}.
+    """
+    return {rule: rank for rank, rule in enumerate(sorted(set(rules)), 1)}
+
+
+def rules_fingerprint(actions: Iterable[CompiledAction]) -> str:
+    """
+    Get canonical representation of the rules of the actions. It doesn't
+    depend on rule ids, so identical rules parsed again give the same one.
+    """
+    actions = sorted(actions, key=lambda action: action.full_name)
+    ranks = get_rule_ranks(rule for action in actions for rule in action.iter_rules())
+    return repr([(action.full_name, action.fingerprint(ranks)) for action in actions])
+
+
+class RulesCompiler:
+    """
+    Compile parsed rules tree into `CompiledRules`.
+    """
+    def __init__(self):
+        # Structural key -> shared node
+        self._nodes = {}
+        # Params that have rules with concrete values by namespace
+        self._referenced_params = {}
+        self._namespace = None
+
+    def compile(self, parsed_rules: dict) -> 'CompiledRules':
+        actions = []
+        registry = ActionEnumsService.get_registry()
+        for namespace, namespace_dict in parsed_rules.items():
+            namespace = self._namespace = sys.intern(namespace)
+            for action, action_dict in namespace_dict.items():
+                action = sys.intern(action)
+                params = registry.get_action_params(f'{namespace}:{action}')
+                targets = self._compile_targets(
+                    {k: v for k, v in action_dict.items() if k != ROLES_KEY},
+                    params
+                )
+                roles = self._compile_targets(action_dict.get(ROLES_KEY, {}), params)
+                if targets or roles:
+                    actions.append(CompiledAction(namespace, action, params, targets, roles))
+        return CompiledRules(
+            actions,
+            shared_nodes=len(self._nodes),
+            referenced_params=self._referenced_params
+        )
+
+    def _compile_targets(self, targets_dict: dict, params: Tuple[str, ...]) -> Dict[str, tuple]:
+        targets = {}
+        for target, target_dict in targets_dict.items():
+            nodes = tuple(
+                self._compile_node(target_dict[effect], params) if effect in target_dict else None
+                for effect in EFFECTS
+            )
+            if nodes != (None, None):
+                targets[sys.intern(target)] = nodes
+        return targets
+
+    def _compile_node(self, node_dict: dict, params: Tuple[str, ...], level: int = 0):
+        """
+        Compile params trie node of `level` param.
+        Returns None if there are no rules in the subtree.
+        """
+        if level == len(params):
+            return node_dict.get(RULE_KEY)
+
+        wildcard = None
+        children = {}
+        for value, child_dict in node_dict.items():
+            child = self._compile_node(child_dict, params, level + 1)
+            if child is None:
+                continue
+            if value == WILDCARD:
+                wildcard = child
+            else:
+                children[sys.intern(value) if isinstance(value, str) else value] = child
+        if wildcard is None and not children:
+            return None
+        if children:
+            self._referenced_params.setdefault(self._namespace, set()).add(params[level])
+
+        key = (
+            self._node_key(wildcard),
+            tuple(sorted((repr(k), self._node_key(v)) for k, v in children.items()))
+        )
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = (wildcard, children or None)
+        return node
+
+    @staticmethod
+    def _node_key(node):
+        # Inner nodes are already shared, so identity is enough to compare them.
+        if node is None or isinstance(node, int):
+            return node
+        return id(node)
+
+
+def best_rule(node, values, depth=0) -> int:
+    """
+    Get the latest rule id in the node matching params values. 0 if nothing matches.
+    """
+    if depth == len(values):
+        return node
+    if depth + 1 == len(values):
+        # Last param level, children are leaves.
+        wildcard, children = node
+        best = wildcard or 0
+        value = values[depth]
+        if children is not None and value is not None:
+            rule = children.get(value)
+            if rule is not None and rule > best:
+                best = rule
+        return best
+    wildcard, children = node
+    best = 0
+    if wildcard is not None:
+        best = best_rule(wildcard, values, depth + 1)
+    if children is not None:
+        value = values[depth]
+        if value is not None:
+            child = children.get(value)
+            if child is not None:
+                rule = best_rule(child, values, depth + 1)
+                if rule > best:
+                    best = rule
+    return best
+
+
+def unconditional_rule(node) -> int:
+    """
+    Get the rule id of the node matching any params values. 0 if there is no such rule.
+    """
+    while isinstance(node, tuple):
+        node = node[0]
+    return node or 0
+
+
+def max_rule(node) -> int:
+    """
+    Get the latest rule id in the node. 0 if the node is empty.
+    """
+    if not isinstance(node, tuple):
+        return node or 0
+    wildcard, children = node
+    best = max_rule(wildcard)
+    for child in (children or {}).values():
+        rule = max_rule(child)
+        if rule > best:
+            best = rule
+    return best
+
+
+def roles_could_change(action: CompiledAction) -> bool:
+    """
+    Check if user roles could change evaluation result of the action,
+    i.e. some role rule is later than the rule matching everyone.
+    """
+    if not action.roles:
+        return False
+    floor = 0
+    if WILDCARD in action.targets:
+        floor = max(unconditional_rule(node) for node in action.targets[WILDCARD])
+    return any(max_rule(node) > floor for nodes in action.roles.values() for node in nodes)
+
+
+class CompiledRules:
+    """
+    Compiled rules that could be evaluated directly.
+    """
+    def __init__(self, actions, shared_nodes=0, referenced_params=None):
+        self.actions: Tuple[CompiledAction, ...] = tuple(actions)
+        self.shared_nodes = shared_nodes
+        # Only values of these params could change evaluation result.
+        self.referenced_params_by_namespace: Dict[str, FrozenSet[str]] = {
+            namespace: frozenset(params) for namespace, params in (referenced_params or {}).items()
+        }
+        self.referenced_params: FrozenSet[str] = frozenset().union(*self.referenced_params_by_namespace.values())
+        # Digest of the rules of each namespace, it changes only
+        # when the namespace rules change.
+        self.namespace_versions: Dict[str, str] = {}
+        actions_by_namespace = {}
+        for action in self.actions:
+            actions_by_namespace.setdefault(action.namespace, []).append(action)
+        for namespace, namespace_actions in actions_by_namespace.items():
+            self.namespace_versions[namespace] = hashlib.blake2b(
+                rules_fingerprint(namespace_actions).encode(),
+                digest_size=NAMESPACE_VERSION_DIGEST_SIZE
+            ).hexdigest()
+        # Only these roles could change evaluation result.
+        self.referenced_roles: FrozenSet[str] = frozenset(
+            role for action in self.actions for role in action.roles
+        )
+        self._actions_by_name = {action.full_name: action for action in self.actions}
+        # Actions (wildcards expanded) whose decision could depend on user roles.
+        self.role_dependent_actions: FrozenSet[str] = frozenset(
+            name
+            for action in self.actions if roles_could_change(action)
+            for name in (action.full_name, *ActionEnumsService.expand_action(action.full_name))
+        )
+
+    @classmethod
+    def compile(cls, parsed_rules: dict) -> 'CompiledRules':
+        return RulesCompiler().compile(parsed_rules)
+
+    def get_action(self, full_name) -> Optional[CompiledAction]:
+        return self._actions_by_name.get(full_name)
+
+    def roles_required(self, actions) -> bool:
+        """
+        Check if user roles are needed to decide on the actions.
+        """
+        return any(action in self.role_dependent_actions for action in actions)
+
+    def evaluate(self, user_id, user_roles, params, span: Span = NOOP_SPAN, namespaces=None) -> dict:
+        """
+        Find the latest matching rule of each action (of `namespaces`,
+        all by default) for user with specified roles and params. Result
+        is the same as evaluation of parsed rules tree.
+        """
+        user_target = str(user_id)
+        rules_visited = 0
+        allowed_actions = {}
+        for action in self.actions:
+            if namespaces is not None and action.namespace not in namespaces:
+                continue
+            nodes = []
+            targets = action.targets
+            if WILDCARD in targets:
+                nodes.append(targets[WILDCARD])
+            if user_target in targets:
+                nodes.append(targets[user_target])
+            roles = action.roles
+            if roles:
+                for role in user_roles:
+                    if role in roles:
+                        nodes.append(roles[role])
+            if not nodes:
+                continue
+
+            values = [params.get(param) for param in action.params]
+            best = 0
+            best_effect = None
+            for effect_nodes in nodes:
+                for effect, node in zip(EFFECTS, effect_nodes):
+                    if node is None:
+                        continue
+                    rule = best_rule(node, values)
+                    if rule:
+                        rules_visited += 1
+                        if rule > best:
+                            best = rule
+                            best_effect = effect
+            if best:
+                allowed_actions[action.full_name] = {
+                    'rule': best,
+                    'effect': best_effect
+                }
+        span.set_attribute('rules_visited', rules_visited)
+        span.set_attribute('actions_matched', len(allowed_actions))
+        return allowed_actions
+
+
+__all__ = [
+    'CompiledAction',
+    'RulesCompiler',
+    'CompiledRules',
+    'iter_node_rules',
+    'get_rule_ranks',
+    'rules_fingerprint',
+    'best_rule',
+    'unconditional_rule',
+    'max_rule',
+    'roles_could_change',
+]
@@ -0,0 +1,130 @@
+"""
+Vectorized evaluation of the compiled rules for bulk jobs.
+
+Decisions of many users on many actions and objects are evaluated at
+once. Targets, rules and params values are encoded as integer arrays:
+
+    leaves: (rule id, allow, target code, params values codes)
+    users: (users, targets) membership of everyone, user id and roles
+    objects: (objects, params) values codes
+
+Latest matching rule wins, so the decision of a rules entry is the
+effect of the leaf with the highest rule id among leaves applying to
+the user and matching the object. Requires `numpy` package.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from authoriz.namespaces.base import ActionEnumsService
+from authoriz.parsing.compiled import CompiledAction, CompiledRules, WILDCARD, iter_node_rules
+
+# Params values codes of wildcard, missing object value
+# and rule value none of the objects has.
+WILDCARD_CODE = -1
+MISSING_CODE = -2
+UNKNOWN_CODE = -3
+
+# Max size of (leaves, users, objects) block evaluated at once.
+BLOCK_SIZE = 1 << 22
+
+
+class PermissionMatrix:
+    """
+    Evaluate users x actions x objects decisions matrix. Decisions are
+    the same as `prj:Action in get_user_allowed_actions(...)` gives.
+    """
+    def __init__(self, compiled_rules: CompiledRules, block_size: int = BLOCK_SIZE):
+        self.compiled_rules = compiled_rules
+        self.block_size = block_size
+        # Concrete action -> rules entries applying to it
+        self._entries: Dict[str, List[CompiledAction]] = {}
+        for action in compiled_rules.actions:
+            for name in {action.full_name, *ActionEnumsService.expand_action(action.full_name)}:
+                self._entries.setdefault(name, []).append(action)
+
+    def evaluate(self, users: Sequence[Tuple[object, Iterable[str]]], actions: Sequence[str],
+                 objects: Sequence[dict]) -> np.ndarray:
+        """
+        Get boolean matrix of (users, actions, objects) shape. `users`
+        are (user id, user roles) pairs, `objects` are params dicts
+        with string values.
+        """
+        users = [(str(user_id), [f'role:{role}' for role in roles]) for user_id, roles in users]
+        targets = {WILDCARD: 0}
+        for user_target, role_targets in users:
+            for target in (user_target, *role_targets):
+                targets.setdefault(target, len(targets))
+        membership = np.zeros((len(users), len(targets)), dtype=bool)
+        membership[:, 0] = True
+        for i, (user_target, role_targets) in enumerate(users):
+            membership[i, [targets[target] for target in (user_target, *role_targets)]] = True
+
+        result = np.zeros((len(users), len(actions), len(objects)), dtype=bool)
+        for i, action in enumerate(actions):
+            for entry in self._entries.get(action, ()):
+                result[:, i, :] |= self._evaluate_entry(entry, targets, membership, objects)
+        return result
+
+    def _evaluate_entry(self, entry: CompiledAction, targets: Dict[str, int],
+                        membership: np.ndarray, objects: Sequence[dict]) -> np.ndarray:
+        """
+        Get (users, objects) matrix of the entry allow decisions.
+        """
+        vocabularies = []
+        objects_codes = np.full((len(objects), len(entry.params)), MISSING_CODE, dtype=np.int64)
+        for j, param in enumerate(entry.params):
+            vocabulary = {}
+            for k, params in enumerate(objects):
+                value = params.get(param)
+                if value is not None:
+                    objects_codes[k, j] = vocabulary.setdefault(value, len(vocabulary))
+            vocabularies.append(vocabulary)
+
+        rules, allow, target_codes, values_codes = [], [], [], []
+        for target, effect, node in entry.iter_target_nodes():
+            target_code = targets.get(target)
+            if target_code is None:
+                # None of the users has the target.
+                continue
+            for values, rule in iter_node_rules(node):
+                codes = [
+                    WILDCARD_CODE if value == WILDCARD else vocabulary.get(value, UNKNOWN_CODE)
+                    for vocabulary, value in zip(vocabularies, values)
+                ]
+                if UNKNOWN_CODE in codes:
+                    continue
+                rules.append(rule)
+                allow.append(effect == 'allow')
+                target_codes.append(target_code)
+                values_codes.append(codes)
+
+        decisions = np.zeros((membership.shape[0], len(objects)), dtype=bool)
+        if not rules:
+            return decisions
+        rules = np.array(rules, dtype=np.int64)
+        allow = np.array(allow, dtype=bool)
+        values_codes = np.array(values_codes, dtype=np.int64).reshape(len(rules), len(entry.params))
+        # (leaves, users) and (leaves, objects)
+        applies = membership[:, target_codes].T
+        matches = np.all(
+            (values_codes[:, None, :] == WILDCARD_CODE) | (values_codes[:, None, :] == objects_codes[None, :, :]),
+            axis=2
+        )
+
+        step = max(1, self.block_size // max(1, len(rules) * membership.shape[0]))
+        for start in range(0, len(objects), step):
+            block = applies[:, :, None] & matches[:, None, start:start + step]
+            best = np.where(block, rules[:, None, None], 0).argmax(axis=0)
+            decisions[:, start:start + step] = allow[best] & block.any(axis=0)
+        return decisions
+
+
+__all__ = [
+    'WILDCARD_CODE',
+    'MISSING_CODE',
+    'UNKNOWN_CODE',
+    'BLOCK_SIZE',
+    'PermissionMatrix',
+]
@@ -0,0 +1,80 @@
+"""
+Reverse index of the compiled rules.
+
+Rules are evaluated from the user side: for a user with roles, which
+actions are allowed. Reverse index answers the opposite question: for
+an action with params values, which targets (everyone, users, roles)
+have rules granting or denying it:
+
+    (action, param name, param value) -> rules having the value
+    (action, None, None) -> rules matching any params values
+"""
+
+from collections import namedtuple
+from typing import Dict, List, Tuple
+
+from authoriz.namespaces.base import ActionEnumsService
+from authoriz.parsing.compiled import CompiledAction, WILDCARD, iter_node_rules
+
+# Latest rule of the target matching the action params. `action` is
+# the rules entry it belongs to, it could be namespace wildcard action.
+TargetRule = namedtuple('TargetRule', ['action', 'target', 'effect', 'rule'])
+
+
+class ReverseIndex:
+    """
+    Index of the compiled rules by actions and params values.
+    """
+    def __init__(self, actions: Tuple[CompiledAction, ...]):
+        # Rules as (action, target, effect, rule id, params values)
+        self._rules = []
+        self._index: Dict[tuple, List[int]] = {}
+        # Concrete action -> rules entries applying to it
+        self._entries: Dict[str, List[CompiledAction]] = {}
+        for action in actions:
+            for name in {action.full_name, *ActionEnumsService.expand_action(action.full_name)}:
+                self._entries.setdefault(name, []).append(action)
+            for target, effect, node in action.iter_target_nodes():
+                for values, rule in iter_node_rules(node):
+                    values = tuple(str(value) for value in values)
+                    rule_index = len(self._rules)
+                    self._rules.append((action.full_name, target, effect, rule, values))
+                    keys = [
+                        (action.full_name, param, value)
+                        for param, value in zip(action.params, values) if value != WILDCARD
+                    ]
+                    for key in keys or [(action.full_name, None, None)]:
+                        self._index.setdefault(key, []).append(rule_index)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def lookup(self, action: str, params: dict) -> List[TargetRule]:
+        """
+        Get the latest rule of each target matching the action with
+        params values. Targets are `*`, user ids and `role:<role>`.
+        """
+        params = {str(k): str(v) for k, v in params.items()}
+        best = {}
+        for entry in self._entries.get(action, ()):
+            candidates = set(self._index.get((entry.full_name, None, None), ()))
+            for param in entry.params:
+                if param in params:
+                    candidates.update(self._index.get((entry.full_name, param, params[param]), ()))
+            for rule_index in candidates:
+                full_name, target, effect, rule, values = self._rules[rule_index]
+                if any(
+                    value != WILDCARD and params.get(param) != value
+                    for param, value in zip(entry.params, values)
+                ):
+                    continue
+                current = best.get((full_name, target))
+                if current is None or current.rule < rule:
+                    best[(full_name, target)] = TargetRule(full_name, target, effect, rule)
+        return sorted(best.values(), key=lambda target_rule: target_rule.rule)
+
+
+__all__ = [
+    'TargetRule',
+    'ReverseIndex',
+]
@@ -4,13 +4,24 @@ handling parsed rules.
 """
 
 import importlib
-from typing import List
+from functools import partial
+from typing import Dict, FrozenSet, List, Tuple
 
+from authoriz.dataclasses import clear_interned_params
 from authoriz.namespaces.base import ActionEnumsService
-from authoriz.cache import get_user_allowed_actions_from_cache, save_user_allowed_actions_to_cache
+from authoriz.cache import (
+    clear_user_roles_cache, get_user_allowed_actions_by_namespaces_from_cache,
+    save_user_allowed_actions_by_namespaces_to_cache,
+)
+from authoriz.metrics import get_metrics_collector, EVALUATION_LATENCY
+from authoriz.tracing import get_tracer, Span, NOOP_SPAN
 from authoriz.parsing.base import PermissionsParser
+from authoriz.parsing.compiled import CompiledRules
+from authoriz.parsing.reverse import ReverseIndex, TargetRule
+from authoriz.signals import rules_reloaded
 from authoriz.utils.config import get_service_settings
 from authoriz.utils.parsing import merge_raw_rules_lists
+from authoriz.utils.roles import get_roles_plan
 
 
 class RulesParsingService:
@@ -27,58 +38,232 @@ class RulesParsingService:
     # Parsing results
     _RAW_RULES = []
     _PARSED_RULES = {}
+    _COMPILED_RULES = CompiledRules(())
+    _REVERSE_INDEX = ReverseIndex(())
+
+    # Rules evaluation engine: 'tree' evaluates parsed rules tree,
+    # 'compiled' evaluates compact compiled rules.
+    _RULES_ENGINE = 'tree'
 
     @classmethod
-    def get_user_allowed_actions(cls, user_id, user_roles, params, use_cache=True, cache_prefix=None):
+    def get_user_allowed_actions(cls, user_id, user_roles, params, use_cache=True, cache_prefix=None,
+                                 namespaces=None):
         """
         Get allowed actions for specified user with specified user roles
         from rules parsing data.
+
+        Rules are evaluated and cached by namespace, only actions of
+        `namespaces` (all by default) are returned. Cache entries of a
+        namespace are keyed by its rules version, so change of the
+        namespace rules doesn't affect entries of other namespaces.
         """
-        actions = None
-        if use_cache:
-            actions = get_user_allowed_actions_from_cache(
+        params_by_namespace = cls.get_namespaces_params(params, namespaces)
+        actions_by_namespace = {}
+        if use_cache and params_by_namespace:
+            actions_by_namespace = get_user_allowed_actions_by_namespaces_from_cache(
+                user_id=user_id,
+                user_roles=user_roles,
+                params_by_namespace=params_by_namespace,
+                cache_prefix=cache_prefix,
+                revalidate=partial(cls._revalidate_user_allowed_actions, user_id, user_roles, params, cache_prefix)
+            )
+        missing_namespaces = [namespace for namespace in params_by_namespace if namespace not in actions_by_namespace]
+        if missing_namespaces:
+            with get_tracer().start_span(
+                    'authoriz.evaluate_rules',
+                    roles_count=len(user_roles),
+                    namespaces_count=len(missing_namespaces)
+            ) as span:
+                with get_metrics_collector().timer(EVALUATION_LATENCY):
+                    allowed_actions = cls._evaluate_rules(
+                        user_id,
+                        user_roles,
+                        cls.project_params(params),
+                        span=span,
+                        namespaces=missing_namespaces
+                    )
+            evaluated = {namespace: {} for namespace in missing_namespaces}
+            for action, data in allowed_actions.items():
+                evaluated[action.split(':', 1)[0]][action] = data
+            evaluated = {namespace: cls._expand_actions(data) for namespace, data in evaluated.items()}
+            save_user_allowed_actions_by_namespaces_to_cache(
                 user_id=user_id,
                 user_roles=user_roles,
-                params=params,
+                params_by_namespace=params_by_namespace,
+                actions_by_namespace=evaluated,
                 cache_prefix=cache_prefix
             )
-        if not use_cache or actions is None:
-            params = {str(k): str(v) for k, v in params.items()}
-            allowed_actions = {}
-            for namespace in cls._PARSED_RULES:
-                namespace_dict = cls._PARSED_RULES[namespace]
-                for action in sorted(namespace_dict, key=lambda item: 1 if item == '*' else -1):
-                    action_dict = namespace_dict[action]
-                for target in ['*', *[f'role:{ur}' for ur in user_roles], str(user_id)]:
-                    action_full_name = f'{namespace}:{action}'
-                    action_params = ActionEnumsService.get_action_params(action_full_name)
-                    if target.startswith('role:'):
-                        if ':roles' not in action_dict:
-                            continue
-                        action_dict = action_dict[':roles']
-                        target = target[5:]
-                    if target not in action_dict:
-                        continue
-                    target_dict = action_dict[target]
+            actions_by_namespace.update(evaluated)
+        return [action for namespace in params_by_namespace for action in actions_by_namespace[namespace]]
+
+    @classmethod
+    def _revalidate_user_allowed_actions(cls, user_id, user_roles, params, cache_prefix, namespace):
+        """
+        Recompute cached user allowed actions of the namespace.
+        """
+        cls.get_user_allowed_actions(
+            user_id, user_roles, params,
+            use_cache=False,
+            cache_prefix=cache_prefix,
+            namespaces=[namespace]
+        )
+
+    @classmethod
+    def get_user_allowed_rules(cls, user_id, user_roles, params) -> Dict[str, int]:
+        """
+        Get allowed actions (wildcards expanded) with the latest
+        rule allowing each of them. It is not cached.
+        """
+        params = cls.project_params(params)
+        allowed_rules = {}
+        for action, data in cls._evaluate_rules(user_id, user_roles, params).items():
+            if data['effect'] != 'allow':
+                continue
+            for name in ActionEnumsService.expand_action(action):
+                if allowed_rules.get(name, 0) < data['rule']:
+                    allowed_rules[name] = data['rule']
+        return allowed_rules
+
+    @classmethod
+    def get_namespaces_params(cls, params, namespaces=None) -> Dict[str, Tuple[str, dict]]:
+        """
+        Get {namespace: (rules version, projected params)} of the namespaces
+        (all by default) cache entries are keyed by. Namespaces without
+        rules allow nothing, they are omitted.
+        """
+        versions = cls._COMPILED_RULES.namespace_versions
+        if namespaces is None:
+            namespaces = versions
+        return {
+            namespace: (versions[namespace], cls.project_params(params, namespace))
+            for namespace in sorted(set(namespaces)) if namespace in versions
+        }
+
+    @classmethod
+    def project_params(cls, params, namespace=None) -> dict:
+        """
+        Get params that could change evaluation result (of the namespace
+        actions if it is specified), i.e. params having rules with concrete
+        values. Others are dropped so they don't produce distinct cache keys.
+        """
+        if namespace is None:
+            referenced_params = cls._COMPILED_RULES.referenced_params
+        else:
+            referenced_params = cls._COMPILED_RULES.referenced_params_by_namespace.get(namespace, frozenset())
+        return {str(k): str(v) for k, v in params.items() if str(k) in referenced_params}
+
+    @classmethod
+    def get_referenced_params(cls, namespaces=None) -> FrozenSet[str]:
+        """
+        Get params having rules with concrete values (of the
+        namespaces actions if they are specified).
+        """
+        if namespaces is None:
+            return cls._COMPILED_RULES.referenced_params
+        referenced_params = cls._COMPILED_RULES.referenced_params_by_namespace
+        return frozenset().union(*(referenced_params.get(namespace, ()) for namespace in namespaces))
+
+    @classmethod
+    def get_compiled_rules(cls) -> CompiledRules:
+        """
+        Get compiled representation of the current rules.
+        """
+        return cls._COMPILED_RULES
+
+    @classmethod
+    def has_rules(cls, action: str) -> bool:
+        """
+        Check if there are rules of the action (or `ns:*` wildcard) itself.
+        """
+        return cls._COMPILED_RULES.get_action(action) is not None
+
+    @classmethod
+    def get_referenced_roles(cls) -> FrozenSet[str]:
+        """
+        Get roles targeted by rules. Other roles don't change
+        evaluation result, so they need not be resolved.
+        """
+        return cls._COMPILED_RULES.referenced_roles
+
+    @classmethod
+    def roles_required(cls, actions) -> bool:
+        """
+        Check if user roles could change decision on the actions.
+        If they couldn't, roles resolution could be skipped.
+        """
+        return cls._COMPILED_RULES.roles_required(actions)
+
+    @classmethod
+    def get_action_targets(cls, action: str, params: dict) -> List[TargetRule]:
+        """
+        Get targets having rules for the action with params values, e.g.
+        to find who may perform it on an object. Each target comes with
+        its latest matching rule, ordered by rule id.
+        """
+        return cls._REVERSE_INDEX.lookup(action, params)
+
+    @classmethod
+    def get_allowed_matrix(cls, users, actions, objects):
+        """
+        Get boolean matrix of (users, actions, objects) decisions for
+        bulk jobs. `users` are (user id, user roles) pairs, `objects`
+        are params dicts. Requires `numpy` package.
+        """
+        from authoriz.parsing.matrix import PermissionMatrix
+        return PermissionMatrix(cls._COMPILED_RULES).evaluate(
+            users,
+            actions,
+            [cls.project_params(params) for params in objects]
+        )
+
+    @classmethod
+    def _evaluate_rules(cls, user_id, user_roles, params, span: Span = NOOP_SPAN, namespaces=None) -> dict:
+        """
+        Find the latest matching rule of each action (of `namespaces`,
+        all by default) for user with specified roles and params with
+        configured rules engine.
+        """
+        if cls._RULES_ENGINE == 'compiled':
+            return cls._COMPILED_RULES.evaluate(user_id, user_roles, params, span=span, namespaces=namespaces)
+        return cls._evaluate_rules_tree(user_id, user_roles, params, span=span, namespaces=namespaces)
+
+    @classmethod
+    def _evaluate_rules_tree(cls, user_id, user_roles, params, span: Span = NOOP_SPAN, namespaces=None) -> dict:
+        """
+        Evaluate parsed rules tree directly.
+        """
+        rules_visited = 0
+        allowed_actions = {}
+        registry = ActionEnumsService.get_registry()
+        for namespace, namespace_dict in cls._PARSED_RULES.items():
+            if namespaces is not None and namespace not in namespaces:
+                continue
+            for action, action_dict in namespace_dict.items():
+                action_full_name = f'{namespace}:{action}'
+                action_params = registry.get_action_params(action_full_name)
+                target_dicts = [action_dict[target] for target in ['*', str(user_id)] if target in action_dict]
+                if ':roles' in action_dict:
+                    roles_dict = action_dict[':roles']
+                    target_dicts += [roles_dict[role] for role in user_roles if role in roles_dict]
+                for target_dict in target_dicts:
                     for effect in target_dict:
                         effect_dict = target_dict[effect]
                         rule_dicts = []
                         param_dicts = [(0, effect_dict)]
                         while len(param_dicts):
                             i, param_dict = param_dicts.pop(0)
+                            if i == len(action_params):
+                                if 'rule' in param_dict:
+                                    rule_dicts.append(param_dict)
+                                continue
                             for param_value in ['*', params.get(action_params[i], None)]:
                                 if param_value is None or param_value not in param_dict:
                                     continue
+                                param_dicts.append(
+                                    (i + 1, param_dict[param_value])
+                                )
 
-                                if i + 1 != len(action_params):
-                                    param_dicts.append(
-                                        (i + 1, param_dict[param_value])
-                                    )
-                                else:
-                                    rule_dicts.append(
-                                        param_dict[param_value]
-                                    )
-
+                        rules_visited += len(rule_dicts)
                         for rule_dict in rule_dicts:
                             if action_full_name in allowed_actions:
                                 if allowed_actions[action_full_name]['rule'] > rule_dict['rule']:
@@ -93,15 +278,9 @@ class RulesParsingService:
                                     **rule_dict,
                                     'effect': effect
                                 }
-            actions = cls._expand_actions(allowed_actions)
-            save_user_allowed_actions_to_cache(
-                user_id=user_id,
-                user_roles=user_roles,
-                params=params,
-                data=actions,
-                cache_prefix=cache_prefix
-            )
-        return actions
+        span.set_attribute('rules_visited', rules_visited)
+        span.set_attribute('actions_matched', len(allowed_actions))
+        return allowed_actions
 
     @classmethod
     def initialize(cls, service_settings: dict = None):
@@ -144,7 +323,11 @@ class RulesParsingService:
         cls._init_statuses['parse_rules'] = False
         cls._RAW_RULES.clear()
         cls._PARSED_RULES.clear()
+        rules_engine = service_settings.get('RULES_ENGINE', 'tree')
+        if rules_engine not in ('tree', 'compiled'):
+            raise RuntimeError(f'Unexpected rules engine {rules_engine}.')
         assert cls._init_statuses['setup_parsers']
+        clear_interned_params()
         raw_rules_lists = []
         parsed_rules = {}
         for parser in cls._PARSERS:
@@ -152,8 +335,18 @@ class RulesParsingService:
             raw_rules_lists.append(raw_rules)
         raw_rules = merge_raw_rules_lists(raw_rules_lists)
         cls._RAW_RULES = raw_rules
-        cls._PARSED_RULES = parsed_rules
+        referenced_roles = cls._COMPILED_RULES.referenced_roles
+        cls._COMPILED_RULES = CompiledRules.compile(parsed_rules)
+        roles_plan = get_roles_plan()
+        if roles_plan.select(referenced_roles) != roles_plan.select(cls._COMPILED_RULES.referenced_roles):
+            # Cached roles are resolved by role classes referenced by rules only.
+            clear_user_roles_cache()
+        cls._REVERSE_INDEX = ReverseIndex(cls._COMPILED_RULES.actions)
+        cls._RULES_ENGINE = rules_engine
+        # Compiled engine doesn't need parsed rules tree, so it is released.
+        cls._PARSED_RULES = parsed_rules if rules_engine == 'tree' else {}
         cls._init_statuses['parse_rules'] = True
+        rules_reloaded.send(sender=cls)
 
     @classmethod
     def _expand_actions(cls, actions: dict):
@@ -163,11 +356,7 @@ class RulesParsingService:
         actions = {k: v for k, v in actions.items() if v['effect'] == 'allow'}
         final_actions = set()
         for action in actions:
-            if action.endswith('*'):
-                namespace, action_name = action.split(':')
-                final_actions.update(ActionEnumsService.actions_by_namespace(namespace))
-            else:
-                final_actions.add(action)
+            final_actions.update(ActionEnumsService.expand_action(action))
         return list(final_actions)
 
 
@@ -1,11 +1,39 @@
 """
 Base functionality for DRF permissions classes to work with permissions parsing service.
 """
+from functools import partial
+from typing import FrozenSet, Optional, Tuple
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from rest_framework.permissions import BasePermission
 
+from authoriz.namespaces.base import ActionEnumsService
 from authoriz.service import PermissionsService
-from authoriz.utils.permissions import SkipPermission, DenyPermission
+from authoriz.tracing import get_tracer
+from authoriz.utils.permissions import LazyParams, PermissionShortCircuit
+from authoriz.utils.roles import get_role_params
+
+_permissions_check_disabled = None
+
+
+def is_permissions_check_disabled() -> bool:
+    """
+    Check if permissions check is disabled in `ACTION_RULES_SERVICE` settings.
+    """
+    global _permissions_check_disabled
+    if _permissions_check_disabled is None:
+        service_settings = getattr(settings, 'ACTION_RULES_SERVICE', {})
+        _permissions_check_disabled = bool(service_settings.get("DISABLE_PERMISSIONS_CHECK", False))
+    return _permissions_check_disabled
+
+
+@receiver(setting_changed)
+def _reset_permissions_check_disabled(setting, **kwargs):
+    global _permissions_check_disabled
+    if setting == 'ACTION_RULES_SERVICE':
+        _permissions_check_disabled = None
 
 
 class BaseServicePermission(BasePermission):
@@ -15,8 +43,28 @@ class BaseServicePermission(BasePermission):
     on permissions parsing service.
 
     Inherited classes should only specify
-    parameters getters.
+    parameters getters. All the methods that start
+    with `get_` prefix are considered getters.
     """
+    # Params getters of the class: ((getter attribute, param name), ...)
+    params_getters: Tuple[Tuple[str, str], ...] = ()
+
+    # Getters plan: ((getter attribute, param name, actions using param), ...).
+    # Actions are None for getters of the params unknown to actions and role getters.
+    _getters_plan: Optional[Tuple[Tuple[str, str, Optional[FrozenSet[str]]], ...]] = None
+    _getters_plan_key = None
+    _getters_by_actions = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.params_getters = tuple(
+            (attr, attr[4:]) for attr in dir(cls)
+            if attr.startswith('get_') and callable(getattr(cls, attr))
+        )
+        cls._getters_plan = None
+        cls._getters_plan_key = None
+        cls._getters_by_actions = {}
+
     def __init__(
             self,
             actions_permissions=None,
@@ -27,32 +75,83 @@ class BaseServicePermission(BasePermission):
         self.methods_permissions = methods_permissions or {}
         self.action = action
 
+    @classmethod
+    def _get_getters_plan(cls):
+        """
+        Map each getter to the actions using its param. Getters of the params
+        role getters are keyed on are mapped to all the actions and getters of
+        the params unknown to actions and role getters (they could only skip
+        or deny permission check) are mapped to None.
+        """
+        registry = ActionEnumsService.get_registry()
+        role_params = get_role_params()
+        if cls._getters_plan is None or cls._getters_plan_key != (registry, role_params):
+            plan = []
+            for attr, param in cls.params_getters:
+                actions = registry.param_actions.get(param)
+                if param in role_params:
+                    actions = frozenset(registry.actions)
+                plan.append((attr, param, actions))
+            cls._getters_plan = tuple(plan)
+            cls._getters_plan_key = (registry, role_params)
+            cls._getters_by_actions = {}
+        return cls._getters_plan
+
+    @classmethod
+    def required_params_getters(cls, actions) -> Tuple[Tuple[str, str], ...]:
+        """
+        Get getters that could be called to check the actions. Params
+        of `ns:*` rules apply to all the namespace actions, so they are
+        required too.
+        """
+        plan = cls._get_getters_plan()
+        actions = frozenset(actions)
+        getters = cls._getters_by_actions.get(actions)
+        if getters is None:
+            actions_with_wildcards = actions | {f'{action.split(":")[0]}:*' for action in actions}
+            getters = cls._getters_by_actions[actions] = tuple(
+                (attr, param) for attr, param, param_actions in plan
+                if param_actions is None or not param_actions.isdisjoint(actions_with_wildcards)
+            )
+        return getters
+
+    def _call_param_getter(self, param_attr, request, view):
+        with get_tracer().start_span('authoriz.param_getter', getter=param_attr):
+            return getattr(self, param_attr)(request, view)
+
     def has_permission(self, request, view):
         """
         DRF permissions check implementation to check permissions by permissions service.
+
+        Getters required by the actions are called before the check, so
+        any of them could skip or deny it, even if the service doesn't read
+        its param (e.g. no rule has concrete values of it). Other getters
+        are called lazily, only if the service asks for their params.
         """
-        service_settings = getattr(settings, 'ACTION_RULES_SERVICE', {})
-        if service_settings.get("DISABLE_PERMISSIONS_CHECK", False):
+        if is_permissions_check_disabled():
             return True
-        params = {}
-        params_attrs = [x for x in dir(self) if x.startswith('get_')]
-        for param_attr in params_attrs:
-            value = getattr(self, param_attr)(request, view)
-            if SkipPermission.check(value):
-                return True
-            if DenyPermission.check(value):
-                return False
-            params[param_attr[4:]] = value
-
-        user = request.user
-        required_actions = PermissionsService._get_composed_view_actions(
-            view,
-            self.actions_permissions.get(self.action, []),
-            self.methods_permissions.get(request.method, [])
-        )
-        return PermissionsService.is_user_allowed(user.id, required_actions, params)
+        with get_tracer().start_span('authoriz.has_permission', permission=type(self).__name__) as span:
+            user = request.user
+            required_actions = PermissionsService._get_composed_view_actions(
+                view,
+                self.actions_permissions.get(self.action, []),
+                self.methods_permissions.get(request.method, [])
+            )
+
+            params = LazyParams({
+                param: partial(self._call_param_getter, param_attr, request, view)
+                for param_attr, param in self.params_getters
+            })
+            try:
+                for _, param in self.required_params_getters(required_actions):
+                    params[param]
+                return PermissionsService.is_user_allowed(user.id, required_actions, params)
+            except PermissionShortCircuit as e:
+                span.set_attribute('short_circuit', 'skip' if e.allowed else 'deny')
+                return e.allowed
 
 
 __all__ = [
+    'is_permissions_check_disabled',
     'BaseServicePermission',
 ]
@@ -5,9 +5,17 @@ Module with permissions service functionality.
 from functools import wraps
 from typing import List, Optional
 from uuid import UUID
-from .cache import get_all_user_roles_from_cache, save_all_user_roles_from_cache
+from . import config
+from .cache import (
+    get_user_decisions_by_namespaces_from_cache, get_user_roles_by_items_from_cache,
+    save_user_decisions_by_namespaces_to_cache, save_user_roles_by_items_to_cache,
+    save_user_roles_by_params_to_cache,
+)
+from .namespaces.base import ActionEnumsService
+from .metrics import get_metrics_collector, CHECK_LATENCY, DECISIONS, ROLES_RESOLUTION_LATENCY
 from .parsing.service import RulesParsingService
-from .utils.roles import get_user_roles_by_param
+from .tracing import get_tracer
+from .utils.roles import get_role_params, get_user_roles_by_params_values
 
 
 class ActionsManager:
@@ -31,10 +39,157 @@ class PermissionsService:
     def is_user_allowed(cls, user_id, actions, params):
         """
         Check if user with has access to actions with specified params.
+
+        Only the params used by the actions and role getters are
+        taken from `params`, so it could be `LazyParams` mapping.
+        Roles are not resolved if they couldn't change the decision.
+        With `CACHE_DECISIONS` a warm check is one cache request.
+        """
+        metrics = get_metrics_collector()
+        with get_tracer().start_span('authoriz.is_user_allowed', actions_count=len(actions)) as span:
+            with metrics.timer(CHECK_LATENCY):
+                namespaces = cls._get_actions_namespaces(actions)
+                roles_required = RulesParsingService.roles_required(actions)
+                role_params = {}
+                if roles_required:
+                    role_params = cls._get_params(params, sorted(get_role_params()))
+                decisions_params = {}
+                decisions = {}
+                if config.CACHE_DECISIONS:
+                    # Decisions hold all the actions of the namespaces, so they are
+                    # evaluated with all the params the namespaces rules reference.
+                    actions_params = cls._get_params(
+                        params,
+                        sorted(RulesParsingService.get_referenced_params(namespaces))
+                    )
+                    decisions_params = RulesParsingService.get_namespaces_params(actions_params, namespaces)
+                else:
+                    actions_params = cls._get_params(params, cls._get_actions_params(actions))
+                if decisions_params:
+                    decisions = get_user_decisions_by_namespaces_from_cache(user_id, role_params, decisions_params)
+                    if roles_required:
+                        # Decisions evaluated without roles are valid for role independent actions only.
+                        decisions = {
+                            namespace: decision for namespace, decision in decisions.items()
+                            if decision['roles'] is not None
+                        }
+                    span.set_attribute('decisions_cache', 'hit' if len(decisions) == len(decisions_params) else 'miss')
+                if decisions_params and len(decisions) == len(decisions_params):
+                    allowed_actions = [action for decision in decisions.values() for action in decision['actions']]
+                else:
+                    user_roles = []
+                    if roles_required:
+                        user_roles = cls._get_all_user_roles(user_id, **role_params)
+                    span.set_attribute('roles_skipped', not roles_required)
+                    allowed_actions = RulesParsingService.get_user_allowed_actions(
+                        user_id,
+                        user_roles,
+                        actions_params,
+                        namespaces=namespaces
+                    )
+                    if decisions_params:
+                        cls._save_decisions(
+                            user_id,
+                            role_params,
+                            user_roles if roles_required else None,
+                            allowed_actions,
+                            {
+                                namespace: namespace_params for namespace, namespace_params in decisions_params.items()
+                                if namespace not in decisions
+                            }
+                        )
+                allowed = len(set(actions) - set(allowed_actions)) == 0
+            span.set_attribute('allowed', allowed)
+        metrics.increment(DECISIONS, outcome='allowed' if allowed else 'denied')
+        return allowed
+
+    @staticmethod
+    def _get_actions_params(actions) -> List[str]:
+        """
+        Get params used by the actions, including params of their
+        namespaces wildcards (`ns:*`) if there are wildcard rules,
+        as they match on them.
+        """
+        action_params = ActionEnumsService.get_registry().action_params
+        params = []
+        for action in actions:
+            action_params_names = action_params.get(action, ())
+            wildcard = f'{action.split(":", 1)[0]}:*'
+            if RulesParsingService.has_rules(wildcard):
+                action_params_names = (*action_params_names, *action_params.get(wildcard, ()))
+            for param in action_params_names:
+                if param not in params:
+                    params.append(param)
+        return params
+
+    @staticmethod
+    def _get_actions_namespaces(actions) -> List[str]:
         """
-        user_roles = cls._get_all_user_roles(user_id, **params)
-        allowed_actions = RulesParsingService.get_user_allowed_actions(user_id, user_roles, params)
-        return len(set(actions) - set(allowed_actions)) == 0
+        Get namespaces of the actions.
+        """
+        return sorted({action.split(':', 1)[0] for action in actions})
+
+    @staticmethod
+    def _save_decisions(user_id, role_params, user_roles, allowed_actions, decisions_params):
+        """
+        Save allowed actions of the namespaces with user roles they were
+        evaluated with (None if roles were not resolved).
+        """
+        decisions = {namespace: {'roles': user_roles, 'actions': []} for namespace in decisions_params}
+        for action in allowed_actions:
+            decision = decisions.get(action.split(':', 1)[0])
+            if decision is not None:
+                decision['actions'].append(action)
+        save_user_decisions_by_namespaces_to_cache(user_id, role_params, decisions_params, decisions)
+
+    @staticmethod
+    def _get_params(params, names) -> dict:
+        """
+        Get values of the params with specified names.
+        """
+        return {name: params[name] for name in names if name in params}
+
+    @classmethod
+    def is_user_allowed_many(cls, user_id, actions, params_list) -> List[bool]:
+        """
+        Check if user has access to actions with each of specified params,
+        e.g. for each object of list endpoint. Roles by all the params values
+        are resolved together, so bulk role getters (`getter_many`) are
+        called once per param.
+        """
+        metrics = get_metrics_collector()
+        params_list = list(params_list)
+        with get_tracer().start_span(
+                'authoriz.is_user_allowed_many',
+                actions_count=len(actions),
+                checks_count=len(params_list)
+        ) as span:
+            with metrics.timer(CHECK_LATENCY):
+                actions_params = cls._get_actions_params(actions)
+                roles_list = [[]] * len(params_list)
+                roles_required = RulesParsingService.roles_required(actions)
+                if roles_required:
+                    role_params = sorted(get_role_params())
+                    roles_list = cls.get_all_user_roles_many(
+                        user_id,
+                        [cls._get_params(params, role_params) for params in params_list]
+                    )
+                span.set_attribute('roles_skipped', not roles_required)
+                required_actions = set(actions)
+                namespaces = cls._get_actions_namespaces(actions)
+                result = []
+                for params, user_roles in zip(params_list, roles_list):
+                    allowed_actions = RulesParsingService.get_user_allowed_actions(
+                        user_id,
+                        user_roles,
+                        cls._get_params(params, actions_params),
+                        namespaces=namespaces
+                    )
+                    result.append(required_actions.issubset(allowed_actions))
+            span.set_attribute('allowed_count', sum(result))
+        for allowed in result:
+            metrics.increment(DECISIONS, outcome='allowed' if allowed else 'denied')
+        return result
 
     @classmethod
     def required_actions(cls, actions: Optional[List[str]] = None):
@@ -76,27 +231,78 @@ class PermissionsService:
     @classmethod
     def _get_all_user_roles(cls, user_id, use_cache=True, **kwargs):
         """
-        Get user roles with specified params.
+        Get user roles with specified params. Params no role
+        getter is keyed on are ignored.
         """
-        roles = None
-        if use_cache:
-            roles = get_all_user_roles_from_cache(
-                user_id=user_id,
-                params=kwargs
-            )
-        if not use_cache or roles is None:
-            all_user_roles = []
-            for kwargs_name, kwargs_value in kwargs.items():
-                all_user_roles += get_user_roles_by_param(user_id, kwargs_name, kwargs_value)
+        return cls.get_all_user_roles_many(user_id, [kwargs], use_cache=use_cache)[0]
 
-            roles = list(set(all_user_roles))
+    @classmethod
+    def get_all_user_roles_many(cls, user_id, kwargs_list, use_cache=True) -> List[list]:
+        """
+        Get user roles with each of specified params.
 
-            save_all_user_roles_from_cache(
-                user_id=user_id,
-                params=kwargs,
-                data=roles
-            )
-        return roles
+        Roles are cached by each (user, param name, param value), so
+        requests with different params combinations share them. Missing
+        ones are resolved together, bulk role getters are called once
+        per param.
+        """
+        role_params = get_role_params()
+        kwargs_list = [{k: v for k, v in kwargs.items() if k in role_params} for kwargs in kwargs_list]
+        items = list(dict.fromkeys(item for kwargs in kwargs_list for item in kwargs.items()))
+        with get_tracer().start_span('authoriz.resolve_roles', params_count=len(items)) as span:
+            roles_by_items = {}
+            if use_cache and items:
+                roles_by_items = get_user_roles_by_items_from_cache(
+                    user_id=user_id,
+                    items=items,
+                    revalidate=cls._revalidate_user_roles_by_param
+                )
+            missing_items = [item for item in items if item not in roles_by_items]
+            if not missing_items:
+                span.set_attribute('cache', 'hit')
+            else:
+                span.set_attribute('cache', 'partial' if roles_by_items else 'miss')
+                values_by_param = {}
+                for param_name, param_value in missing_items:
+                    values_by_param.setdefault(param_name, []).append(param_value)
+                with get_metrics_collector().timer(ROLES_RESOLUTION_LATENCY):
+                    resolved = get_user_roles_by_params_values(
+                        user_id,
+                        values_by_param,
+                        referenced_roles=RulesParsingService.get_referenced_roles()
+                    )
+                resolved_roles = {
+                    (param_name, param_value): sorted(resolved[param_name][param_value])
+                    for param_name, param_value in missing_items
+                }
+                save_user_roles_by_items_to_cache(
+                    user_id=user_id,
+                    roles_by_items=resolved_roles
+                )
+                roles_by_items.update(resolved_roles)
+
+            roles_list = [
+                sorted(set().union(*(roles_by_items[item] for item in kwargs.items())))
+                for kwargs in kwargs_list
+            ]
+            span.set_attribute('roles_count', len(set().union(*roles_list)))
+        return roles_list
+
+    @staticmethod
+    def _revalidate_user_roles_by_param(user_id, param_name, param_value):
+        """
+        Recompute cached user roles by param.
+        """
+        roles = get_user_roles_by_params_values(
+            user_id,
+            {param_name: [param_value]},
+            referenced_roles=RulesParsingService.get_referenced_roles()
+        )
+        save_user_roles_by_params_to_cache(
+            user_id=user_id,
+            params={param_name: param_value},
+            roles_by_params={param_name: sorted(roles[param_name][param_value])}
+        )
 
     @staticmethod
     def _get_composed_view_actions(view, *actions_list):
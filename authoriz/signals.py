@@ -0,0 +1,182 @@
+"""
+Cache invalidation driven by changes of the role relation models
+and authorization signals.
+
+Relation models (`user_relation_class` of `ROLE_CLASSES`) link users
+with roles by params. When a relation is saved or deleted, cached roles
+of its user by its params are invalidated. Invalidations made inside a
+transaction are batched and applied on commit.
+
+Allowed actions entries are keyed by user roles, so they are never
+stale and are not invalidated. Decisions entries (`CACHE_DECISIONS`)
+embed user roles, all of them are deleted when roles of the user are
+invalidated.
+
+Note that `bulk_create`, `QuerySet.update` and `QuerySet.delete` don't
+send model signals, call `invalidate_user_roles` for them.
+
+Signals:
+    rules_reloaded - rules were parsed again, sent by `RulesParsingService`;
+    user_roles_changed - cached roles of a user were invalidated, sent
+        with `user_id` and `items` - (param name, param value) pairs.
+"""
+
+import threading
+import weakref
+from typing import Dict, List, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal
+
+from authoriz import config
+from authoriz.cache import delete_user_decisions_from_cache, delete_user_roles_by_params_from_cache
+from authoriz.utils.resolving import resolve_object
+from authoriz.utils.roles import get_relation_fields
+
+# Relation instance attribute keeping values it was loaded with.
+ORIGINAL_VALUES_ATTR = '_authoriz_relation_values'
+
+_local = threading.local()
+
+rules_reloaded = Signal()
+user_roles_changed = Signal()
+
+
+class InvalidationBatch:
+    """
+    User roles entries to invalidate on transaction commit.
+    """
+    def __init__(self, using):
+        self.using = using
+        self.items = set()
+
+    def __call__(self):
+        batches = _get_batches()
+        if batches.get(self.using) is self:
+            del batches[self.using]
+        _apply_invalidation(self.items)
+
+
+def _apply_invalidation(items):
+    delete_user_roles_by_params_from_cache(items)
+    items_by_user = {}
+    for user_id, param_name, param_value in items:
+        items_by_user.setdefault(user_id, []).append((param_name, param_value))
+    for user_id, user_items in items_by_user.items():
+        if config.CACHE_DECISIONS:
+            delete_user_decisions_from_cache(user_id)
+        user_roles_changed.send(sender=None, user_id=user_id, items=user_items)
+
+
+def _get_batches() -> Dict[str, InvalidationBatch]:
+    # Batches are referenced only by the scheduled `on_commit` callbacks.
+    # Callbacks are dropped when transaction is rolled back, so are the batches.
+    batches = getattr(_local, 'batches', None)
+    if batches is None:
+        batches = _local.batches = weakref.WeakValueDictionary()
+    return batches
+
+
+def invalidate_user_roles(user_id, params: dict, using=None):
+    """
+    Invalidate cached user roles by params. Inside a transaction
+    invalidation is postponed until commit.
+    """
+    items = {(user_id, param_name, param_value) for param_name, param_value in params.items()}
+    if not items:
+        return
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        _apply_invalidation(items)
+        return
+    batches = _get_batches()
+    batch = batches.get(using)
+    if batch is None:
+        batch = batches[using] = InvalidationBatch(using)
+        transaction.on_commit(batch, using=using)
+    batch.items.update(items)
+
+
+def get_relations() -> List[Tuple[type, str, Dict[str, str]]]:
+    """
+    Get (relation model, user field, {param name: field}) of the role classes.
+    """
+    relations = []
+    for role_class in config.ROLE_CLASSES:
+        relation_class = role_class.get('user_relation_class')
+        if relation_class is None:
+            continue
+        if isinstance(relation_class, str):
+            relation_class = resolve_object(relation_class)
+        user_field, _, param_fields = get_relation_fields(role_class)
+        relations.append((relation_class, user_field, param_fields))
+    return relations
+
+
+def _get_values(instance, user_field, param_fields):
+    # Deferred fields are not loaded, they are just missing.
+    values = instance.__dict__
+    return values.get(user_field), {
+        param_name: values.get(field) for param_name, field in param_fields.items()
+    }
+
+
+def _make_handlers(user_field, param_fields):
+    def on_init(sender, instance, **kwargs):
+        setattr(instance, ORIGINAL_VALUES_ATTR, _get_values(instance, user_field, param_fields))
+
+    def on_save(sender, instance, using=None, **kwargs):
+        user_id, params = _get_values(instance, user_field, param_fields)
+        original = getattr(instance, ORIGINAL_VALUES_ATTR, None)
+        if original is not None and original != (user_id, params) and original[0] is not None:
+            invalidate_user_roles(original[0], _without_none(original[1]), using=using)
+        if user_id is not None:
+            invalidate_user_roles(user_id, _without_none(params), using=using)
+        setattr(instance, ORIGINAL_VALUES_ATTR, (user_id, params))
+
+    def on_delete(sender, instance, using=None, **kwargs):
+        user_id, params = _get_values(instance, user_field, param_fields)
+        if user_id is not None:
+            invalidate_user_roles(user_id, _without_none(params), using=using)
+
+    return on_init, on_save, on_delete
+
+
+def _without_none(params):
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def connect_invalidation_hooks():
+    """
+    Connect invalidation handlers to the relation models signals.
+    """
+    for relation_class, user_field, param_fields in get_relations():
+        on_init, on_save, on_delete = _make_handlers(user_field, param_fields)
+        uid = f'authoriz.signals.{relation_class.__module__}.{relation_class.__qualname__}'
+        post_init.connect(on_init, sender=relation_class, weak=False, dispatch_uid=f'{uid}.init')
+        post_save.connect(on_save, sender=relation_class, weak=False, dispatch_uid=f'{uid}.save')
+        post_delete.connect(on_delete, sender=relation_class, weak=False, dispatch_uid=f'{uid}.delete')
+
+
+def disconnect_invalidation_hooks():
+    """
+    Disconnect invalidation handlers from the relation models signals.
+    """
+    for relation_class, _, _ in get_relations():
+        uid = f'authoriz.signals.{relation_class.__module__}.{relation_class.__qualname__}'
+        post_init.disconnect(sender=relation_class, dispatch_uid=f'{uid}.init')
+        post_save.disconnect(sender=relation_class, dispatch_uid=f'{uid}.save')
+        post_delete.disconnect(sender=relation_class, dispatch_uid=f'{uid}.delete')
+
+
+__all__ = [
+    'rules_reloaded',
+    'user_roles_changed',
+    'InvalidationBatch',
+    'invalidate_user_roles',
+    'get_relations',
+    'connect_invalidation_hooks',
+    'disconnect_invalidation_hooks',
+]
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from authoriz.acl import ACLMaintainer, connect_acl_hooks, disconnect_acl_hooks
+from authoriz.cache import clear_cache
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.models import AllowedAction
+from authoriz.signals import invalidate_user_roles
+from authoriz.tests.parsing.utils import setup_test_parser
+
+
+class TestACLMaintainer(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.memberships = {('user-1', 1)}
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', [
+            {
+                'getters': [
+                    {'key': 'project_id', 'getter': self.get_project_roles},
+                ]
+            },
+        ])
+        self.role_classes.start()
+        self.rules = self._build_rules()
+        setup_test_parser(self.rules)
+        self.maintainer = ACLMaintainer(
+            get_users=lambda: ['user-1', 'user-2', 'user-3'],
+            get_objects=lambda action, param_name: [1, 2],
+            batch_size=2
+        )
+
+    def tearDown(self):
+        self.role_classes.stop()
+        setup_test_parser([])
+        clear_cache()
+
+    @staticmethod
+    def _build_rules():
+        return [
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject')
+                ],
+                target='role:admin'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='UpdateProject')
+                ],
+                target='user-2'
+            ),
+        ]
+
+    def get_project_roles(self, user_id, project_id):
+        return ['admin'] if (user_id, int(project_id)) in self.memberships else []
+
+    @staticmethod
+    def _rows():
+        return set(AllowedAction.objects.values_list('user_id', 'action', 'param_value', 'rule'))
+
+    def test_sync_rules(self):
+        self.assertEqual(len(self.maintainer.sync_rules()), 5)
+        self.assertEqual(self._rows(), {
+            ('user-1', 'prj:RetrieveProject', '1', self.rules[0].id),
+            ('user-2', 'prj:UpdateProject', '', self.rules[1].id),
+        })
+        self.assertEqual(self.maintainer.sync_rules(), [])
+
+        rule = PermissionsRule(
+            name='Rule 3',
+            effect='allow',
+            actions=[
+                ParsedAction(namespace='prj', action_name='ListProjects')
+            ],
+            target='*'
+        )
+        setup_test_parser([self.rules[0], rule])
+        # Only rows of the actions with changed rules are recomputed.
+        with mock.patch.object(self.maintainer, 'refresh', wraps=self.maintainer.refresh) as refresh:
+            self.assertEqual(sorted(self.maintainer.sync_rules()), ['prj:ListProjects', 'prj:UpdateProject'])
+        refresh.assert_called_once_with(actions=mock.ANY)
+        self.assertEqual(self._rows(), {
+            ('user-1', 'prj:RetrieveProject', '1', self.rules[0].id),
+            ('user-1', 'prj:ListProjects', '', rule.id),
+            ('user-2', 'prj:ListProjects', '', rule.id),
+            ('user-3', 'prj:ListProjects', '', rule.id),
+        })
+
+    def test_sync_same_rules(self):
+        self.maintainer.sync_rules()
+        rows = self._rows()
+
+        # Identical rules parsed again get new ids, no rows are rewritten.
+        setup_test_parser(self._build_rules())
+        with mock.patch.object(self.maintainer, 'refresh', wraps=self.maintainer.refresh) as refresh:
+            self.assertEqual(self.maintainer.sync_rules(), [])
+        refresh.assert_not_called()
+        self.assertEqual(self._rows(), rows)
+
+    def test_refresh_user_on_roles_change(self):
+        self.maintainer.sync_rules()
+        connect_acl_hooks()
+        try:
+            with mock.patch('authoriz.acl._maintainer', self.maintainer):
+                self.memberships = {('user-1', 2), ('user-2', 1)}
+                with self.captureOnCommitCallbacks(execute=True):
+                    invalidate_user_roles('user-1', {'project_id': 1})
+                    invalidate_user_roles('user-1', {'project_id': 2})
+        finally:
+            disconnect_acl_hooks()
+
+        # Rows of the other users are kept until their roles are invalidated.
+        self.assertEqual(self._rows(), {
+            ('user-1', 'prj:RetrieveProject', '2', self.rules[0].id),
+            ('user-2', 'prj:UpdateProject', '', self.rules[1].id),
+        })
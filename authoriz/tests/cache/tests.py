@@ -0,0 +1,580 @@
+import binascii
+import os
+import subprocess
+import sys
+import threading
+import time
+from fnmatch import fnmatchcase
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from rest_framework.test import APITestCase, override_settings
+
+import authoriz
+from authoriz import cache
+from authoriz.cache import (
+    BaseCacheManager, CacheManager, DjangoCacheManager, LocMemCacheManager, RedisCacheManager,
+    CacheWriter, build_key, clear_cache, clear_user_cache, flush_cache_writes, get_cache_manager, set_cache_manager,
+    revalidator, cache_manager,
+    get_hash_tag, get_user_key_part,
+    get_user_roles_by_params_from_cache, save_user_roles_by_params_to_cache,
+    get_user_roles_by_items_from_cache, save_user_roles_by_items_to_cache,
+    get_all_user_roles_from_cache, save_all_user_roles_from_cache,
+)
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.metrics import (
+    InMemoryMetricsCollector, set_metrics_collector, CACHE_LATENCY, CACHE_REQUESTS, CACHE_WRITES_DROPPED,
+)
+from authoriz.parsing.service import RulesParsingService
+from authoriz.tests.parsing.utils import setup_test_parser
+
+
+def save_roles(user_id, project_id, roles):
+    save_user_roles_by_params_to_cache(user_id, {'project_id': project_id}, {'project_id': roles})
+
+
+def get_roles(user_id, project_id, revalidate=None):
+    roles = get_user_roles_by_params_from_cache(user_id, {'project_id': project_id}, revalidate=revalidate)
+    return roles.get('project_id')
+
+
+class TestCacheKeys(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='RetrieveProject',
+                        params={
+                            'project_id': 1
+                        }
+                    )
+                ],
+                target='*'
+            )
+        ])
+
+    def tearDown(self):
+        set_metrics_collector(None)
+        setup_test_parser([])
+        clear_cache()
+
+    def test_unreferenced_params_share_key(self):
+        for cursor in ['a', 'b']:
+            self.assertEqual(
+                RulesParsingService.get_user_allowed_actions('user-1', [], {'project_id': 1, 'cursor': cursor}),
+                ['prj:RetrieveProject']
+            )
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='uaa', result='miss'), 1)
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='uaa', result='hit'), 1)
+
+        self.assertEqual(RulesParsingService.get_user_allowed_actions('user-1', [], {'project_id': 2}), [])
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='uaa', result='miss'), 2)
+
+
+class TestNamespaceCacheEntries(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+        self.entity_rule = PermissionsRule(
+            name='Rule 1',
+            effect='allow',
+            actions=[
+                ParsedAction(namespace='entity', action_name='EntityUpdate', params={'entity_id': 1})
+            ],
+            target='*'
+        )
+
+    def tearDown(self):
+        set_metrics_collector(None)
+        setup_test_parser([])
+        clear_cache()
+
+    def _prj_rule(self, action_name):
+        return PermissionsRule(
+            name='Rule 2',
+            effect='allow',
+            actions=[
+                ParsedAction(namespace='prj', action_name=action_name)
+            ],
+            target='*'
+        )
+
+    def _counter(self, result):
+        return self.collector.get_counter(CACHE_REQUESTS, kind='uaa', result=result)
+
+    def test_namespace_entries(self):
+        setup_test_parser([self.entity_rule, self._prj_rule('ListProjects')])
+        params = {'entity_id': 1, 'project_id': 1}
+
+        self.assertEqual(
+            RulesParsingService.get_user_allowed_actions('user-1', [], params, namespaces=['entity']),
+            ['entity:EntityUpdate']
+        )
+        self.assertEqual(self._counter('miss'), 1)
+        self.assertEqual(
+            sorted(RulesParsingService.get_user_allowed_actions('user-1', [], params)),
+            ['entity:EntityUpdate', 'prj:ListProjects']
+        )
+        self.assertEqual((self._counter('hit'), self._counter('miss')), (1, 2))
+
+        # Change of prj rules doesn't invalidate entity entries.
+        setup_test_parser([self.entity_rule, self._prj_rule('UpdateProject')])
+        self.assertEqual(
+            sorted(RulesParsingService.get_user_allowed_actions('user-1', [], params)),
+            ['entity:EntityUpdate', 'prj:UpdateProject']
+        )
+        self.assertEqual((self._counter('hit'), self._counter('miss')), (2, 3))
+
+    def test_namespace_without_rules(self):
+        setup_test_parser([self.entity_rule])
+
+        self.assertEqual(RulesParsingService.get_user_allowed_actions('user-1', [], {}, namespaces=['prj']), [])
+        self.assertEqual(self._counter('miss'), 0)
+
+
+class TestHashedCacheKeys(APITestCase):
+    def test_hashed_key(self):
+        roles = [f'project_{i}_admin' for i in range(500)]
+        key = build_key(values=['user-1', 'uaa'], arrays=[roles], dicts=[{'project_id': 1}], strategy='hashed')
+
+        prefix, version, digest = key.rsplit('.', 2)
+        self.assertEqual(prefix, 'actions.user-1.uaa')
+        self.assertEqual(version, 'h1')
+        self.assertEqual(len(digest), 32)
+        self.assertEqual(
+            key,
+            build_key(values=['user-1', 'uaa'], arrays=[roles[::-1]], dicts=[{'project_id': 1}], strategy='hashed')
+        )
+        self.assertNotEqual(
+            key,
+            build_key(values=['user-1', 'uaa'], arrays=[roles], dicts=[{'project_id': 2}], strategy='hashed')
+        )
+        self.assertEqual(
+            build_key(values=['user-1', 'aur'], strategy='hashed'),
+            build_key(values=['user-1', 'aur'], strategy='plain')
+        )
+
+    def test_clear_user_cache(self):
+        with mock.patch('authoriz.config.CACHE_KEY_STRATEGY', 'hashed'):
+            save_roles('user-1', 1, ['admin'])
+            save_roles('user-2', 1, ['admin'])
+            self.assertEqual(get_roles('user-1', 1), ['admin'])
+
+            clear_user_cache('user-1')
+
+            self.assertIsNone(get_roles('user-1', 1))
+            self.assertEqual(get_roles('user-2', 1), ['admin'])
+        clear_cache()
+
+
+class TestCacheTTL(APITestCase):
+    def tearDown(self):
+        clear_cache()
+
+    def test_ttl_jitter(self):
+        with mock.patch.multiple('authoriz.config', CACHE_ROLES_TTL=100, CACHE_ACTIONS_TTL=10, CACHE_TTL_JITTER=0.2):
+            roles_ttls = {cache._get_ttl('aur') for _ in range(50)}
+            actions_ttls = {cache._get_ttl('uaa') for _ in range(50)}
+        self.assertGreater(len(roles_ttls), 1)
+        self.assertTrue(all(80 <= ttl <= 100 for ttl in roles_ttls))
+        self.assertTrue(all(8 <= ttl <= 10 for ttl in actions_ttls))
+        self.assertIsNone(cache._get_ttl('aur'))
+
+    def test_jittered_timeouts(self):
+        manager = get_cache_manager()
+        roles_by_items = {('project_id', project_id): ['admin'] for project_id in range(3)}
+        for write_behind in [False, True]:
+            with self.subTest(write_behind=write_behind), \
+                    mock.patch.multiple('authoriz.config', CACHE_ROLES_TTL=100, CACHE_TTL_JITTER=0.2,
+                                        CACHE_WRITE_BEHIND=write_behind), \
+                    mock.patch('authoriz.cache.random.uniform', side_effect=[0, 0.1, 0.1]), \
+                    mock.patch.object(manager, 'set_many', wraps=manager.set_many) as set_many:
+                save_user_roles_by_items_to_cache('user-1', roles_by_items)
+                flush_cache_writes()
+                self.assertEqual(
+                    sorted((call.kwargs['timeout'], len(call.args[0])) for call in set_many.call_args_list),
+                    [(90, 2), (100, 1)]
+                )
+            self.assertEqual(get_user_roles_by_items_from_cache('user-1', roles_by_items), roles_by_items)
+
+    def test_deprecated_all_user_roles(self):
+        with self.assertWarns(DeprecationWarning):
+            save_all_user_roles_from_cache('user-1', {'project_id': 1}, ['admin'])
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(get_all_user_roles_from_cache('user-1', {'project_id': 1}), ['admin'])
+
+    def test_stale_while_revalidate(self):
+        revalidated = []
+
+        def revalidate(*args):
+            revalidated.append(True)
+            save_roles('user-1', 1, ['viewer'])
+
+        with mock.patch.multiple('authoriz.config', CACHE_ROLES_TTL=10, CACHE_STALE_TTL=60):
+            save_roles('user-1', 1, ['admin'])
+            self.assertEqual(get_roles('user-1', 1, revalidate=revalidate), ['admin'])
+            self.assertEqual(revalidated, [])
+
+            with mock.patch('authoriz.cache.time.time', return_value=time.time() + 20):
+                # Stale entry is served, without revalidation it is a miss.
+                self.assertIsNone(get_roles('user-1', 1))
+                self.assertEqual(get_roles('user-1', 1, revalidate=revalidate), ['admin'])
+                revalidator.join()
+            self.assertEqual(revalidated, [True])
+            self.assertEqual(get_roles('user-1', 1, revalidate=revalidate), ['viewer'])
+
+
+class TestCacheWriter(APITestCase):
+    def setUp(self):
+        self.writer = CacheWriter(max_pending=3)
+        self.patches = [
+            mock.patch('authoriz.cache.writer', self.writer),
+            mock.patch('authoriz.config.CACHE_WRITE_BEHIND', True),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        set_metrics_collector(None)
+        clear_cache()
+
+    def test_batched_writes(self):
+        # Writer thread can't take entries while the condition is held.
+        with self.writer._condition:
+            save_roles('user-1', 1, ['admin'])
+            save_roles('user-1', 2, ['viewer'])
+            save_roles('user-1', 1, ['owner'])
+            self.assertIsNone(get_roles('user-1', 1))
+
+        self.assertTrue(flush_cache_writes())
+        self.assertEqual(get_roles('user-1', 1), ['owner'])
+        self.assertEqual(get_roles('user-1', 2), ['viewer'])
+        self.assertEqual(self.collector.get_histogram(CACHE_LATENCY, kind='aur', operation='set_many').count, 1)
+
+    def test_drop_on_backpressure(self):
+        with self.writer._condition:
+            for project_id in range(5):
+                save_roles('user-1', project_id, ['admin'])
+        flush_cache_writes()
+
+        self.assertEqual(
+            [get_roles('user-1', project_id) for project_id in range(5)],
+            [['admin'], ['admin'], ['admin'], None, None]
+        )
+        self.assertEqual(self.collector.get_counter(CACHE_WRITES_DROPPED, kind='aur'), 2)
+
+    def test_invalidated_before_write(self):
+        with self.writer._condition:
+            save_roles('user-1', 1, ['admin'])
+            save_roles('user-2', 1, ['admin'])
+            clear_user_cache('user-1')
+        flush_cache_writes()
+
+        self.assertIsNone(get_roles('user-1', 1))
+        self.assertEqual(get_roles('user-2', 1), ['admin'])
+
+    def test_invalidated_while_written(self):
+        started, release = threading.Event(), threading.Event()
+        write = self.writer._write
+
+        def blocked_write(batch):
+            started.set()
+            release.wait(5)
+            write(batch)
+
+        with mock.patch.object(self.writer, '_write', blocked_write):
+            save_roles('user-1', 1, ['admin'])
+            save_roles('user-2', 1, ['admin'])
+            self.assertTrue(started.wait(5))
+            # Batch is taken, invalidation deletes nothing yet.
+            clear_user_cache('user-1')
+            release.set()
+            flush_cache_writes()
+
+        self.assertIsNone(get_roles('user-1', 1))
+        self.assertEqual(get_roles('user-2', 1), ['admin'])
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'authoriz-default'},
+    'authoriz': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'authoriz-dedicated'},
+    'redis': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'},
+    'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/authoriz-tests'},
+})
+class TestCacheManagers(APITestCase):
+    def tearDown(self):
+        set_cache_manager(None)
+
+    def test_cache_alias(self):
+        for alias, manager_class in [
+            ('authoriz', LocMemCacheManager),
+            ('redis', RedisCacheManager),
+            ('file', DjangoCacheManager),
+        ]:
+            set_cache_manager(None)
+            with mock.patch('authoriz.config.CACHE_ALIAS', alias):
+                manager = get_cache_manager()
+            self.assertIsInstance(manager, manager_class)
+            self.assertIs(manager.client, caches[alias])
+
+        set_cache_manager(None)
+        with mock.patch('authoriz.config.CACHE_ALIAS', 'authoriz'):
+            save_roles('user-1', 1, ['admin'])
+            self.assertEqual(get_roles('user-1', 1), ['admin'])
+        set_cache_manager(None)
+        self.assertIsNone(get_roles('user-1', 1))
+
+    def _test_manager(self, manager):
+        manager.set('actions.user-1.aur', 1)
+        manager.set('actions.user-1.uaa.admin', 2)
+        manager.set('actions.user-2.aur', 3)
+        manager.set('actions_test.user-1.aur', 4)
+
+        self.assertEqual(
+            sorted(manager.keys('actions.user-1.*')),
+            ['actions.user-1.aur', 'actions.user-1.uaa.admin']
+        )
+        self.assertEqual(len(manager.keys('actions.*')), 3)
+        self.assertEqual(manager.delete_pattern('actions.user-1.*'), 2)
+        self.assertIsNone(manager.get('actions.user-1.aur'))
+        self.assertEqual(manager.get('actions.user-2.aur'), 3)
+        self.assertEqual(manager.delete_pattern('actions.*'), 1)
+        self.assertEqual(manager.keys('actions.*'), [])
+        self.assertEqual(manager.get('actions_test.user-1.aur'), 4)
+        manager.client.clear()
+
+    def test_locmem_manager(self):
+        self._test_manager(LocMemCacheManager(caches['authoriz'], 'authoriz'))
+
+    def test_django_manager(self):
+        self._test_manager(DjangoCacheManager(caches['authoriz'], 'authoriz'))
+        self._test_manager(DjangoCacheManager(caches['file'], 'file'))
+
+    def test_abstract_manager(self):
+        with self.assertRaises(TypeError):
+            BaseCacheManager(caches['authoriz'])
+
+    def test_deprecated_cache_manager(self):
+        set_cache_manager(None)
+        with mock.patch('authoriz.config.CACHE_ALIAS', 'authoriz'):
+            self.assertIsInstance(get_cache_manager(), CacheManager)
+            with self.assertWarns(DeprecationWarning):
+                cache_manager.set('actions.user-1.aur', 1)
+            with self.assertWarns(DeprecationWarning):
+                self.assertEqual(cache_manager.client, caches['authoriz'])
+            self.assertEqual(get_cache_manager().get('actions.user-1.aur'), 1)
+            get_cache_manager().client.clear()
+
+    def test_locmem_index_pruned(self):
+        manager = LocMemCacheManager(caches['authoriz'], 'authoriz')
+        manager.INDEX_PRUNE_STEP = 4
+        self.addCleanup(manager.client.clear)
+        for i in range(3):
+            manager.set(f'actions.user-1.aur.{i}', i)
+        # Entries expired or culled by the backend.
+        manager.client.delete_many([f'actions.user-1.aur.{i}' for i in range(3)])
+        manager.set('actions.user-1.aur.3', 3)
+
+        self.assertEqual(manager._keys, {'actions.user-1.aur.3'})
+
+    def test_django_index_pruned(self):
+        manager = DjangoCacheManager(caches['authoriz'], 'authoriz')
+        manager.INDEX_PRUNE_STEP = 4
+        self.addCleanup(manager.client.clear)
+        for i in range(3):
+            manager.set(f'actions.user-{i}.aur', i)
+        manager.client.delete_many([f'actions.user-{i}.aur' for i in range(3)])
+        manager.client.delete_many([f'actions.user-{i}.:index' for i in range(2)])
+        manager.set('actions.user-2.aur.1', 3)
+        manager.set('actions.user-3.aur', 4)
+
+        self.assertEqual(manager.client.get('actions.user-2.:index'), {'actions.user-2.aur', 'actions.user-2.aur.1'})
+        self.assertEqual(manager.client.get('actions.:groups'), {'actions.user-2', 'actions.user-3'})
+
+        manager.client.delete('actions.user-2.aur')
+        manager.set_many({'actions.user-2.aur.2': 5, 'actions.user-2.aur.3': 6})
+        self.assertEqual(
+            manager.client.get('actions.user-2.:index'),
+            {'actions.user-2.aur.1', 'actions.user-2.aur.2', 'actions.user-2.aur.3'}
+        )
+
+    def test_redis_manager(self):
+        redis_client = FakeRedisNode()
+        manager = RedisCacheManager(FakeDjangoRedisCache(redis_client), 'redis')
+        for i in range(5):
+            redis_client.set(f':1:actions.user-1.aur.{i}')
+        redis_client.set(':1:actions.user-2.aur')
+
+        self.assertEqual(len(manager.keys('actions.user-1.*')), 5)
+        self.assertEqual(manager.delete_pattern('actions.user-1.*'), 5)
+        self.assertEqual(manager.keys('actions.*'), ['actions.user-2.aur'])
+        self.assertEqual(redis_client.commands.count('unlink'), 1)
+
+
+class FakeRedisNode:
+    """
+    Redis node stand-in supporting SCAN and UNLINK.
+    """
+    def __init__(self, cluster=None):
+        self.cluster = cluster
+        self.data = set()
+        self.commands = []
+
+    def set(self, key):
+        self.data.add(key.encode())
+
+    def scan_iter(self, match=None, count=None):
+        self.commands.append('scan')
+        for key in sorted(self.data):
+            if fnmatchcase(key.decode(), match):
+                yield key
+
+    def unlink(self, *keys):
+        self.commands.append('unlink')
+        deleted = self.data & set(keys)
+        self.data -= deleted
+        return len(deleted)
+
+
+class FakeRedisCluster:
+    """
+    Redis Cluster stand-in with 3 primaries splitting slots evenly.
+    """
+    def __init__(self):
+        self.nodes = [FakeRedisNode(self) for _ in range(3)]
+        self.unlinked_batches = []
+
+    slots = 16384
+
+    @classmethod
+    def keyslot(cls, key):
+        if isinstance(key, bytes):
+            key = key.decode()
+        tag = get_hash_tag(key)
+        return binascii.crc_hqx((key if tag is None else tag).encode(), 0) % cls.slots
+
+    def get_node_from_key(self, key):
+        return self.nodes[self.keyslot(key) * len(self.nodes) // self.slots]
+
+    def get_primaries(self):
+        return self.nodes
+
+    def get_redis_connection(self, node):
+        return node
+
+    def set(self, key):
+        self.get_node_from_key(key).set(key)
+
+    def unlink(self, *keys):
+        slots = {self.keyslot(key) for key in keys}
+        if len(slots) != 1:
+            raise RuntimeError('CROSSSLOT Keys in request don\'t hash to the same slot')
+        self.unlinked_batches.append(len(keys))
+        return self.get_node_from_key(keys[0]).unlink(*keys)
+
+
+class FakeDjangoRedisCache:
+    """
+    `django_redis` cache backend stand-in.
+    """
+    def __init__(self, redis_client):
+        self.client = SimpleNamespace(
+            get_client=lambda write=True: redis_client,
+            make_pattern=lambda pattern: f':1:{pattern}',
+            reverse_key=lambda key: key.split(':', 2)[2],
+        )
+
+
+class TestRedisCluster(APITestCase):
+    def setUp(self):
+        self.cluster = FakeRedisCluster()
+        self.manager = RedisCacheManager(FakeDjangoRedisCache(self.cluster), 'redis')
+
+    def test_hash_tags(self):
+        with mock.patch('authoriz.config.CACHE_HASH_TAGS', True):
+            key = build_key(values=[get_user_key_part('user-1'), 'uaa'], arrays=[['admin']])
+        self.assertEqual(key, 'actions.{user-1}.uaa.admin')
+        self.assertEqual(get_hash_tag(key), 'user-1')
+        self.assertEqual(FakeRedisCluster.keyslot(key), FakeRedisCluster.keyslot('actions.{user-1}.aur'))
+        self.assertIsNone(get_hash_tag('actions.{}.aur'))
+
+    def test_scan_all_primaries(self):
+        for i in range(100):
+            self.cluster.set(f':1:actions.user-{i}.aur')
+        self.assertTrue(all(node.data for node in self.cluster.nodes))
+
+        self.assertEqual(len(self.manager.keys('actions.*')), 100)
+        self.assertEqual(self.manager.delete_pattern('actions.*'), 100)
+        self.assertFalse(any(node.data for node in self.cluster.nodes))
+        self.assertTrue(all('scan' in node.commands for node in self.cluster.nodes))
+
+    def test_user_keys_on_one_node(self):
+        for i in range(3):
+            for kind in ['aur', 'uaa']:
+                self.cluster.set(f':1:actions.{{user-{i}}}.{kind}')
+
+        self.assertEqual(self.manager.delete_pattern('actions.{user-1}.*'), 2)
+        self.assertEqual(self.cluster.unlinked_batches, [2])
+        scanned = [node for node in self.cluster.nodes if 'scan' in node.commands]
+        self.assertEqual(len(scanned), 1)
+        self.assertEqual(len(self.manager.keys('actions.*')), 4)
+
+    def test_unlink_batches(self):
+        for i in range(1200):
+            self.cluster.set(f':1:actions.{{user-1}}.uaa.{i}')
+
+        self.assertEqual(self.manager.delete_pattern('actions.{user-1}.*'), 1200)
+        self.assertEqual(self.cluster.unlinked_batches, [500, 500, 200])
+
+
+KEY_SCRIPT = '''
+from django.conf import settings
+settings.configure()
+from authoriz.cache import build_key
+roles = list({'admin', 'viewer', 'editor', 'owner', 'auditor'})
+params = dict.fromkeys({'project_id', 'entity_id', 'organization_id'}, 1)
+print(build_key(values=['user-1', 'uaa'], arrays=[roles], dicts=[params]))
+'''
+
+
+class TestCanonicalCacheKeys(APITestCase):
+    def test_canonical_key(self):
+        self.assertEqual(
+            build_key(values=['user-1', 'uaa'], arrays=[['viewer', 'admin']], dicts=[{'b': 1, 'a': 2}]),
+            build_key(values=['user-1', 'uaa'], arrays=[['admin', 'viewer']], dicts=[{'a': 2, 'b': 1}]),
+        )
+
+    def test_same_key_in_different_processes(self):
+        package_path = os.path.dirname(os.path.dirname(authoriz.__file__))
+        keys = set()
+        for seed in ['0', '1', '2', '3', '4']:
+            env = {
+                **os.environ,
+                'PYTHONHASHSEED': seed,
+                'PYTHONPATH': os.pathsep.join([package_path, os.environ.get('PYTHONPATH', '')]),
+            }
+            env.pop('DJANGO_SETTINGS_MODULE', None)
+            output = subprocess.run(
+                [sys.executable, '-c', KEY_SCRIPT],
+                env=env,
+                check=True,
+                stdout=subprocess.PIPE,
+                universal_newlines=True
+            ).stdout
+            keys.add(output.strip())
+        self.assertEqual(keys, {
+            'actions.user-1.uaa.admin,auditor,editor,owner,viewer.entity_id=1&organization_id=1&project_id=1'
+        })
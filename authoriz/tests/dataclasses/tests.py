@@ -1,8 +1,11 @@
 import os
+import pickle
+from dataclasses import FrozenInstanceError
 
 from django.conf import settings
 from rest_framework.test import APIClient, APITestCase, override_settings
-from authorization.dataclasses import ParsedAction
+from authorization.dataclasses import ParsedAction, PermissionsRule, _INTERNED_PARAMS
+from authorization.tests.parsing.utils import setup_test_parser
 
 
 @override_settings(ACTION_RULES_SERVICE={
@@ -95,3 +98,74 @@ class TestDataclasses(APITestCase):
                     'wrong_param': 1
                 }
             )
+
+    def test_parsed_action_frozen(self):
+        action = ParsedAction(
+            namespace='prj',
+            action_name='RetrieveProject',
+            params={
+                'project_id': 1
+            }
+        )
+
+        self.assertFalse(hasattr(action, '__dict__'))
+        with self.assertRaises(FrozenInstanceError):
+            action.action_name = 'UpdateProject'
+        with self.assertRaises(TypeError):
+            action.params['project_id'] = '2'
+
+    def test_parsed_action_shared_params(self):
+        action_1 = ParsedAction(
+            namespace='prj',
+            action_name='RetrieveProject',
+            params={
+                'project_id': 1
+            }
+        )
+        action_2 = ParsedAction(
+            namespace='prj',
+            action_name='RetrieveProject',
+            params={
+                'project_id': '1'
+            }
+        )
+
+        self.assertEqual(action_1, action_2)
+        self.assertEqual(hash(action_1), hash(action_2))
+        self.assertIs(action_1.params, action_2.params)
+
+    def test_interned_params_cleared_on_reload(self):
+        action = ParsedAction(
+            namespace='prj',
+            action_name='RetrieveProject',
+            params={
+                'project_id': 5
+            }
+        )
+        self.assertIn((('project_id', '5'),), _INTERNED_PARAMS)
+
+        setup_test_parser([])
+
+        self.assertNotIn((('project_id', '5'),), _INTERNED_PARAMS)
+        self.assertEqual(action.params, {'project_id': '5'})
+
+    def test_permissions_rule_frozen(self):
+        rule = PermissionsRule(
+            name='Rule 1',
+            effect='Allow',
+            actions=[
+                ParsedAction(
+                    namespace='prj',
+                    action_name='RetrieveProject',
+                )
+            ],
+            target='Role:Admin'
+        )
+
+        self.assertEqual(rule.effect, 'allow')
+        self.assertEqual(rule.target, 'role:admin')
+        self.assertIsInstance(rule.actions, tuple)
+        self.assertFalse(hasattr(rule, '__dict__'))
+        self.assertEqual(pickle.loads(pickle.dumps(rule)), rule)
+        with self.assertRaises(FrozenInstanceError):
+            rule.effect = 'deny'
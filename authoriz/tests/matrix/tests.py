@@ -0,0 +1,70 @@
+import random
+from unittest import skipIf
+
+from rest_framework.test import APITestCase
+
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.parsing.service import RulesParsingService
+from authoriz.tests.parsing.utils import setup_test_parser, random_rules
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@skipIf(numpy is None, 'numpy is not installed')
+class TestPermissionMatrix(APITestCase):
+    users = [
+        ('user-1', []),
+        ('user-2', ['admin']),
+        ('user-3', ['viewer']),
+        ('user-1', ['admin', 'viewer']),
+    ]
+    actions = ['prj:RetrieveProject', 'prj:UpdateProject', 'prj:ListProjects', 'entity:EntityUpdate']
+    objects = [{}, {'project_id': 1}, {'project_id': '2'}, {'project_id': 4}, {'project_id': 1, 'cursor': 'a'}]
+
+    def tearDown(self):
+        setup_test_parser([])
+
+    def test_matrix(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={'project_id': 1})
+                ],
+                target='role:admin'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='UpdateProject')
+                ],
+                target='user-2'
+            ),
+        ])
+
+        matrix = RulesParsingService.get_allowed_matrix(self.users, self.actions[:2], self.objects[:3])
+
+        self.assertEqual(matrix.shape, (4, 2, 3))
+        self.assertEqual(matrix[1].tolist(), [[False, True, False], [True, True, True]])
+        self.assertEqual(matrix[3].tolist(), [[False, True, False], [False, False, False]])
+        self.assertFalse(matrix[0].any())
+
+    def test_same_decisions(self):
+        rnd = random.Random(7)
+        for _ in range(30):
+            setup_test_parser(random_rules(rnd, rnd.randint(1, 12)))
+            matrix = RulesParsingService.get_allowed_matrix(self.users, self.actions, self.objects)
+            for i, (user_id, user_roles) in enumerate(self.users):
+                for k, params in enumerate(self.objects):
+                    allowed_actions = RulesParsingService.get_user_allowed_actions(
+                        user_id, user_roles, params, use_cache=False
+                    )
+                    self.assertEqual(
+                        matrix[i, :, k].tolist(),
+                        [action in allowed_actions for action in self.actions]
+                    )
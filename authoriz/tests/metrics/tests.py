@@ -0,0 +1,81 @@
+from rest_framework.test import APITestCase
+
+from authoriz.cache import get_user_roles_by_params_from_cache, save_user_roles_by_params_to_cache
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.metrics import (
+    InMemoryMetricsCollector, PrometheusTextExporter, set_metrics_collector,
+    CACHE_REQUESTS, CHECK_LATENCY, DECISIONS, EVALUATION_LATENCY,
+)
+from authoriz.service import PermissionsService
+from authoriz.tests.parsing.utils import setup_test_parser
+
+
+class TestMetrics(APITestCase):
+    def setUp(self):
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+
+    def tearDown(self):
+        set_metrics_collector(None)
+
+    def test_in_memory_collector(self):
+        self.collector.increment('requests_total', kind='aur')
+        self.collector.increment('requests_total', 2, kind='aur')
+        self.collector.observe('latency_seconds', 0.003)
+        self.collector.observe('latency_seconds', 0.2)
+
+        self.assertEqual(self.collector.get_counter('requests_total', kind='aur'), 3)
+        self.assertEqual(self.collector.get_counter('requests_total', kind='uaa'), 0)
+        histogram = self.collector.get_histogram('latency_seconds')
+        self.assertEqual(histogram.count, 2)
+        self.assertAlmostEqual(histogram.sum, 0.203)
+
+    def test_prometheus_exporter(self):
+        self.collector.increment('requests_total', kind='aur', result='hit')
+        self.collector.observe('latency_seconds', 0.003)
+
+        text = PrometheusTextExporter(self.collector).render()
+
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{kind="aur",result="hit"} 1', text)
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{le="0.0025"} 0', text)
+        self.assertIn('latency_seconds_bucket{le="0.005"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('latency_seconds_count 1', text)
+
+    def test_cache_hits_and_misses(self):
+        get_user_roles_by_params_from_cache('metrics-user', {'project_id': 1}, cache_prefix='test')
+        save_user_roles_by_params_to_cache(
+            'metrics-user', {'project_id': 1}, {'project_id': ['admin']}, cache_prefix='test'
+        )
+        get_user_roles_by_params_from_cache('metrics-user', {'project_id': 1}, cache_prefix='test')
+
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='aur', result='miss'), 1)
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='aur', result='hit'), 1)
+
+    def test_decisions(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='RetrieveProject',
+                        params={
+                            'project_id': 1
+                        }
+                    )
+                ],
+                target='*'
+            )
+        ])
+
+        PermissionsService.is_user_allowed('metrics-user', ['prj:RetrieveProject'], {'project_id': 1})
+        PermissionsService.is_user_allowed('metrics-user', ['prj:RetrieveProject'], {'project_id': 2})
+
+        self.assertEqual(self.collector.get_counter(DECISIONS, outcome='allowed'), 1)
+        self.assertEqual(self.collector.get_counter(DECISIONS, outcome='denied'), 1)
+        self.assertEqual(self.collector.get_histogram(CHECK_LATENCY).count, 2)
+        self.assertEqual(self.collector.get_histogram(EVALUATION_LATENCY).count, 2)
@@ -0,0 +1,65 @@
+from django.db import models
+from rest_framework.test import APITestCase
+
+from authoriz.namespaces.base import ActionEnumsService, ActionsNamespace
+
+
+class TestActionsRegistry(APITestCase):
+    @staticmethod
+    def _restore_namespaces(enums):
+        ActionEnumsService._ENUMS[:] = enums
+        ActionEnumsService._NAMESPACE_DICT.clear()
+        ActionEnumsService._NAMESPACE_DICT.update((EnumCls.name, EnumCls) for EnumCls in enums)
+        ActionEnumsService.invalidate()
+
+    def test_registry_indexes(self):
+        ActionEnumsService.freeze()
+        registry = ActionEnumsService.get_registry()
+
+        self.assertIn('prj:RetrieveProject', registry.actions)
+        self.assertIn('RetrieveProject', registry.plain_actions)
+        self.assertEqual(registry.action_params['prj:RetrieveProject'], ('project_id',))
+        self.assertEqual(registry.get_action_params('prj:ListProjects'), ())
+        with self.assertRaises(RuntimeError):
+            registry.get_action_params('unknown:Action')
+        self.assertEqual(
+            registry.wildcard_expansions['prj:*'],
+            frozenset(ActionEnumsService.actions_by_namespace('prj'))
+        )
+        self.assertIs(ActionEnumsService.get_registry(), registry)
+
+    def test_validate_action(self):
+        self.assertEqual(ActionEnumsService.validate_action('prj:RetrieveProject'), 'prj:RetrieveProject')
+        self.assertEqual(ActionEnumsService.validate_action('prj:*'), 'prj:*')
+        with self.assertRaises(RuntimeError):
+            ActionEnumsService.validate_action('prj:SomeAction')
+
+    def test_expand_action(self):
+        self.assertEqual(
+            ActionEnumsService.expand_action('prj:*'),
+            frozenset(ActionEnumsService.actions_by_namespace('prj'))
+        )
+        self.assertEqual(
+            ActionEnumsService.expand_action('prj:RetrieveProject'),
+            frozenset(['prj:RetrieveProject'])
+        )
+
+    def test_late_registration_invalidates_registry(self):
+        self.addCleanup(self._restore_namespaces, list(ActionEnumsService._ENUMS))
+        ActionEnumsService.freeze()
+        registry = ActionEnumsService.get_registry()
+
+        class LateNamespace(ActionsNamespace):
+            name = 'late'
+
+            class Actions(models.TextChoices):
+                LateAction = 'late:LateAction'
+
+            params = {
+                'late:LateAction': ['late_id'],
+            }
+
+        self.assertIsNot(ActionEnumsService.get_registry(), registry)
+        self.assertIn('late', ActionEnumsService.get_namespaces())
+        self.assertTrue(ActionEnumsService.has_action('late:LateAction'))
+        self.assertEqual(ActionEnumsService.get_action_params('late:*'), ['late_id'])
@@ -1,12 +1,17 @@
+import dataclasses
+import random
 from typing import List
 
 from django.conf import settings
 from rest_framework.test import APIClient, APITestCase, override_settings
 from authorization.namespaces.base import ActionEnumsService
 from authorization.dataclasses import PermissionsRule, ParsedAction
+from authorization.parsing.service import RulesParsingService
+from authorization.parsing.reverse import TargetRule
 from authorization.tests.parsing.utils import (
     TestPermissionsParser, get_rule_for_role, get_rule,
-    ActionsLookup, TestActionsService,
+    ActionsLookup, TestActionsService, setup_test_parser,
+    random_rules, RANDOM_RULES_ROLES,
 )
 
 
@@ -1337,3 +1342,313 @@ class TestUserAllowedActions(APITestCase):
             res_no_target=False,
             res_no_target_params=False
         )
+
+
+class TestCompiledRules(APITestCase):
+    def test_compiled_rules_same_decisions(self):
+        rnd = random.Random(42)
+        for _ in range(30):
+            setup_test_parser(random_rules(rnd, rnd.randint(1, 12)))
+            compiled_rules = RulesParsingService._COMPILED_RULES
+            for user_id in ['user-1', 'user-2', 'user-3']:
+                for user_roles in RANDOM_RULES_ROLES:
+                    for params in [{}, {'project_id': '1'}, {'project_id': '2'}, {'project_id': '4'}]:
+                        self.assertEqual(
+                            RulesParsingService._evaluate_rules_tree(user_id, user_roles, params),
+                            compiled_rules.evaluate(user_id, user_roles, params)
+                        )
+
+    def test_compiled_rules_engine(self):
+        RulesParsingService.initialize({
+            'RULES_ENGINE': 'compiled',
+            'RULES_PARSERS': [
+                {
+                    'parser': TestPermissionsParser,
+                    'args': [[
+                        PermissionsRule(
+                            name='Rule 1',
+                            effect='allow',
+                            actions=[
+                                ParsedAction(
+                                    namespace='prj',
+                                    action_name='RetrieveProject',
+                                    params={
+                                        'project_id': 1
+                                    }
+                                )
+                            ],
+                            target='role:admin'
+                        )
+                    ]],
+                }
+            ]
+        })
+
+        self.assertEqual(RulesParsingService._PARSED_RULES, {})
+        self.assertEqual(
+            RulesParsingService.get_user_allowed_actions('user-1', ['admin'], {'project_id': 1}, use_cache=False),
+            ['prj:RetrieveProject']
+        )
+        self.assertEqual(
+            RulesParsingService.get_user_allowed_actions('user-1', ['admin'], {'project_id': 2}, use_cache=False),
+            []
+        )
+        setup_test_parser([])
+
+    def test_referenced_params(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='*',
+                    )
+                ],
+                target='*'
+            )
+        ])
+        self.assertEqual(RulesParsingService._COMPILED_RULES.referenced_params, frozenset())
+        self.assertEqual(RulesParsingService.project_params({'project_id': 1, 'cursor': 'abc'}), {})
+
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='RetrieveProject',
+                        params={
+                            'project_id': 1
+                        }
+                    )
+                ],
+                target='*'
+            )
+        ])
+        self.assertEqual(RulesParsingService._COMPILED_RULES.referenced_params, frozenset({'project_id'}))
+        self.assertEqual(
+            RulesParsingService.project_params({'project_id': 1, 'cursor': 'abc'}),
+            {'project_id': '1'}
+        )
+        setup_test_parser([])
+
+    def test_action_targets(self):
+        rules = [
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='*')
+                ],
+                target='*'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject')
+                ],
+                target='role:admin'
+            ),
+            PermissionsRule(
+                name='Rule 3',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={'project_id': 1})
+                ],
+                target='user-1'
+            ),
+            PermissionsRule(
+                name='Rule 4',
+                effect='deny',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={'project_id': 2})
+                ],
+                target='role:admin'
+            ),
+        ]
+        setup_test_parser(rules)
+        ids = [rule.id for rule in rules]
+
+        self.assertEqual(
+            RulesParsingService.get_action_targets('prj:RetrieveProject', {'project_id': 1}),
+            [
+                TargetRule('prj:*', '*', 'allow', ids[0]),
+                TargetRule('prj:RetrieveProject', 'role:admin', 'allow', ids[1]),
+                TargetRule('prj:RetrieveProject', 'user-1', 'allow', ids[2]),
+            ]
+        )
+        self.assertEqual(
+            RulesParsingService.get_action_targets('prj:RetrieveProject', {'project_id': '2'}),
+            [
+                TargetRule('prj:*', '*', 'allow', ids[0]),
+                TargetRule('prj:RetrieveProject', 'role:admin', 'deny', ids[3]),
+            ]
+        )
+        self.assertEqual(
+            RulesParsingService.get_action_targets('prj:UpdateProject', {}),
+            [TargetRule('prj:*', '*', 'allow', ids[0])]
+        )
+        setup_test_parser([])
+
+    def test_roles_required(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject')
+                ],
+                target='role:admin'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject')
+                ],
+                target='*'
+            ),
+            PermissionsRule(
+                name='Rule 3',
+                effect='deny',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='UpdateProject')
+                ],
+                target='role:guest'
+            ),
+        ])
+        # Role rule is overridden by the later rule for everyone.
+        self.assertFalse(RulesParsingService.roles_required(['prj:RetrieveProject']))
+        self.assertFalse(RulesParsingService.roles_required(['prj:ListProjects']))
+        self.assertTrue(RulesParsingService.roles_required(['prj:UpdateProject']))
+        self.assertTrue(RulesParsingService.roles_required(['prj:RetrieveProject', 'prj:UpdateProject']))
+
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='*')
+                ],
+                target='role:admin'
+            ),
+        ])
+        self.assertTrue(RulesParsingService.roles_required(['prj:ListProjects']))
+        setup_test_parser([])
+
+    def test_namespace_versions(self):
+        def build_rules(prj_actions):
+            return [
+                *[
+                    PermissionsRule(
+                        name='Rule 1',
+                        effect='allow',
+                        actions=[
+                            ParsedAction(namespace='prj', action_name=action_name)
+                        ],
+                        target='*'
+                    )
+                    for action_name in prj_actions
+                ],
+                PermissionsRule(
+                    name='Rule 2',
+                    effect='allow',
+                    actions=[
+                        ParsedAction(namespace='entity', action_name='*')
+                    ],
+                    target='role:admin'
+                ),
+                PermissionsRule(
+                    name='Rule 3',
+                    effect='deny',
+                    actions=[
+                        ParsedAction(namespace='entity', action_name='EntityUpdate', params={'entity_id': 1})
+                    ],
+                    target='*'
+                ),
+            ]
+
+        setup_test_parser(build_rules(['ListProjects']))
+        versions = RulesParsingService._COMPILED_RULES.namespace_versions
+
+        # Identical rules parsed again get new ids but the same versions.
+        setup_test_parser(build_rules(['ListProjects']))
+        self.assertEqual(RulesParsingService._COMPILED_RULES.namespace_versions, versions)
+
+        # Change of prj rules doesn't change entity version.
+        setup_test_parser(build_rules(['ListProjects', 'UpdateProject']))
+        new_versions = RulesParsingService._COMPILED_RULES.namespace_versions
+        self.assertNotEqual(new_versions['prj'], versions['prj'])
+        self.assertEqual(new_versions['entity'], versions['entity'])
+
+        # Change of entity rules changes only entity version.
+        rules = build_rules(['ListProjects'])
+        rules[-1] = dataclasses.replace(rules[-1], effect='allow')
+        setup_test_parser(rules)
+        new_versions = RulesParsingService._COMPILED_RULES.namespace_versions
+        self.assertEqual(new_versions['prj'], versions['prj'])
+        self.assertNotEqual(new_versions['entity'], versions['entity'])
+        setup_test_parser([])
+
+
+class TestRulesTreeEvaluation(APITestCase):
+    """
+    Regression tests of the parsed rules tree evaluation. Before compiled
+    rules were added it evaluated only the last action of a namespace, lost
+    user rules after role rules and failed on actions without params.
+    """
+    def tearDown(self):
+        setup_test_parser([])
+
+    @staticmethod
+    def _rule(effect, action_name, target, params=None):
+        return PermissionsRule(
+            name='Rule',
+            effect=effect,
+            actions=[
+                ParsedAction(namespace='prj', action_name=action_name, params=params or {})
+            ],
+            target=target
+        )
+
+    def test_all_namespace_actions(self):
+        rules = [
+            self._rule('allow', 'RetrieveProject', '*', {'project_id': 1}),
+            self._rule('deny', '*', 'user-2'),
+        ]
+        setup_test_parser(rules)
+
+        # Only `prj:*` was evaluated, so the result was empty.
+        self.assertEqual(
+            RulesParsingService._evaluate_rules_tree('user-1', [], {'project_id': '1'}),
+            {'prj:RetrieveProject': {'rule': rules[0].id, 'effect': 'allow'}}
+        )
+
+    def test_user_rules_after_role_rules(self):
+        rules = [
+            self._rule('allow', '*', 'role:admin'),
+            self._rule('deny', '*', 'user-1'),
+        ]
+        setup_test_parser(rules)
+
+        # User rules were looked up in the roles subtree, so the role rule allowed.
+        self.assertEqual(
+            RulesParsingService._evaluate_rules_tree('user-1', ['admin'], {}),
+            {'prj:*': {'rule': rules[1].id, 'effect': 'deny'}}
+        )
+
+    def test_action_without_params(self):
+        rules = [
+            self._rule('allow', 'ListProjects', '*'),
+        ]
+        setup_test_parser(rules)
+
+        # Evaluation failed with IndexError.
+        self.assertEqual(
+            RulesParsingService._evaluate_rules_tree('user-1', [], {}),
+            {'prj:ListProjects': {'rule': rules[0].id, 'effect': 'allow'}}
+        )
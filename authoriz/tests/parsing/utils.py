@@ -1,8 +1,10 @@
+import random
 from copy import deepcopy
 from dataclasses import dataclass, field
 from typing import List
 
-from authoriz.dataclasses import PermissionsRule
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.namespaces.base import ActionEnumsService
 from authoriz.parsing.base import PermissionsParser
 from authoriz.parsing.service import RulesParsingService
 
@@ -91,6 +93,33 @@ def setup_test_parser(rules):
     })
 
 
+RANDOM_RULES_TARGETS = ['*', 'user-1', 'user-2', 'role:admin', 'role:viewer']
+RANDOM_RULES_ROLES = [[], ['admin'], ['viewer'], ['admin', 'viewer']]
+
+
+def random_rules(rnd: random.Random, count: int) -> List[PermissionsRule]:
+    rules = []
+    action_names = ['*', *ActionEnumsService.actions_by_namespace('prj', with_namespace=False)]
+    for _ in range(count):
+        action_name = rnd.choice(action_names)
+        params = {}
+        if 'project_id' in ActionEnumsService.get_action_params(f'prj:{action_name}') and rnd.random() < 0.6:
+            params['project_id'] = rnd.randint(1, 3)
+        rules.append(PermissionsRule(
+            name='Rule',
+            effect=rnd.choice(['allow', 'deny']),
+            actions=[
+                ParsedAction(
+                    namespace='prj',
+                    action_name=action_name,
+                    params=params
+                )
+            ],
+            target=rnd.choice(RANDOM_RULES_TARGETS)
+        ))
+    return rules
+
+
 @dataclass
 class ActionsLookup:
     user_id: str
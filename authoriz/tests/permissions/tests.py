@@ -0,0 +1,190 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from rest_framework.test import APITestCase, override_settings
+
+from authoriz.cache import clear_cache
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.permissions.base import BaseServicePermission
+from authoriz.service import PermissionsService
+from authoriz.tests.parsing.utils import setup_test_parser
+from authoriz.utils.permissions import DenyPermission, LazyParams, PermissionShortCircuit, SkipPermission
+
+
+class ProjectPermission(BaseServicePermission):
+    def __init__(self, *args, **kwargs):
+        super(ProjectPermission, self).__init__(*args, **kwargs)
+        self.called = []
+
+    def get_project_id(self, request, view):
+        self.called.append('project_id')
+        if request.project_id is None:
+            return SkipPermission()
+        return request.project_id
+
+    def get_not_a_param(self, request, view):
+        self.called.append('not_a_param')
+        if request.deny:
+            return DenyPermission()
+
+
+@override_settings(ACTION_RULES_SERVICE={
+    **getattr(settings, 'ACTION_RULES_SERVICE', {}),
+    "DISABLE_PERMISSIONS_CHECK": False
+})
+class TestServicePermission(APITestCase):
+    def setUp(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='*',
+                        params={
+                            'project_id': 1
+                        }
+                    )
+                ],
+                target='*'
+            )
+        ])
+
+    @staticmethod
+    def _request(project_id=1, deny=False):
+        return SimpleNamespace(
+            user=SimpleNamespace(id='permissions-user'),
+            method='GET',
+            project_id=project_id,
+            deny=deny
+        )
+
+    @staticmethod
+    def _permission(actions):
+        return ProjectPermission(
+            actions_permissions={'action': actions},
+            action='action'
+        )
+
+    def test_params_getters(self):
+        self.assertEqual(
+            ProjectPermission.params_getters,
+            (('get_not_a_param', 'not_a_param'), ('get_project_id', 'project_id'))
+        )
+
+    def test_required_params_getters(self):
+        self.assertEqual(
+            ProjectPermission.required_params_getters(['prj:RetrieveProject']),
+            (('get_not_a_param', 'not_a_param'), ('get_project_id', 'project_id'))
+        )
+        self.assertEqual(
+            ProjectPermission.required_params_getters([]),
+            (('get_not_a_param', 'not_a_param'),)
+        )
+
+    def test_only_required_getters_called(self):
+        permission = self._permission([])
+
+        self.assertTrue(permission.has_permission(self._request(), SimpleNamespace()))
+        self.assertEqual(permission.called, ['not_a_param'])
+
+        permission = self._permission(['prj:RetrieveProject'])
+
+        self.assertTrue(permission.has_permission(self._request(), SimpleNamespace()))
+        self.assertEqual(permission.called, ['not_a_param', 'project_id'])
+
+    def test_deny_getter(self):
+        permission = self._permission(['prj:RetrieveProject'])
+
+        self.assertFalse(permission.has_permission(self._request(deny=True), SimpleNamespace()))
+
+    def test_skip_lazy_getter(self):
+        permission = self._permission(['prj:RetrieveProject'])
+
+        self.assertTrue(permission.has_permission(self._request(project_id=None), SimpleNamespace()))
+        self.assertEqual(permission.called, ['not_a_param', 'project_id'])
+
+        permission = self._permission(['entity:EntityUpdate'])
+
+        self.assertFalse(permission.has_permission(self._request(project_id=None), SimpleNamespace()))
+        self.assertEqual(permission.called, ['not_a_param'])
+
+    def test_wildcard_rule_params(self):
+        # `prj:*` rule matches on project_id, ListProjects itself has no params.
+        self.assertTrue(PermissionsService.is_user_allowed('permissions-user', ['prj:ListProjects'], {'project_id': 1}))
+        self.assertFalse(PermissionsService.is_user_allowed('permissions-user', ['prj:ListProjects'], {'project_id': 2}))
+
+        permission = self._permission(['prj:ListProjects'])
+
+        self.assertTrue(permission.has_permission(self._request(), SimpleNamespace()))
+        self.assertEqual(permission.called, ['not_a_param', 'project_id'])
+
+
+class DenyingProjectPermission(ProjectPermission):
+    def get_project_id(self, request, view):
+        self.called.append('project_id')
+        return DenyPermission()
+
+
+@override_settings(ACTION_RULES_SERVICE={
+    **getattr(settings, 'ACTION_RULES_SERVICE', {}),
+    "DISABLE_PERMISSIONS_CHECK": False
+})
+class TestRequiredGetters(APITestCase):
+    def setUp(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='*')
+                ],
+                target='*'
+            )
+        ])
+
+    def tearDown(self):
+        setup_test_parser([])
+        clear_cache()
+
+    def test_unread_param_getter_denies(self):
+        # No rule has project_id values, so decisions are keyed without it.
+        request = SimpleNamespace(user=SimpleNamespace(id='permissions-user'), method='GET', deny=False)
+        permission = DenyingProjectPermission(actions_permissions={'action': ['prj:RetrieveProject']}, action='action')
+
+        with mock.patch('authoriz.config.CACHE_DECISIONS', True):
+            self.assertTrue(PermissionsService.is_user_allowed('permissions-user', ['prj:RetrieveProject'], {}))
+            self.assertFalse(permission.has_permission(request, SimpleNamespace()))
+        self.assertEqual(permission.called, ['not_a_param', 'project_id'])
+
+
+class TestLazyParams(APITestCase):
+    def test_getter_called_once(self):
+        calls = []
+
+        def get_project_id():
+            calls.append('project_id')
+            return 1
+
+        params = LazyParams({'project_id': get_project_id}, values={'entity_id': 2})
+
+        self.assertIn('project_id', params)
+        self.assertEqual(calls, [])
+        self.assertEqual(params.resolved(), {'entity_id': 2})
+        self.assertEqual(params['project_id'], 1)
+        self.assertEqual(params['project_id'], 1)
+        self.assertEqual(calls, ['project_id'])
+        self.assertEqual(sorted(params), ['entity_id', 'project_id'])
+        self.assertNotIn('user_id', params)
+
+    def test_short_circuit(self):
+        params = LazyParams({'skip': SkipPermission, 'deny': DenyPermission})
+
+        with self.assertRaises(PermissionShortCircuit) as skip:
+            params['skip']
+        with self.assertRaises(PermissionShortCircuit) as deny:
+            params['deny']
+        self.assertTrue(skip.exception.allowed)
+        self.assertFalse(deny.exception.allowed)
@@ -0,0 +1,628 @@
+import random
+from unittest import mock
+
+from django.db import models, transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from rest_framework.test import APITestCase
+
+from authoriz.cache import clear_cache, get_user_roles_by_params_from_cache, save_user_roles_by_params_to_cache
+from authoriz.metrics import InMemoryMetricsCollector, set_metrics_collector, CACHE_LATENCY, CACHE_REQUESTS
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.service import PermissionsService
+from authoriz.signals import connect_invalidation_hooks, disconnect_invalidation_hooks, invalidate_user_roles
+from authoriz.namespaces.base import ActionEnumsService
+from authoriz.parsing.service import RulesParsingService
+from authoriz.tests.parsing.utils import setup_test_parser, random_rules
+from authoriz.utils.permissions import LazyParams
+from authoriz.utils.resolving import resolve_object
+from authoriz.utils.roles import (
+    RelationRolesGetter, get_roles_plan, get_user_roles_by_param, get_user_roles_by_params,
+    get_user_roles_by_param_values, get_user_roles_by_params_values,
+)
+
+
+class RoleGetters:
+    def __init__(self):
+        self.calls = []
+
+    def get_project_roles(self, user_id, project_id):
+        self.calls.append(('project_id', project_id))
+        return [f'project_{project_id}_admin']
+
+    def get_entity_roles(self, user_id, entity_id):
+        self.calls.append(('entity_id', entity_id))
+        return [f'entity_{entity_id}_viewer', 'viewer']
+
+    def role_classes(self):
+        return [
+            {
+                'getters': [
+                    {'key': 'project_id', 'getter': self.get_project_roles},
+                ]
+            },
+            {
+                'getters': [
+                    {'key': 'entity_id', 'getter': self.get_entity_roles},
+                ]
+            },
+        ]
+
+
+class TestUserRolesCache(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.getters = RoleGetters()
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', self.getters.role_classes())
+        self.role_classes.start()
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+
+    def tearDown(self):
+        self.role_classes.stop()
+        set_metrics_collector(None)
+        clear_cache()
+
+    def test_roles_cached_by_param(self):
+        self.assertEqual(
+            PermissionsService._get_all_user_roles('user-1', project_id=1),
+            ['project_1_admin']
+        )
+        self.assertEqual(
+            PermissionsService._get_all_user_roles('user-1', project_id=1, entity_id=7, cursor='abc'),
+            ['entity_7_viewer', 'project_1_admin', 'viewer']
+        )
+        self.assertEqual(
+            PermissionsService._get_all_user_roles('user-1', entity_id=7),
+            ['entity_7_viewer', 'viewer']
+        )
+        # Each (param, value) getter is called once.
+        self.assertEqual(self.getters.calls, [('project_id', 1), ('entity_id', 7)])
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='aur', result='hit'), 2)
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='aur', result='miss'), 2)
+        # One multi-get per resolution.
+        self.assertEqual(self.collector.get_histogram(CACHE_LATENCY, kind='aur', operation='get_many').count, 3)
+
+    def test_roles_without_cache(self):
+        PermissionsService._get_all_user_roles('user-1', project_id=1)
+        PermissionsService._get_all_user_roles('user-1', use_cache=False, project_id=1)
+
+        self.assertEqual(self.getters.calls, [('project_id', 1), ('project_id', 1)])
+
+
+class TestDecisionsCache(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.getters = RoleGetters()
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', self.getters.role_classes())
+        self.role_classes.start()
+        self.decisions = mock.patch('authoriz.config.CACHE_DECISIONS', True)
+        self.decisions.start()
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={'project_id': 1})
+                ],
+                target='role:project_1_admin'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='ListProjects')
+                ],
+                target='*'
+            ),
+        ])
+
+    def tearDown(self):
+        self.decisions.stop()
+        self.role_classes.stop()
+        set_metrics_collector(None)
+        setup_test_parser([])
+        clear_cache()
+
+    def _requests(self, kind):
+        return sum(
+            self.collector.get_counter(CACHE_REQUESTS, kind=kind, result=result)
+            for result in ['hit', 'miss']
+        )
+
+    def test_one_request_on_warm_check(self):
+        for _ in range(3):
+            self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+        self.assertEqual(self.getters.calls, [('project_id', 1)])
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='dec', result='hit'), 2)
+        # Roles and allowed actions are fetched on the first check only.
+        self.assertEqual((self._requests('aur'), self._requests('uaa')), (1, 1))
+
+    def test_decision_without_roles(self):
+        calls = []
+
+        def get_entity_id():
+            calls.append('entity_id')
+            return 7
+
+        params = LazyParams({'entity_id': get_entity_id}, values={'project_id': 1})
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:ListProjects'], params))
+        # Neither roles nor role params are resolved.
+        self.assertEqual((self.getters.calls, calls), ([], []))
+
+        # Decision evaluated without roles is not used for role dependent actions.
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+        self.assertEqual(self.getters.calls, [('project_id', 1)])
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:ListProjects'], {'project_id': 1}))
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='dec', result='hit'), 1)
+
+    def test_actions_of_one_namespace(self):
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={'project_id': 2})
+                ],
+                target='*'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='deny',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='UpdateProject')
+                ],
+                target='role:project_2_admin'
+            ),
+        ])
+
+        # Decision of ListProjects check holds RetrieveProject evaluated with project_id too.
+        self.assertFalse(PermissionsService.is_user_allowed('user-1', ['prj:ListProjects'], {'project_id': 2}))
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 2}))
+        self.assertFalse(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 3}))
+        self.assertFalse(PermissionsService.is_user_allowed('user-1', ['prj:UpdateProject'], {'project_id': 2}))
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 2}))
+        self.assertEqual(self.collector.get_counter(CACHE_REQUESTS, kind='dec', result='hit'), 2)
+
+    def test_same_decisions(self):
+        rnd = random.Random(11)
+        actions = ActionEnumsService.actions_by_namespace('prj')
+        role_classes = [{
+            'getters': [
+                {'key': 'project_id', 'getter': lambda user_id, project_id: ['admin'] if project_id % 2 else ['viewer']},
+            ]
+        }]
+        with mock.patch('authoriz.config.ROLE_CLASSES', role_classes):
+            for i in range(100):
+                rules = random_rules(rnd, rnd.randint(1, 12))
+                if i % 2:
+                    # Without wildcard rules checks need different params.
+                    rules = [rule for rule in rules if rule.actions[0].action_name != '*']
+                setup_test_parser(rules)
+                for _ in range(30):
+                    user_id = rnd.choice(['user-1', 'user-2'])
+                    required_actions = rnd.sample(actions, rnd.randint(1, 2))
+                    params = rnd.choice([{}, {'project_id': 1}, {'project_id': 2}, {'project_id': 4}])
+                    user_roles = PermissionsService._get_all_user_roles(user_id, use_cache=False, **params)
+                    allowed_actions = RulesParsingService.get_user_allowed_actions(
+                        user_id, user_roles, params, use_cache=False
+                    )
+                    self.assertEqual(
+                        PermissionsService.is_user_allowed(user_id, required_actions, params),
+                        set(required_actions).issubset(allowed_actions)
+                    )
+
+    def test_invalidated_with_roles(self):
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+        self.assertTrue(PermissionsService.is_user_allowed('user-2', ['prj:RetrieveProject'], {'project_id': 1}))
+
+        # User loses the role, cached decision is used until invalidation.
+        with mock.patch('authoriz.config.ROLE_CLASSES', [
+            {'getters': [{'key': 'project_id', 'getter': lambda user_id, project_id: []}]},
+        ]):
+            self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_user_roles('user-1', {'project_id': 1})
+            self.assertFalse(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+            self.assertTrue(PermissionsService.is_user_allowed('user-2', ['prj:RetrieveProject'], {'project_id': 1}))
+
+
+class ProjectMembership:
+    """
+    Relation model stand-in sending model signals.
+    """
+    def __init__(self, user_id, project_id):
+        self.user_id = user_id
+        self.project_id = project_id
+        post_init.send(sender=ProjectMembership, instance=self)
+
+    def save(self):
+        post_save.send(sender=ProjectMembership, instance=self, created=False, using='default')
+
+    def delete(self):
+        post_delete.send(sender=ProjectMembership, instance=self, using='default')
+
+
+class TestInvalidationHooks(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', [
+            {
+                'user_relation_class': ProjectMembership,
+                'getters': [
+                    {'key': 'project_id', 'getter': lambda user_id, project_id: ['admin']},
+                ]
+            },
+        ])
+        self.role_classes.start()
+        connect_invalidation_hooks()
+        self.collector = InMemoryMetricsCollector()
+        set_metrics_collector(self.collector)
+
+    def tearDown(self):
+        disconnect_invalidation_hooks()
+        self.role_classes.stop()
+        set_metrics_collector(None)
+        clear_cache()
+
+    def _cache_roles(self, user_id, project_ids):
+        for project_id in project_ids:
+            save_user_roles_by_params_to_cache(user_id, {'project_id': project_id}, {'project_id': ['admin']})
+
+    def _cached_projects(self, user_id, project_ids):
+        return [
+            project_id for project_id in project_ids
+            if get_user_roles_by_params_from_cache(user_id, {'project_id': project_id})
+        ]
+
+    def test_invalidate_affected_entries(self):
+        self._cache_roles('user-1', [1, 2])
+        self._cache_roles('user-2', [1])
+
+        membership = ProjectMembership('user-1', 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.save()
+
+        self.assertEqual(self._cached_projects('user-1', [1, 2]), [2])
+        self.assertEqual(self._cached_projects('user-2', [1]), [1])
+
+        self._cache_roles('user-1', [1])
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.delete()
+        self.assertEqual(self._cached_projects('user-1', [1, 2]), [2])
+
+    def test_changed_relation(self):
+        self._cache_roles('user-1', [1, 2, 3])
+
+        membership = ProjectMembership('user-1', 1)
+        membership.project_id = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.save()
+
+        # Both the old and the new project roles are invalidated.
+        self.assertEqual(self._cached_projects('user-1', [1, 2, 3]), [3])
+
+    def test_batched_on_commit(self):
+        self._cache_roles('user-1', range(100))
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            with transaction.atomic():
+                for project_id in range(100):
+                    ProjectMembership('user-1', project_id).save()
+            self.assertEqual(self._cached_projects('user-1', [0, 99]), [0, 99])
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(self._cached_projects('user-1', range(100)), [])
+        self.assertEqual(self.collector.get_histogram(CACHE_LATENCY, kind='aur', operation='delete_many').count, 1)
+
+    def test_rolled_back_transaction(self):
+        self._cache_roles('user-1', [1, 2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    ProjectMembership('user-1', 1).save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            ProjectMembership('user-1', 2).save()
+
+        self.assertEqual(self._cached_projects('user-1', [1, 2]), [1])
+
+    def test_rolled_back_savepoint(self):
+        self._cache_roles('user-1', [1, 2])
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        ProjectMembership('user-1', 1).save()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                ProjectMembership('user-1', 2).save()
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(self._cached_projects('user-1', [1, 2]), [1])
+
+
+class FakeRelationManager:
+    """
+    Relation model manager stand-in recording queries.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def filter(self, *args, **kwargs):
+        query = {'args': args, 'kwargs': kwargs}
+        self.queries.append(query)
+        manager = self
+
+        class QuerySet:
+            def values_list(self, *fields):
+                query['fields'] = fields
+                return manager.rows
+
+        return QuerySet()
+
+
+class Membership:
+    objects = None
+
+
+class TestRelationRolesGetter(APITestCase):
+    def setUp(self):
+        Membership.objects = FakeRelationManager([
+            ('admin', 1, None),
+            ('viewer', 2, None),
+            ('editor', None, 7),
+        ])
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', [
+            {
+                'user_relation_class': Membership,
+                'role_field': 'role__name',
+                'getters': [
+                    {'key': 'project_id', 'getter': RelationRolesGetter()},
+                    {'key': 'entity_id', 'getter': RelationRolesGetter()},
+                ]
+            },
+        ])
+        self.role_classes.start()
+
+    def tearDown(self):
+        self.role_classes.stop()
+
+    def test_one_query_for_all_params(self):
+        self.assertEqual(
+            get_user_roles_by_params('user-1', {'project_id': '1', 'entity_id': 7, 'cursor': 'abc'}),
+            {'project_id': {'admin'}, 'entity_id': {'editor'}, 'cursor': set()}
+        )
+        query, = Membership.objects.queries
+        self.assertEqual(query['kwargs'], {'user_id': 'user-1'})
+        self.assertEqual(str(query['args'][0]), "(OR: ('project_id__in', ['1']), ('entity_id__in', [7]))")
+        self.assertEqual(query['fields'], ('role__name', 'project_id', 'entity_id'))
+
+    def test_single_param(self):
+        self.assertEqual(get_user_roles_by_param('user-1', 'project_id', 2), {'viewer'})
+        self.assertEqual(len(Membership.objects.queries), 1)
+
+    def test_shared_getter(self):
+        getter = RelationRolesGetter()
+        with mock.patch('authoriz.config.ROLE_CLASSES', [
+            {
+                'user_relation_class': Membership,
+                'getters': [
+                    {'key': 'project_id', 'getter': getter},
+                    {'key': 'entity_id', 'getter': getter},
+                ]
+            },
+        ]):
+            self.assertEqual(
+                get_user_roles_by_params('user-1', {'project_id': 1, 'entity_id': 7}),
+                {'project_id': {'admin'}, 'entity_id': {'editor'}}
+            )
+        self.assertEqual(Membership.objects.queries[0]['fields'], ('role', 'project_id', 'entity_id'))
+        # Configured instance is not bound.
+        self.assertIsNone(getter.key)
+        self.assertIsNone(getter.relation_class)
+
+
+    def test_query_skipped_on_early_exit(self):
+        with mock.patch('authoriz.config.ROLE_CLASSES', [
+            {
+                'user_relation_class': Membership,
+                'getters': [
+                    {'key': 'project_id', 'getter': lambda user_id, project_id: [] if project_id == 1 else ['viewer']},
+                    {'key': 'project_id', 'getter': RelationRolesGetter(), 'cost': 10},
+                ]
+            },
+        ]):
+            self.assertEqual(get_user_roles_by_param('user-1', 'project_id', 1), set())
+            self.assertEqual(Membership.objects.queries, [])
+
+            self.assertEqual(get_user_roles_by_param_values('user-1', 'project_id', [1, 2]), {1: set(), 2: {'viewer'}})
+        query, = Membership.objects.queries
+        # Only the value whose intersection is not empty is queried.
+        self.assertEqual(str(query['args'][0]), "(AND: ('project_id__in', [2]))")
+
+
+class TestBulkRoleGetters(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.getters = RoleGetters()
+        self.bulk_calls = []
+        role_classes = self.getters.role_classes()
+        role_classes[0]['getters'][0]['getter_many'] = self.get_projects_roles
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', role_classes)
+        self.role_classes.start()
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={})
+                ],
+                target='role:project_2_admin'
+            )
+        ])
+
+    def tearDown(self):
+        self.role_classes.stop()
+        setup_test_parser([])
+        clear_cache()
+
+    def get_projects_roles(self, user_id, project_ids):
+        self.bulk_calls.append(list(project_ids))
+        # Values could come back in their string form.
+        return {str(project_id): [f'project_{project_id}_admin'] for project_id in project_ids if project_id != 3}
+
+    def test_bulk_getter(self):
+        self.assertEqual(
+            get_user_roles_by_param_values('user-1', 'project_id', [1, 2, 3]),
+            {1: {'project_1_admin'}, 2: {'project_2_admin'}, 3: set()}
+        )
+        self.assertEqual(get_user_roles_by_param('user-1', 'project_id', 4), {'project_4_admin'})
+        self.assertEqual(self.bulk_calls, [[1, 2, 3], [4]])
+        self.assertEqual(self.getters.calls, [])
+
+    def test_fallback_to_getter(self):
+        self.assertEqual(
+            get_user_roles_by_param_values('user-1', 'entity_id', [7, 8]),
+            {7: {'entity_7_viewer', 'viewer'}, 8: {'entity_8_viewer', 'viewer'}}
+        )
+        self.assertEqual(self.getters.calls, [('entity_id', 7), ('entity_id', 8)])
+
+    def test_is_user_allowed_many(self):
+        self.assertEqual(
+            PermissionsService.is_user_allowed_many(
+                'user-1',
+                ['prj:RetrieveProject'],
+                [{'project_id': project_id} for project_id in [1, 2, 3, 2]]
+            ),
+            [False, True, False, True]
+        )
+        self.assertEqual(self.bulk_calls, [[1, 2, 3]])
+
+        # Cached roles are not resolved again.
+        PermissionsService.is_user_allowed_many('user-1', ['prj:RetrieveProject'], [{'project_id': 2}, {'project_id': 5}])
+        self.assertEqual(self.bulk_calls, [[1, 2, 3], [5]])
+
+
+def get_member_roles(user_id, project_id):
+    return ['member']
+
+
+class ProjectRole(models.TextChoices):
+    ADMIN = 'admin'
+    MEMBER = 'member'
+
+
+class BillingRole(models.TextChoices):
+    ACCOUNTANT = 'accountant'
+
+
+class TestRolesPlan(APITestCase):
+    def setUp(self):
+        clear_cache()
+        self.calls = []
+        self.role_classes = mock.patch('authoriz.config.ROLE_CLASSES', [
+            {
+                'enum': ProjectRole,
+                'getters': [
+                    {'key': 'project_id', 'getter': self.get_remote_roles, 'cost': 10},
+                    {'key': 'project_id', 'getter': self.get_local_roles},
+                    {'key': 'project_id', 'getter': 'authoriz.tests.roles.tests.get_member_roles'},
+                ]
+            },
+            {
+                'enum': BillingRole,
+                'getters': [
+                    {'key': 'project_id', 'getter': self.get_billing_roles},
+                ]
+            },
+        ])
+        self.role_classes.start()
+
+    def tearDown(self):
+        self.role_classes.stop()
+        setup_test_parser([])
+        clear_cache()
+
+    def get_remote_roles(self, user_id, project_id):
+        self.calls.append(('remote', project_id))
+        return ['admin', 'member']
+
+    def get_local_roles(self, user_id, project_id):
+        self.calls.append(('local', project_id))
+        return ['admin', 'member'] if project_id == 1 else ['admin']
+
+    def get_billing_roles(self, user_id, project_id):
+        self.calls.append(('billing', project_id))
+        return ['accountant']
+
+    def test_getters_resolved_once(self):
+        with mock.patch('authoriz.utils.roles.resolve_object', wraps=resolve_object) as resolve:
+            get_roles_plan()
+            get_user_roles_by_param('user-1', 'project_id', 1)
+            get_user_roles_by_param('user-1', 'project_id', 1)
+        self.assertEqual(resolve.call_count, 1)
+        self.assertEqual(get_roles_plan().params, frozenset(['project_id']))
+
+    def test_early_exit(self):
+        self.assertEqual(
+            get_user_roles_by_param_values('user-1', 'project_id', [1, 2]),
+            {1: {'member', 'accountant'}, 2: {'accountant'}}
+        )
+        # Cheap getter runs first, the expensive one is called
+        # only for the value whose intersection is not empty.
+        self.assertEqual(self.calls, [('local', 1), ('local', 2), ('remote', 1), ('billing', 1), ('billing', 2)])
+
+    def test_unreferenced_classes_skipped(self):
+        self.assertEqual(
+            get_user_roles_by_params_values('user-1', {'project_id': [1]}, referenced_roles=frozenset(['member'])),
+            {'project_id': {1: {'member'}}}
+        )
+        self.assertNotIn(('billing', 1), self.calls)
+
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={})
+                ],
+                target='role:accountant'
+            )
+        ])
+        self.calls.clear()
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+        self.assertEqual(self.calls, [('billing', 1)])
+
+    def test_rules_reloaded(self):
+        def rule(role):
+            return PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(namespace='prj', action_name='RetrieveProject', params={})
+                ],
+                target=f'role:{role}'
+            )
+
+        setup_test_parser([rule('member')])
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+        self.assertEqual(get_user_roles_by_params_from_cache('user-1', {'project_id': 1}), {'project_id': ['member']})
+
+        # Roles cached without billing role class are cleared once it is referenced.
+        setup_test_parser([rule('accountant')])
+        self.assertEqual(get_user_roles_by_params_from_cache('user-1', {'project_id': 1}), {})
+        self.assertTrue(PermissionsService.is_user_allowed('user-1', ['prj:RetrieveProject'], {'project_id': 1}))
+
+        # Reload not changing role classes keeps cached roles.
+        setup_test_parser([rule('accountant'), rule('accountant')])
+        self.assertEqual(get_user_roles_by_params_from_cache('user-1', {'project_id': 1}), {'project_id': ['accountant']})
@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from rest_framework.test import APITestCase, override_settings
+
+from authoriz.cache import clear_cache
+from authoriz.dataclasses import PermissionsRule, ParsedAction
+from authoriz.permissions.base import BaseServicePermission
+from authoriz.tests.parsing.utils import setup_test_parser
+from authoriz.tracing import RecordingTracer, InMemorySpanExporter, Tracer, NOOP_SPAN, set_tracer
+from authoriz.utils.permissions import SkipPermission
+
+
+class ProjectPermission(BaseServicePermission):
+    def get_project_id(self, request, view):
+        return request.project_id
+
+
+class SkippingPermission(BaseServicePermission):
+    def get_project_id(self, request, view):
+        return SkipPermission()
+
+
+@override_settings(ACTION_RULES_SERVICE={
+    **getattr(settings, 'ACTION_RULES_SERVICE', {}),
+    "DISABLE_PERMISSIONS_CHECK": False
+})
+class TestTracing(APITestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        set_tracer(RecordingTracer(self.exporter))
+        clear_cache()
+        setup_test_parser([
+            PermissionsRule(
+                name='Rule 1',
+                effect='allow',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='RetrieveProject',
+                        params={
+                            'project_id': 1
+                        }
+                    )
+                ],
+                target='*'
+            ),
+            PermissionsRule(
+                name='Rule 2',
+                effect='deny',
+                actions=[
+                    ParsedAction(
+                        namespace='prj',
+                        action_name='RetrieveProject',
+                        params={
+                            'project_id': 2
+                        }
+                    )
+                ],
+                target='role:guest'
+            )
+        ])
+
+    def tearDown(self):
+        set_tracer(None)
+
+    @staticmethod
+    def _request(project_id):
+        return SimpleNamespace(
+            user=SimpleNamespace(id='tracing-user'),
+            method='GET',
+            project_id=project_id
+        )
+
+    def test_noop_tracer(self):
+        tracer = Tracer()
+        with tracer.start_span('span', a=1) as span:
+            span.set_attribute('b', 2)
+        self.assertIs(span, NOOP_SPAN)
+
+    def test_nested_spans(self):
+        tracer = RecordingTracer(self.exporter)
+        with tracer.start_span('parent') as parent:
+            with tracer.start_span('child', a=1) as child:
+                child.set_attribute('b', 2)
+
+        self.assertEqual(child.parent_id, parent.span_id)
+        self.assertEqual(child.trace_id, parent.trace_id)
+        self.assertEqual(child.attributes, {'a': 1, 'b': 2})
+        self.assertEqual([s.name for s in self.exporter.get_finished_spans()], ['child', 'parent'])
+
+    def test_permission_check_spans(self):
+        permission = ProjectPermission(
+            actions_permissions={'retrieve': ['prj:RetrieveProject']},
+            action='retrieve'
+        )
+
+        with mock.patch('authoriz.config.ROLE_CLASSES', [{
+            'getters': [{'key': 'project_id', 'getter': lambda user_id, project_id: []}]
+        }]):
+            self.assertTrue(permission.has_permission(self._request(1), SimpleNamespace()))
+
+        root, = self.exporter.get_finished_spans('authoriz.has_permission')
+        check, = self.exporter.get_finished_spans('authoriz.is_user_allowed')
+        getter, = self.exporter.get_finished_spans('authoriz.param_getter')
+        roles, = self.exporter.get_finished_spans('authoriz.resolve_roles')
+        evaluation, = self.exporter.get_finished_spans('authoriz.evaluate_rules')
+        self.assertEqual(getter.attributes['getter'], 'get_project_id')
+        # Getters required by the actions are called before the check.
+        self.assertEqual(check.parent_id, root.span_id)
+        self.assertEqual(getter.parent_id, root.span_id)
+        self.assertEqual(getter.trace_id, root.trace_id)
+        self.assertEqual(check.attributes['roles_skipped'], False)
+        self.assertEqual(roles.attributes['cache'], 'miss')
+        self.assertEqual(evaluation.attributes['rules_visited'], 1)
+        self.assertEqual(evaluation.attributes['namespaces_count'], 1)
+        self.assertEqual(
+            [span.attributes['kind'] for span in self.exporter.get_finished_spans('authoriz.cache.get_many')],
+            ['aur', 'uaa']
+        )
+        self.assertTrue(self.exporter.get_finished_spans('authoriz.cache.set_many'))
+
+    def test_permission_check_short_circuit(self):
+        permission = SkippingPermission(
+            actions_permissions={'retrieve': ['prj:RetrieveProject']},
+            action='retrieve'
+        )
+
+        self.assertTrue(permission.has_permission(self._request(1), SimpleNamespace()))
+
+        root, = self.exporter.get_finished_spans('authoriz.has_permission')
+        self.assertEqual(root.attributes['short_circuit'], 'skip')
+        self.assertEqual(self.exporter.get_finished_spans('authoriz.resolve_roles'), [])
+
+    def test_roles_skipped(self):
+        permission = ProjectPermission(
+            actions_permissions={'list': ['prj:ListProjects']},
+            action='list'
+        )
+
+        with mock.patch('authoriz.config.ROLE_CLASSES', [{
+            'getters': [{'key': 'project_id', 'getter': lambda user_id, project_id: []}]
+        }]):
+            self.assertFalse(permission.has_permission(self._request(1), SimpleNamespace()))
+
+        check, = self.exporter.get_finished_spans('authoriz.is_user_allowed')
+        self.assertEqual(check.attributes['roles_skipped'], True)
+        # Role getter params are still read, so their getters could skip or deny the check.
+        self.assertEqual(
+            [span.attributes['getter'] for span in self.exporter.get_finished_spans('authoriz.param_getter')],
+            ['get_project_id']
+        )
+        self.assertEqual(self.exporter.get_finished_spans('authoriz.resolve_roles'), [])
@@ -0,0 +1,204 @@
+"""
+Tracing functionality for authorization module.
+
+Permission check is split into spans (params getters, roles resolution,
+cache operations, rules evaluation). By default the tracer is a no-op,
+a real one can be configured with `AUTHORIZ_TRACER` setting.
+"""
+
+import itertools
+import threading
+import time
+
+from authoriz import config
+from authoriz.utils.resolving import resolve_object
+
+
+class Span:
+    """
+    No-op span. Used when tracing is disabled.
+    """
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NOOP_SPAN = Span()
+
+
+class Tracer:
+    """
+    Base tracer. Creates no-op spans so disabled
+    tracing has no overhead.
+    """
+    enabled = False
+
+    def start_span(self, name, **attributes) -> Span:
+        """
+        Start span to use as a context manager.
+        """
+        return NOOP_SPAN
+
+
+class RecordedSpan(Span):
+    """
+    Span data recorded by `RecordingTracer`.
+    """
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = None
+        self.trace_id = None
+        self.parent_id = None
+        self.start_time = None
+        self.end_time = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration(self):
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_time = time.perf_counter()
+        if exc_val is not None:
+            self.error = repr(exc_val)
+        self.tracer._pop(self)
+        return False
+
+    def __repr__(self):
+        return f'RecordedSpan({self.name!r}, {self.attributes!r})'
+
+
+class InMemorySpanExporter:
+    """
+    Exporter keeping finished spans in memory. Useful for tests.
+    """
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span: RecordedSpan):
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self, name=None):
+        with self._lock:
+            spans = list(self._spans)
+        if name is not None:
+            spans = [span for span in spans if span.name == name]
+        return spans
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+class RecordingTracer(Tracer):
+    """
+    Tracer that records spans with parent-child relations
+    and passes finished ones to the exporter.
+    """
+    enabled = True
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter or InMemorySpanExporter()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span: RecordedSpan):
+        stack = self._stack()
+        span.span_id = next(self._ids)
+        if stack:
+            span.parent_id = stack[-1].span_id
+            span.trace_id = stack[-1].trace_id
+        else:
+            span.trace_id = span.span_id
+        stack.append(span)
+
+    def _pop(self, span: RecordedSpan):
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        self.exporter.export(span)
+
+    def start_span(self, name, **attributes) -> Span:
+        return RecordedSpan(self, name, attributes)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer passing spans to OpenTelemetry API. Requires
+    `opentelemetry-api` package to be installed.
+    """
+    enabled = True
+
+    def __init__(self, name='authoriz'):
+        from opentelemetry import trace
+        self._tracer = trace.get_tracer(name)
+
+    def start_span(self, name, **attributes):
+        return self._tracer.start_as_current_span(name, attributes=attributes)
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get configured tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        tracer = config.TRACER
+        if tracer is None:
+            tracer = Tracer()
+        else:
+            if isinstance(tracer, str):
+                tracer = resolve_object(tracer)
+            if isinstance(tracer, type):
+                tracer = tracer()
+        _tracer = tracer
+    return _tracer
+
+
+def set_tracer(tracer: Tracer = None):
+    """
+    Replace tracer. None resets it to the configured one.
+    """
+    global _tracer
+    _tracer = tracer
+
+
+__all__ = [
+    'Span',
+    'NOOP_SPAN',
+    'Tracer',
+    'RecordedSpan',
+    'InMemorySpanExporter',
+    'RecordingTracer',
+    'OpenTelemetryTracer',
+    'get_tracer',
+    'set_tracer',
+]
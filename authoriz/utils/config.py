@@ -5,5 +5,6 @@ def get_service_settings():
     return {
         'RULES_PARSERS': config.RULES_PARSERS,
         'DISABLE_PARSING': config.DISABLE_PARSING,
-        'DISABLE_PERMISSIONS_CHECK': config.DISABLE_PERMISSIONS_CHECK
+        'DISABLE_PERMISSIONS_CHECK': config.DISABLE_PERMISSIONS_CHECK,
+        'RULES_ENGINE': config.RULES_ENGINE,
     }
@@ -2,6 +2,7 @@
 Supplementary functionality for permissions parsing.
 """
 
+from functools import lru_cache
 from typing import List
 from urllib.parse import parse_qs
 
@@ -18,9 +19,11 @@ def merge_raw_rules_lists(rules_lists: List[List[dict]]) -> List[dict]:
     return merged_rules
 
 
+@lru_cache(maxsize=None)
 def parse_action(action: str) -> ParsedAction:
     """
-    Parse action plain string into dataclass.
+    Parse action plain string into dataclass. Parsed actions
+    are frozen so the same instance is shared by all the rules.
     """
     assert isinstance(action, str)
     namespace, full_action_name = action.split(':')
@@ -1,3 +1,6 @@
+from typing import Callable, Dict, Mapping
+
+
 class SkipPermission:
     """
     Return it with getter in permission class
@@ -22,7 +25,61 @@ class DenyPermission:
         return False
 
 
+class PermissionShortCircuit(Exception):
+    """
+    Raised by `LazyParams` when getter returns `SkipPermission`
+    or `DenyPermission` to stop the permission check.
+    """
+    def __init__(self, allowed: bool):
+        super().__init__(allowed)
+        self.allowed = allowed
+
+
+class LazyParams(Mapping):
+    """
+    Params mapping that calls param getter only when
+    the param is accessed for the first time.
+    """
+    def __init__(self, getters: Dict[str, Callable[[], object]], values=None):
+        self._getters = getters
+        self._values = dict(values or {})
+
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        value = self._getters[key]()
+        if SkipPermission.check(value):
+            raise PermissionShortCircuit(True)
+        if DenyPermission.check(value):
+            raise PermissionShortCircuit(False)
+        self._values[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._values or key in self._getters
+
+    def __iter__(self):
+        yield from self._values
+        for key in self._getters:
+            if key not in self._values:
+                yield key
+
+    def __len__(self):
+        return len(self._values.keys() | self._getters.keys())
+
+    def resolved(self) -> dict:
+        """
+        Get params that are already resolved.
+        """
+        return dict(self._values)
+
+    def __repr__(self):
+        return f'LazyParams(resolved={self._values!r}, pending={sorted(self._getters.keys() - self._values.keys())!r})'
+
+
 __all__ = [
     'SkipPermission',
     'DenyPermission',
+    'PermissionShortCircuit',
+    'LazyParams',
 ]
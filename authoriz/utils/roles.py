@@ -1,10 +1,16 @@
-from authoriz.config import ROLE_CLASSES
+import copy
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from django.db.models import Q
+
+from authoriz import config
+from authoriz.metrics import get_metrics_collector, get_callable_name, ROLE_GETTER_LATENCY
 from authoriz.utils.resolving import resolve_object
 
 
 def get_all_roles():
     all_roles = []
-    for role_class in ROLE_CLASSES:
+    for role_class in config.ROLE_CLASSES:
         class_descriptor = role_class['enum']
         if isinstance(class_descriptor, str):
             cls = resolve_object(class_descriptor)
@@ -14,24 +20,336 @@ def get_all_roles():
     return all_roles
 
 
-def get_user_roles_by_param(user_id, param_name, param_value):
-    roles = set()
-    for role_class in ROLE_CLASSES:
-        roles_by_class = set()
-        for getter in [x for x in role_class['getters'] if x['key'] == param_name]:
-            if isinstance(getter['getter'], str):
-                getter_function = resolve_object(getter['getter'])
-            else:
-                getter_function = getter['getter']
-            roles_by_getter = set(getter_function(user_id, param_value))
-            if len(roles_by_class) == 0:
-                roles_by_class = roles_by_getter
-            else:
-                roles_by_class &= roles_by_getter
-        roles |= roles_by_class
+def get_role_params():
+    """
+    Get names of the params role getters are keyed on.
+    """
+    return get_roles_plan().params
+
+
+def get_relation_fields(role_class: dict) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Get (user field, role field, {param name: field}) of the role class
+    relation model. Params fields default to the getters keys.
+    """
+    param_fields = role_class.get('param_fields')
+    if param_fields is None:
+        param_fields = {
+            getter['key']: getter['key'] for getter in role_class['getters']
+            if getter['key'] is not None
+        }
+    return role_class.get('user_field', 'user_id'), role_class.get('role_field', 'role'), dict(param_fields)
+
+
+class RelationRolesGetter:
+    """
+    Role getter fetching roles from `user_relation_class` of the role
+    class. Model and fields are taken from the role class config unless
+    they are specified. All the relation getters of a role class are
+    resolved with one query:
+
+        SELECT role, project_id, entity_id FROM relation
+        WHERE user_id = %s AND (project_id IN (...) OR entity_id IN (...))
+    """
+    def __init__(self, relation_class=None, user_field=None, role_field=None, param_field=None):
+        self.relation_class = relation_class
+        self.user_field = user_field
+        self.role_field = role_field
+        self.param_field = param_field
+        self.key = None
+
+    def bind(self, role_class: dict, key: str) -> 'RelationRolesGetter':
+        """
+        Get a copy bound to the role class param key, missing model and
+        fields are filled from the role class config. Configured instance
+        is not changed, so it could be shared by several keys and classes.
+        """
+        user_field, role_field, param_fields = get_relation_fields(role_class)
+        relation_class = self.relation_class or role_class['user_relation_class']
+        if isinstance(relation_class, str):
+            relation_class = resolve_object(relation_class)
+        bound = copy.copy(self)
+        bound.relation_class = relation_class
+        bound.user_field = self.user_field or user_field
+        bound.role_field = self.role_field or role_field
+        bound.param_field = self.param_field or param_fields.get(key, key)
+        bound.key = key
+        return bound
+
+    @property
+    def query_key(self):
+        return self.relation_class, self.user_field, self.role_field
+
+    def __call__(self, user_id, param_value):
+        return fetch_relation_roles([self], user_id, {self.key: [param_value]})[self][param_value]
+
+    def many(self, user_id, values) -> dict:
+        """
+        Bulk getter, roles of the user by each of values.
+        """
+        return fetch_relation_roles([self], user_id, {self.key: list(values)})[self]
+
+    def __repr__(self):
+        return f'RelationRolesGetter({getattr(self.relation_class, "__name__", None)}.{self.param_field})'
+
+
+def _by_str(values):
+    # Params values could come as strings or as model field values.
+    return {str(value): value for value in values}
+
+
+def fetch_relation_roles(getters: List[RelationRolesGetter], user_id,
+                         values_by_param: Dict[str, list]) -> Dict[RelationRolesGetter, Dict[object, set]]:
+    """
+    Fetch roles of the relation getters with the same query key
+    by each of their params values with one query.
+    """
+    getters = [getter for getter in getters if values_by_param.get(getter.key)]
+    roles = {getter: {value: set() for value in values_by_param[getter.key]} for getter in getters}
+    if not getters:
+        return roles
+    relation_class, user_field, role_field = getters[0].query_key
+    condition = Q()
+    for getter in getters:
+        condition |= Q(**{f'{getter.param_field}__in': list(values_by_param[getter.key])})
+    rows = relation_class.objects.filter(
+        condition,
+        **{user_field: user_id}
+    ).values_list(role_field, *[getter.param_field for getter in getters])
+    values = [_by_str(values_by_param[getter.key]) for getter in getters]
+    for role, *row_values in rows:
+        for getter, getter_values, row_value in zip(getters, values, row_values):
+            value = getter_values.get(str(row_value), _MISSING)
+            if value is not _MISSING:
+                roles[getter][value].add(role)
+    return roles
+
+
+_MISSING = object()
+
+
+# Cost of the getter if it is not specified with `cost` hint.
+DEFAULT_GETTER_COST = 1
+
+
+def _resolve_getter(role_class, getter, name='getter'):
+    getter_function = getter.get(name)
+    if isinstance(getter_function, str):
+        getter_function = resolve_object(getter_function)
+    if isinstance(getter_function, RelationRolesGetter):
+        getter_function = getter_function.bind(role_class, getter['key'])
+    return getter_function
+
+
+def _get_class_roles(role_class) -> Optional[FrozenSet[str]]:
+    class_descriptor = role_class.get('enum')
+    if class_descriptor is None:
+        return None
+    if isinstance(class_descriptor, str):
+        class_descriptor = resolve_object(class_descriptor)
+    return frozenset(str(role) for role in class_descriptor.values)
+
+
+class GetterPlan:
+    """
+    Role getter with resolved callables.
+    """
+    __slots__ = ('key', 'getter', 'getter_many', 'name', 'many_name', 'cost')
+
+    def __init__(self, role_class: dict, getter: dict):
+        self.key = getter['key']
+        self.getter = _resolve_getter(role_class, getter)
+        self.getter_many = _resolve_getter(role_class, getter, 'getter_many')
+        self.name = get_callable_name(getter['getter'])
+        self.many_name = get_callable_name(getter['getter_many']) if self.getter_many is not None else None
+        self.cost = getter.get('cost', DEFAULT_GETTER_COST)
+
+    @property
+    def is_relation(self) -> bool:
+        return self.getter_many is None and isinstance(self.getter, RelationRolesGetter)
+
+    def __call__(self, metrics, user_id, values) -> Dict[object, set]:
+        """
+        Get roles by each of values. Bulk getter (`getter_many`)
+        is used if it is specified.
+        """
+        if self.getter_many is not None:
+            with metrics.timer(ROLE_GETTER_LATENCY, getter=self.many_name):
+                roles = self.getter_many(user_id, values)
+            roles = {str(value): value_roles for value, value_roles in roles.items()}
+            return {value: set(roles.get(str(value), ())) for value in values}
+        result = {}
+        for value in values:
+            with metrics.timer(ROLE_GETTER_LATENCY, getter=self.name):
+                result[value] = set(self.getter(user_id, value))
+        return result
+
+
+class RoleClassPlan:
+    """
+    Getters of a role class grouped by param key and sorted
+    by cost, so cheap getters run first.
+    """
+    __slots__ = ('roles', 'getters_by_key', 'relation_queries')
+
+    def __init__(self, role_class: dict):
+        # Roles of the class enum, None if it is not specified.
+        self.roles = _get_class_roles(role_class)
+        getters = sorted(
+            (GetterPlan(role_class, getter) for getter in role_class['getters'] if getter['key'] is not None),
+            key=lambda getter: getter.cost
+        )
+        self.getters_by_key: Dict[str, List[GetterPlan]] = {}
+        self.relation_queries: Dict[tuple, List[RelationRolesGetter]] = {}
+        for getter in getters:
+            self.getters_by_key.setdefault(getter.key, []).append(getter)
+            if getter.is_relation:
+                self.relation_queries.setdefault(getter.getter.query_key, []).append(getter.getter)
+
+    def resolve(self, metrics, user_id, values_by_param: Dict[str, list]) -> Dict[str, Dict[object, set]]:
+        """
+        Get roles of the class by each of values of each param. Roles
+        by a value are the intersection of its getters results, the
+        rest of getters are skipped once it is empty. Relation getters
+        with the same query are fetched together when the first of them
+        is reached, only with the values roles are still needed for.
+        """
+        relation_roles = {}
+        # Values of each param roles are still needed for.
+        pending_by_key = dict(values_by_param)
+        roles = {}
+        for key, getters in self.getters_by_key.items():
+            values = values_by_param.get(key)
+            if not values:
+                continue
+            key_roles = None
+            for getter in getters:
+                pending = values if key_roles is None else [value for value in values if key_roles[value]]
+                if not pending:
+                    break
+                if getter.is_relation:
+                    if getter.getter not in relation_roles:
+                        pending_by_key[key] = pending
+                        relation_roles.update(self._fetch_relation_roles(metrics, user_id, getter, pending_by_key))
+                    roles_by_getter = relation_roles[getter.getter]
+                else:
+                    roles_by_getter = getter(metrics, user_id, pending)
+                if key_roles is None:
+                    key_roles = {value: roles_by_getter[value] for value in values}
+                else:
+                    for value in pending:
+                        key_roles[value] = key_roles[value] & roles_by_getter[value]
+            pending_by_key[key] = ()
+            roles[key] = key_roles
+        return roles
+
+    def _fetch_relation_roles(self, metrics, user_id, getter: GetterPlan, values_by_param: Dict[str, list]):
+        query_getters = [
+            query_getter for query_getter in self.relation_queries[getter.getter.query_key]
+            if values_by_param.get(query_getter.key)
+        ]
+        with metrics.timer(ROLE_GETTER_LATENCY, getter=repr(query_getters[0])):
+            return fetch_relation_roles(query_getters, user_id, values_by_param)
+
+
+class RolesPlan:
+    """
+    Role resolution plan compiled from `ROLE_CLASSES`.
+    """
+    def __init__(self, role_classes: List[dict]):
+        self.classes = tuple(RoleClassPlan(role_class) for role_class in role_classes)
+        self.params = frozenset(key for role_class in self.classes for key in role_class.getters_by_key)
+        self._selection = (None, self.classes)
+
+    def select(self, referenced_roles: Optional[FrozenSet[str]] = None) -> Tuple[RoleClassPlan, ...]:
+        """
+        Get role classes whose roles could be referenced by rules.
+        Classes without enum are always selected.
+        """
+        if referenced_roles is None:
+            return self.classes
+        selected_for, classes = self._selection
+        if selected_for is not referenced_roles:
+            classes = tuple(
+                role_class for role_class in self.classes
+                if role_class.roles is None or not role_class.roles.isdisjoint(referenced_roles)
+            )
+            self._selection = (referenced_roles, classes)
+        return classes
+
+
+_roles_plan = (None, None)
+
+
+def get_roles_plan() -> RolesPlan:
+    """
+    Get roles plan of `ROLE_CLASSES`, it is compiled once.
+    """
+    global _roles_plan
+    role_classes, plan = _roles_plan
+    if role_classes is not config.ROLE_CLASSES or plan is None:
+        plan = RolesPlan(config.ROLE_CLASSES)
+        _roles_plan = (config.ROLE_CLASSES, plan)
+    return plan
+
+
+def get_user_roles_by_params_values(user_id, values_by_param: Dict[str, list],
+                                    referenced_roles: Optional[FrozenSet[str]] = None) -> Dict[str, Dict[object, set]]:
+    """
+    Get user roles by each of values of each param. Relation getters
+    of a role class are resolved with one query, bulk getters are
+    called once per param. With `referenced_roles` role classes
+    none of whose roles are referenced by rules are skipped.
+    """
+    metrics = get_metrics_collector()
+    roles = {
+        param_name: {value: set() for value in values}
+        for param_name, values in values_by_param.items()
+    }
+    for role_class in get_roles_plan().select(referenced_roles):
+        for key, key_roles in role_class.resolve(metrics, user_id, values_by_param).items():
+            for value, value_roles in key_roles.items():
+                roles[key][value] |= value_roles
     return roles
 
 
+def get_user_roles_by_params(user_id, params: dict) -> Dict[str, set]:
+    """
+    Get user roles by each of params.
+    """
+    roles = get_user_roles_by_params_values(user_id, {
+        param_name: [param_value] for param_name, param_value in params.items()
+    })
+    return {
+        param_name: roles[param_name][param_value]
+        for param_name, param_value in params.items()
+    }
+
+
+def get_user_roles_by_param_values(user_id, param_name, values) -> Dict[object, set]:
+    """
+    Get user roles by each of param values.
+    """
+    return get_user_roles_by_params_values(user_id, {param_name: list(values)})[param_name]
+
+
+def get_user_roles_by_param(user_id, param_name, param_value):
+    return get_user_roles_by_params(user_id, {param_name: param_value})[param_name]
+
+
 __all__ = [
     'get_all_roles',
+    'get_role_params',
+    'get_relation_fields',
+    'RelationRolesGetter',
+    'fetch_relation_roles',
+    'DEFAULT_GETTER_COST',
+    'GetterPlan',
+    'RoleClassPlan',
+    'RolesPlan',
+    'get_roles_plan',
+    'get_user_roles_by_params_values',
+    'get_user_roles_by_params',
+    'get_user_roles_by_param_values',
+    'get_user_roles_by_param',
 ]
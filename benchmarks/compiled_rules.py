@@ -0,0 +1,124 @@
+"""
+Memory and speed comparison of parsed rules tree and compiled rules.
+
+Usage:
+    python benchmarks/compiled_rules.py [rules count]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+settings.configure(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+django.setup()
+
+from django.db import models
+
+from authoriz.dataclasses import ParsedAction, PermissionsRule
+from authoriz.namespaces.base import ActionsNamespace
+from authoriz.parsing.base import PermissionsParser
+from authoriz.parsing.compiled import CompiledRules
+from authoriz.parsing.service import RulesParsingService
+
+ACTIONS_COUNT = 50
+OBJECTS_COUNT = 2000
+ROLES = [f'role{i}' for i in range(20)]
+
+BenchActions = models.TextChoices(
+    'BenchActions',
+    [(f'Action{i}', f'bench:Action{i}') for i in range(ACTIONS_COUNT)]
+)
+
+
+class BenchNamespace(ActionsNamespace):
+    name = 'bench'
+    Actions = BenchActions
+    params = {
+        f'bench:Action{i}': ['object_id'] for i in range(ACTIONS_COUNT)
+    }
+
+
+class ListParser(PermissionsParser):
+    def __init__(self, rules):
+        self.rules = rules
+
+    def get_rules(self):
+        return self.rules
+
+
+def generate_rules(rnd, count):
+    rules = []
+    for _ in range(count):
+        params = {}
+        if rnd.random() < 0.9:
+            params['object_id'] = rnd.randrange(OBJECTS_COUNT)
+        if rnd.random() < 0.7:
+            target = f'role:{rnd.choice(ROLES)}'
+        elif rnd.random() < 0.9:
+            target = f'user{rnd.randrange(1000)}'
+        else:
+            target = '*'
+        rules.append(PermissionsRule(
+            name='Rule',
+            effect='allow' if rnd.random() < 0.8 else 'deny',
+            actions=[
+                ParsedAction(
+                    namespace='bench',
+                    action_name=f'Action{rnd.randrange(ACTIONS_COUNT)}',
+                    params=params
+                )
+            ],
+            target=target
+        ))
+    return rules
+
+
+def measure_memory(func):
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def measure_time(func, lookups):
+    start = time.perf_counter()
+    results = [func(*lookup) for lookup in lookups]
+    return results, time.perf_counter() - start
+
+
+def main(rules_count):
+    rnd = random.Random(0)
+    rules = generate_rules(rnd, rules_count)
+    (_, parsed_rules), tree_size = measure_memory(lambda: ListParser(rules).parse({}))
+    compiled_rules, compiled_size = measure_memory(lambda: CompiledRules.compile(parsed_rules))
+    RulesParsingService._PARSED_RULES = parsed_rules
+
+    lookups = [
+        (
+            f'user{rnd.randrange(1000)}',
+            rnd.sample(ROLES, rnd.randint(0, 3)),
+            {'object_id': str(rnd.randrange(OBJECTS_COUNT))}
+        ) for _ in range(2000)
+    ]
+    tree_results, tree_time = measure_time(RulesParsingService._evaluate_rules_tree, lookups)
+    compiled_results, compiled_time = measure_time(compiled_rules.evaluate, lookups)
+    assert tree_results == compiled_results, 'Compiled rules decisions differ from parsed rules tree.'
+
+    print(f'Rules: {rules_count}, lookups: {len(lookups)}')
+    print(f'{"":10}{"memory, KiB":>14}{"evaluation, ms":>18}')
+    print(f'{"tree":10}{tree_size / 1024:>14.1f}{tree_time * 1000:>18.1f}')
+    print(f'{"compiled":10}{compiled_size / 1024:>14.1f}{compiled_time * 1000:>18.1f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
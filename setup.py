@@ -44,6 +44,11 @@ setup(
         'python-rapidjson==1.6',
         'djangorestframework==3.13.1'
     ],
+    # Optional dependencies
+    extras_require={
+        'redis': ['django-redis>=5.0'],
+        'numpy': ['numpy>=1.20'],
+    },
     # https://pypi.org/classifiers/
     classifiers=[
         'Development Status :: 4 - Beta',